@@ -4,14 +4,17 @@ import asyncio
 import datetime
 import json
 import logging
+import orjson
 import uuid
 import re
 import sys
 import gc
+import time
 
 import ctypes
 import platform
 import httpx
+from dataclasses import dataclass
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
@@ -25,6 +28,40 @@ from ..memory.skills import SkillMemory
 
 logger = logging.getLogger("GhostAgent")
 
+# Intent detection runs on every request, so each keyword family is one word-bounded
+# alternation compiled at import ("sh" must not fire on "short")
+_CODING_KEYWORD_RE = re.compile(r"\b(?:python|bash|sh|script|code|def|import|html|css|js|javascript|typescript|react|web|frontend)\b")
+_CODING_ACTION_RE = re.compile(r"\b(?:write|run|execute|debug|fix|create|generate|count|calculate|analyze|scrape|plot|graph|build|develop)\b")
+_SCRIPT_WORD_RE = re.compile(r"\bscript\b")
+_CODE_FILE_EXTENSIONS = (".py", ".js", ".html", ".css", ".ts", ".tsx", ".jsx", ".sh")
+_DBA_KEYWORD_RE = re.compile(r"\b(?:sql|postgres|postgresql|psql|database|pg_stat|explain analyze|query|cte|rdbms|dba|schema|vacuum|mvcc)\b")
+_META_KEYWORD_RE = re.compile(r"\b(?:title|name this|rename|summary|summarize|caption|describe)\b")
+# Bare arithmetic ("2 + 2 = ?") is never a coding request
+_ARITHMETIC_ONLY_RE = re.compile(r"^[\d\s\+\-\*\/\(\)\=\?]+$")
+
+@dataclass(frozen=True)
+class IntentFlags:
+    coding: bool
+    dba: bool
+    meta: bool
+
+def _detect_intent(lc: str) -> IntentFlags:
+    """Classifies the (lower-cased) last user message; picks the persona and whether coding nodes are used."""
+    has_coding_intent = False
+    
+    if _CODING_KEYWORD_RE.search(lc) and _CODING_ACTION_RE.search(lc):
+        has_coding_intent = True
+    if any(ext in lc for ext in _CODE_FILE_EXTENSIONS) or _SCRIPT_WORD_RE.search(lc): 
+        has_coding_intent = True
+    if _ARITHMETIC_ONLY_RE.match(lc):
+        has_coding_intent = False
+    
+    return IntentFlags(
+        coding=has_coding_intent,
+        dba=bool(_DBA_KEYWORD_RE.search(lc)),
+        meta=bool(_META_KEYWORD_RE.search(lc)),
+    )
+
 def extract_json_from_text(text: str) -> dict:
     """Safely extracts JSON from LLM outputs, ignoring conversational filler and markdown blocks."""
     import re, json
@@ -53,6 +90,8 @@ class GhostContext:
         self.scheduler = None
         self.last_activity_time = datetime.datetime.now()
         self.cached_sandbox_state = None
+        # time.monotonic() deadline after which the listing is rebuilt even without a known mutation
+        self.cached_sandbox_state_expiry = 0.0
 
 class GhostAgent:
     def __init__(self, context: GhostContext):
@@ -273,23 +312,8 @@ class GhostAgent:
                 last_user_content = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
                 lc = last_user_content.lower()
                 
-                coding_keywords = [r"\bpython\b", r"\bbash\b", r"\bsh\b", r"\bscript\b", r"\bcode\b", r"\bdef\b", r"\bimport\b", r"\bhtml\b", r"\bcss\b", r"\bjs\b", r"\bjavascript\b", r"\btypescript\b", r"\breact\b", r"\bweb\b", r"\bfrontend\b"]
-                coding_actions = [r"\bwrite\b", r"\brun\b", r"\bexecute\b", r"\bdebug\b", r"\bfix\b", r"\bcreate\b", r"\bgenerate\b", r"\bcount\b", r"\bcalculate\b", r"\banalyze\b", r"\bscrape\b", r"\bplot\b", r"\bgraph\b", r"\bbuild\b", r"\bdevelop\b"]
-                has_coding_intent = False
-                
-                if any(re.search(k, lc) for k in coding_keywords):
-                    if any(re.search(a, lc) for a in coding_actions): 
-                        has_coding_intent = True
-                if any(ext in lc for ext in [".py", ".js", ".html", ".css", ".ts", ".tsx", ".jsx", ".sh"]) or re.search(r'\bscript\b', lc): 
-                    has_coding_intent = True
-                
-                dba_keywords = [r"\bsql\b", r"\bpostgres\b", r"\bpostgresql\b", r"\bpsql\b", r"\bdatabase\b", r"\bpg_stat\b", r"\bexplain analyze\b", r"\bquery\b", r"\bcte\b", r"\brdbms\b", r"\bdba\b", r"\bschema\b", r"\bvacuum\b", r"\bmvcc\b"]
-                has_dba_intent = any(re.search(k, lc) for k in dba_keywords)
-                
-                meta_keywords = [r"\btitle\b", r"\bname this\b", r"\brename\b", r"\bsummary\b", r"\bsummarize\b", r"\bcaption\b", r"\bdescribe\b"]
-                is_meta_task = any(re.search(k, lc) for k in meta_keywords)
-                if re.match(r'^[\d\s\+\-\*\/\(\)\=\?]+$', lc):
-                    has_coding_intent = False
+                intent = _detect_intent(lc)
+                has_coding_intent, has_dba_intent, is_meta_task = intent.coding, intent.dba, intent.meta
                     
                 profile_context = await asyncio.to_thread(self.context.profile_memory.get_context_string) if self.context.profile_memory else ""
                 profile_context = profile_context.replace("\r", "")
@@ -376,7 +400,7 @@ class GhostAgent:
                     
                     scratch_data = self.context.scratchpad.list_all() if getattr(self.context, 'scratchpad', None) else "None."
                     if has_coding_intent:
-                        if self.context.cached_sandbox_state is None:
+                        if self.context.cached_sandbox_state is None or time.monotonic() >= self.context.cached_sandbox_state_expiry:
                             from ..tools.file_system import tool_list_files
                             params = {
                                 "sandbox_dir": self.context.sandbox_dir, 
@@ -384,6 +408,7 @@ class GhostAgent:
                             }
                             sandbox_state = await tool_list_files(**params)
                             self.context.cached_sandbox_state = sandbox_state
+                            self.context.cached_sandbox_state_expiry = time.monotonic() + float(getattr(self.context.args, 'sandbox_cache_ttl', 30.0))
                         else:
                             sandbox_state = self.context.cached_sandbox_state
                     else:
@@ -724,7 +749,7 @@ You are currently at TURN {turn+1}. Trust your CURRENT PLAN JSON to know what is
                             forget_was_called = True
                         elif fname == "knowledge_base":
                             try:
-                                args = json.loads(tool["function"]["arguments"])
+                                args = orjson.loads(tool["function"]["arguments"])
                                 if args.get("action") == "forget":
                                     forget_was_called = True
                             except: pass
@@ -736,7 +761,7 @@ You are currently at TURN {turn+1}. Trust your CURRENT PLAN JSON to know what is
                             force_stop = True; break
 
                         try:
-                            t_args = json.loads(tool["function"]["arguments"])
+                            t_args = orjson.loads(tool["function"]["arguments"])
                             
                             is_sandbox_mutation = fname == "execute" or \
                                                   (fname == "file_system" and t_args.get("operation") in ["write", "download", "delete", "move", "rename", "unzip", "git_clone"])
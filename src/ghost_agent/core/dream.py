@@ -92,29 +92,39 @@ Return ONLY valid JSON. If no patterns exist, return empty lists.
             ops_log = []
             
             # Process Merged Facts
+            merges = []
             for item in consolidations:
                 synthesis = item.get("synthesis")
                 merged_ids = item.get("merged_ids", [])
                 stripped_ids = [mid.replace("ID:", "").strip() for mid in merged_ids]
-                
                 if synthesis and len(stripped_ids) > 1:
-                    # ADD new fact
-                    await asyncio.to_thread(self.memory.add, synthesis, {"type": "consolidated_fact", "timestamp": "DREAM_CYCLE"})
-                    # DELETE old fragments
-                    await asyncio.to_thread(self.memory.collection.delete, ids=stripped_ids)
+                    merges.append((synthesis, stripped_ids))
+
+            if merges:
+                # One worker hop for the whole batch: ADD each new fact, then DELETE all old fragments at once
+                def apply_merges():
+                    for synthesis, _ in merges:
+                        self.memory.add(synthesis, {"type": "consolidated_fact", "timestamp": "DREAM_CYCLE"})
+                    self.memory.collection.delete(ids=[mid for _, ids in merges for mid in ids])
+
+                await asyncio.to_thread(apply_merges)
+                for synthesis, stripped_ids in merges:
                     ops_log.append(f"Merged {len(stripped_ids)} items -> '{synthesis[:50]}...'")
                     pretty_log("Dream Merge", f"Consolidated {len(stripped_ids)} into 1: {synthesis[:40]}...", icon="✨")
 
             # Process Heuristics (Save to Skills Playbook)
             if heuristics and self.context.skill_memory:
+                def learn_heuristics():
+                    for h in heuristics:
+                        self.context.skill_memory.learn_lesson(
+                            task="Dream Cycle Heuristic Extraction",
+                            mistake="Inefficient or sub-optimal execution patterns.",
+                            solution=h,
+                            memory_system=self.memory
+                        )
+
+                await asyncio.to_thread(learn_heuristics)
                 for h in heuristics:
-                    await asyncio.to_thread(
-                        self.context.skill_memory.learn_lesson,
-                        task="Dream Cycle Heuristic Extraction",
-                        mistake="Inefficient or sub-optimal execution patterns.",
-                        solution=h,
-                        memory_system=self.memory
-                    )
                     ops_log.append(f"Learned Heuristic: '{h[:50]}...'")
                     pretty_log("Dream Heuristic", f"Extracted Rule: {h[:40]}...", icon="💡")
                     
@@ -136,8 +146,7 @@ Return ONLY valid JSON. If no patterns exist, return empty lists.
             return ""
 
         try:
-            content = await asyncio.to_thread(self.context.skill_memory.file_path.read_text)
-            playbook = json.loads(content) if content else []
+            playbook = await asyncio.to_thread(self.context.skill_memory.load_playbook)
         except Exception:
             return "Failed to read playbook."
 
@@ -1,7 +1,9 @@
 import json
 import asyncio
+import itertools
 import logging
-from typing import List, Dict, Any, Optional
+import re
+from typing import List, Dict, Any, Optional, Callable
 import httpx
 from ..utils.logging import Icons, pretty_log
 from ..utils.helpers import get_utc_timestamp
@@ -9,39 +11,40 @@ from ..utils.helpers import get_utc_timestamp
 logger = logging.getLogger("GhostAgent")
 
 class LLMClient:
-    def __init__(self, upstream_url: str, tor_proxy: str = None, swarm_nodes: list = None, worker_nodes: list = None, visual_nodes: list = None, coding_nodes: list = None):
+    # Max nodes scanned by the least_inflight coding strategy
+    LEAST_INFLIGHT_SEARCH_SPACE = 16
+    # Connection caps: the main upstream carries every agent; a swarm/worker/vision/coding node is one box serving a few requests at once
+    UPSTREAM_MAX_CONNECTIONS = 64
+    NODE_MAX_CONNECTIONS = 8
+    # Transport-level reconnect attempts after a failed TCP/TLS connect
+    CONNECT_RETRIES = 2
+
+    def __init__(self, upstream_url: str, tor_proxy: str = None, swarm_nodes: list = None, worker_nodes: list = None, visual_nodes: list = None, coding_nodes: list = None, coding_strategy: str = "round_robin", coding_hedge_ms: int = None, client_factory: Callable[[str], httpx.AsyncClient] = None, log_fn: Callable[..., None] = None):
         self.upstream_url = upstream_url
-        limits = httpx.Limits(max_keepalive_connections=5, max_connections=10)
+        # Callers can pass their own logger (tests pass a no-op) instead of the console pretty_log
+        self._log = log_fn or pretty_log
+        self.coding_strategy = coding_strategy
+        # When set, coding requests are hedged onto a second node after this many milliseconds
+        self.coding_hedge_ms = coding_hedge_ms
         
         # Determine if we need to route through Tor
         # If upstream is NOT localhost, we force Tor usage
         proxy_url = None
         if "127.0.0.1" not in upstream_url and "localhost" not in upstream_url and tor_proxy:
             proxy_url = tor_proxy.replace("socks5://", "socks5h://")
-            pretty_log("LLM Connection", f"Routing upstream traffic via Tor ({proxy_url})", icon=Icons.SHIELD)
+            self._log("LLM Connection", f"Routing upstream traffic via Tor ({proxy_url})", icon=Icons.SHIELD)
 
-        self.http_client = httpx.AsyncClient(
-            base_url=upstream_url, 
-            timeout=600.0, 
-            limits=limits,
-            proxy=proxy_url,
-            follow_redirects=True,
-            http2=False
-        )
+        # A caller-supplied factory (e.g. test doubles) gets each node's base URL instead of a real pooled client
+        build_client = (lambda url, _proxy, _max_connections: client_factory(url)) if client_factory else self._build_client
+
+        self.http_client = build_client(upstream_url, proxy_url, self.UPSTREAM_MAX_CONNECTIONS)
 
         self.swarm_clients = []
         self._swarm_index = 0
         
         if swarm_nodes:
             for node in swarm_nodes:
-                client = httpx.AsyncClient(
-                    base_url=node["url"], 
-                    timeout=600.0, 
-                    limits=limits,
-                    proxy=proxy_url,
-                    follow_redirects=True,
-                    http2=False
-                )
+                client = build_client(node["url"], proxy_url, self.NODE_MAX_CONNECTIONS)
                 self.swarm_clients.append({
                     "client": client,
                     "url": node["url"],
@@ -53,14 +56,7 @@ class LLMClient:
         
         if worker_nodes:
             for node in worker_nodes:
-                client = httpx.AsyncClient(
-                    base_url=node["url"], 
-                    timeout=600.0, 
-                    limits=limits,
-                    proxy=proxy_url,
-                    follow_redirects=True,
-                    http2=False
-                )
+                client = build_client(node["url"], proxy_url, self.NODE_MAX_CONNECTIONS)
                 self.worker_clients.append({
                     "client": client,
                     "url": node["url"],
@@ -72,14 +68,7 @@ class LLMClient:
         
         if visual_nodes:
             for node in visual_nodes:
-                client = httpx.AsyncClient(
-                    base_url=node["url"], 
-                    timeout=600.0, 
-                    limits=limits,
-                    proxy=proxy_url,
-                    follow_redirects=True,
-                    http2=False
-                )
+                client = build_client(node["url"], proxy_url, self.NODE_MAX_CONNECTIONS)
                 self.vision_clients.append({
                     "client": client,
                     "url": node["url"],
@@ -87,23 +76,45 @@ class LLMClient:
                 })
 
         self.coding_clients = []
-        self._coding_index = 0
+        self._coding_counter = itertools.count()
         if coding_nodes:
             for node in coding_nodes:
-                client = httpx.AsyncClient(
-                    base_url=node["url"], 
-                    timeout=600.0, 
-                    limits=limits,
-                    proxy=proxy_url,
-                    follow_redirects=True,
-                    http2=False
-                )
+                client = build_client(node["url"], proxy_url, self.NODE_MAX_CONNECTIONS)
                 self.coding_clients.append({
                     "client": client,
                     "url": node["url"],
-                    "model": node["model"]
+                    "model": node["model"],
+                    "inflight": 0
                 })
 
+        # O(1) lookups for the common case of an exact model name or model family ("qwen2.5" for "qwen2.5-coder:7b")
+        self._coding_model_index = {}
+        self._coding_family_index = {}
+        for node in self.coding_clients:
+            model_lower = node["model"].lower()
+            self._coding_model_index.setdefault(model_lower, node)
+            self._coding_family_index.setdefault(re.split(r"[:\-]", model_lower, maxsplit=1)[0], node)
+
+    @staticmethod
+    def _build_client(base_url: str, proxy_url: str = None, max_connections: int = UPSTREAM_MAX_CONNECTIONS) -> httpx.AsyncClient:
+        # HTTP/2 multiplexes concurrent streamed completions over one connection where the
+        # node negotiates it (TLS/ALPN); plain http:// nodes keep using HTTP/1.1.
+        # The transport retries failed connects (never a request that was already sent), so a
+        # blip doesn't count as a node failure. Worst case before a node is given up on:
+        # (CONNECT_RETRIES + 1) x 10s connect timeout, plus ~0.5s of backoff.
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections // 2, keepalive_expiry=30.0),
+            proxy=proxy_url,
+            retries=LLMClient.CONNECT_RETRIES
+        )
+        return httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(600.0, connect=10.0),
+            transport=transport,
+            follow_redirects=True
+        )
+
     async def close(self):
         await self.http_client.aclose()
         for node in getattr(self, 'swarm_clients', []):
@@ -165,23 +176,87 @@ class LLMClient:
         self._worker_index = (self._worker_index + 1) % len(worker_clients)
         return node
 
-    def get_coding_node(self, target_model: str = None) -> Optional[Dict[str, Any]]:
+    def get_coding_node(self, target_model: str = None, strategy: str = "round_robin") -> Optional[Dict[str, Any]]:
         coding_clients = getattr(self, 'coding_clients', [])
         if not coding_clients:
             return None
             
         if target_model:
             target_lower = target_model.lower()
+            node = getattr(self, '_coding_model_index', {}).get(target_lower) or getattr(self, '_coding_family_index', {}).get(target_lower)
+            if node:
+                return node
             for node in coding_clients:
                 if target_lower in node["model"].lower():
                     return node
                     
-        if not hasattr(self, '_coding_index'):
-            self._coding_index = 0
+        if not hasattr(self, '_coding_counter'):
+            self._coding_counter = itertools.count()
             
-        node = coding_clients[self._coding_index]
-        self._coding_index = (self._coding_index + 1) % len(coding_clients)
-        return node
+        # next() on itertools.count is atomic, so concurrent callers never share a slot
+        start = next(self._coding_counter) % len(coding_clients)
+        if strategy == "least_inflight":
+            # Scan from the rotating start so ties still spread across nodes
+            window = min(len(coding_clients), self.LEAST_INFLIGHT_SEARCH_SPACE)
+            candidates = [coding_clients[(start + i) % len(coding_clients)] for i in range(window)]
+            return min(candidates, key=lambda n: n.get("inflight", 0))
+        return coding_clients[start]
+
+    def _next_coding_node(self, tried: list, strategy: str = "round_robin") -> Optional[Dict[str, Any]]:
+        """Picks a coding node outside `tried` for a retry or hedge, using the same strategy as the first pick."""
+        untried = [n for n in self.coding_clients if not any(n is t for t in tried)]
+        if not untried:
+            return None
+        if strategy == "least_inflight":
+            return min(untried, key=lambda n: n.get("inflight", 0))
+        # A full turn of the rotation is guaranteed to land on an untried node
+        for _ in range(len(self.coding_clients)):
+            node = self.get_coding_node(None)
+            if any(node is n for n in untried):
+                return node
+
+    async def _post_to_coding_node(self, node: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
+        node["inflight"] = node.get("inflight", 0) + 1
+        try:
+            node_payload = payload.copy()
+            node_payload["model"] = node["model"]
+            
+            resp = await node["client"].post("/v1/chat/completions", json=node_payload)
+            resp.raise_for_status()
+            return resp.json()
+        finally:
+            node["inflight"] -= 1
+
+    async def _hedged_coding_completion(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Sends the request to one coding node and, if it hasn't answered within coding_hedge_ms
+        (or has already failed), to a second one. The first successful response wins and the
+        other request is cancelled. Returns None if both nodes fail.
+        """
+        strategy = getattr(self, 'coding_strategy', "round_robin")
+        primary = self.get_coding_node(payload.get("model"), strategy=strategy)
+        backup = self._next_coding_node([primary], strategy)
+        
+        self._log("Coding Compute", f"Routing request to Coding Node ({primary['model']}), hedging after {self.coding_hedge_ms}ms", level="INFO", icon=Icons.TOOL_CODE)
+        pending = {asyncio.create_task(self._post_to_coding_node(primary, payload))}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.coding_hedge_ms / 1000)
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    self._log(f"Hedged coding node failed: {type(task.exception()).__name__}", level="WARNING", icon=Icons.WARN)
+                # Primary is slow or already failed: bring in the backup node
+                if backup:
+                    self._log("Coding Hedge", f"Sending backup request to Coding Node ({backup['model']})", level="INFO", icon=Icons.TOOL_CODE)
+                    pending.add(asyncio.create_task(self._post_to_coding_node(backup, payload)))
+                    backup = None
+                if not pending:
+                    return None
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
 
     async def chat_completion(self, payload: Dict[str, Any], use_swarm: bool = False, use_worker: bool = False, use_vision: bool = False, use_coding: bool = False) -> Dict[str, Any]:
         """
@@ -210,7 +285,7 @@ class LLMClient:
                             
                         tried_nodes.append(node)
                         
-                        pretty_log("Vision Compute", f"Routing request to Vision Node ({node['model']})", level="INFO", icon=Icons.TOOL_DEEP)
+                        self._log("Vision Compute", f"Routing request to Vision Node ({node['model']})", level="INFO", icon=Icons.TOOL_DEEP)
                         try:
                             node_payload = payload.copy()
                             node_payload["model"] = node["model"]
@@ -219,12 +294,12 @@ class LLMClient:
                             resp.raise_for_status()
                             return resp.json()
                         except Exception as e:
-                            pretty_log(f"Vision node ({node['model']}) failed: {type(e).__name__}, trying next...", level="WARNING", icon=Icons.WARN)
+                            self._log(f"Vision node ({node['model']}) failed: {type(e).__name__}, trying next...", level="WARNING", icon=Icons.WARN)
                             target_model = None
                             node = self.get_vision_node(target_model)
                             continue
                         
-                pretty_log("Vision Compute Failed", "All vision nodes failed.", level="ERROR", icon=Icons.WARN)
+                self._log("Vision Compute Failed", "All vision nodes failed.", level="ERROR", icon=Icons.WARN)
                 
             raise Exception("Vision analysis failed: The dedicated vision node is offline or returned an error, and the main upstream model does not support image inputs.")
 
@@ -250,7 +325,7 @@ class LLMClient:
                         
                     tried_nodes.append(node)
                     
-                    pretty_log("Worker Compute", f"Routing background task to Worker Node ({node['model']})", level="INFO", icon="⚙️")
+                    self._log("Worker Compute", f"Routing background task to Worker Node ({node['model']})", level="INFO", icon="⚙️")
                     try:
                         node_payload = payload.copy()
                         node_payload["model"] = node["model"]
@@ -259,50 +334,37 @@ class LLMClient:
                         resp.raise_for_status()
                         return resp.json()
                     except Exception as e:
-                        pretty_log(f"Worker node ({node['model']}) failed: {type(e).__name__}, trying next...", level="WARNING", icon=Icons.WARN)
+                        self._log(f"Worker node ({node['model']}) failed: {type(e).__name__}, trying next...", level="WARNING", icon=Icons.WARN)
                         target_model = None
                         node = self.get_worker_node(target_model)
                         continue
                         
-                pretty_log("Worker Compute Failed", "All worker nodes failed, falling back to main upstream", level="WARNING", icon=Icons.WARN)
+                self._log("Worker Compute Failed", "All worker nodes failed, falling back to main upstream", level="WARNING", icon=Icons.WARN)
 
         elif use_coding and getattr(self, 'coding_clients', None):
-            target_model = payload.get("model")
-            tried_nodes = []
-            
-            node = self.get_coding_node(target_model)
-            
-            if node:
-                for _ in range(len(self.coding_clients)):
-                    if not node:
-                        break
-                        
-                    if node in tried_nodes:
-                        target_model = None
-                        node = self.get_coding_node(target_model)
-                        
-                    loop_breaker = 0
-                    while node in tried_nodes and loop_breaker < len(self.coding_clients):
-                        node = self.get_coding_node(None)
-                        loop_breaker += 1
-                        
-                    tried_nodes.append(node)
-                    
-                    pretty_log("Coding Compute", f"Routing request to Coding Node ({node['model']})", level="INFO", icon=Icons.TOOL_CODE)
-                    try:
-                        node_payload = payload.copy()
-                        node_payload["model"] = node["model"]
-                        
-                        resp = await node["client"].post("/v1/chat/completions", json=node_payload)
-                        resp.raise_for_status()
-                        return resp.json()
-                    except Exception as e:
-                        pretty_log(f"Coding node ({node['model']}) failed: {type(e).__name__}, trying next...", level="WARNING", icon=Icons.WARN)
-                        target_model = None
-                        node = self.get_coding_node(target_model)
-                        continue
+            if getattr(self, 'coding_hedge_ms', None) is not None and len(self.coding_clients) > 1:
+                result = await self._hedged_coding_completion(payload)
+                if result is not None:
+                    return result
+                self._log("Coding Compute Failed", "Hedged coding nodes failed, falling back to main upstream", level="WARNING", icon=Icons.WARN)
+            else:
+                strategy = getattr(self, 'coding_strategy', "round_robin")
+                tried_nodes = []
+                
+                node = self.get_coding_node(payload.get("model"), strategy=strategy)
+                
+                if node:
+                    while node:
+                        tried_nodes.append(node)
                         
-                pretty_log("Coding Compute Failed", "All coding nodes failed, falling back to main upstream", level="WARNING", icon=Icons.WARN)
+                        self._log("Coding Compute", f"Routing request to Coding Node ({node['model']})", level="INFO", icon=Icons.TOOL_CODE)
+                        try:
+                            return await self._post_to_coding_node(node, payload)
+                        except Exception as e:
+                            self._log(f"Coding node ({node['model']}) failed: {type(e).__name__}, trying next...", level="WARNING", icon=Icons.WARN)
+                            node = self._next_coding_node(tried_nodes, strategy)
+                            
+                    self._log("Coding Compute Failed", "All coding nodes failed, falling back to main upstream", level="WARNING", icon=Icons.WARN)
 
         elif use_swarm and self.swarm_clients:
             target_model = payload.get("model")
@@ -326,7 +388,7 @@ class LLMClient:
                         
                     tried_nodes.append(node)
                     
-                    pretty_log("Edge Compute", f"Routing request to Swarm Node ({node['model']})", level="INFO", icon="⚡")
+                    self._log("Edge Compute", f"Routing request to Swarm Node ({node['model']})", level="INFO", icon="⚡")
                     try:
                         node_payload = payload.copy()
                         node_payload["model"] = node["model"]
@@ -335,12 +397,12 @@ class LLMClient:
                         resp.raise_for_status()
                         return resp.json()
                     except Exception as e:
-                        pretty_log(f"Swarm node ({node['model']}) failed: {type(e).__name__}, trying next...", level="WARNING", icon=Icons.WARN)
+                        self._log(f"Swarm node ({node['model']}) failed: {type(e).__name__}, trying next...", level="WARNING", icon=Icons.WARN)
                         target_model = None
                         node = self.get_swarm_node(target_model)
                         continue
                         
-                pretty_log("Edge Compute Failed", "All swarm nodes failed, falling back to main upstream", level="WARNING", icon=Icons.WARN)
+                self._log("Edge Compute Failed", "All swarm nodes failed, falling back to main upstream", level="WARNING", icon=Icons.WARN)
 
         for attempt in range(10): 
             try:
@@ -351,16 +413,16 @@ class LLMClient:
                 if attempt < 9:
                     # Exponential backoff: 2, 4, 8, 16... capped at 30s
                     wait_time = min(2 ** (attempt + 1), 30)
-                    pretty_log("Upstream Retry", f"[{attempt+1}/10] {type(e).__name__}. Retrying in {wait_time}s...", icon=Icons.RETRY)
+                    self._log("Upstream Retry", f"[{attempt+1}/10] {type(e).__name__}. Retrying in {wait_time}s...", icon=Icons.RETRY)
                     await asyncio.sleep(wait_time)
                 else:
-                    pretty_log("Upstream Failed", f"Failed after 10 attempts: {str(e)}", level="ERROR", icon=Icons.FAIL)
+                    self._log("Upstream Failed", f"Failed after 10 attempts: {str(e)}", level="ERROR", icon=Icons.FAIL)
                     raise
             except httpx.HTTPStatusError as e:
-                pretty_log("Upstream Error", f"HTTP {e.response.status_code}: {e.response.text}", level="ERROR", icon=Icons.FAIL)
+                self._log("Upstream Error", f"HTTP {e.response.status_code}: {e.response.text}", level="ERROR", icon=Icons.FAIL)
                 raise
             except Exception as e:
-                pretty_log("Upstream Fatal", str(e), level="ERROR", icon=Icons.FAIL)
+                self._log("Upstream Fatal", str(e), level="ERROR", icon=Icons.FAIL)
                 raise
 
     async def get_embeddings(self, texts: List[str]) -> List[List[float]]:
@@ -379,10 +441,10 @@ class LLMClient:
                     wait_time = min(2 ** (attempt + 1), 20)
                     await asyncio.sleep(wait_time)
                 else:
-                    pretty_log("Embedding Failed", f"Failed after 10 attempts: {str(e)}", level="ERROR", icon=Icons.FAIL)
+                    self._log("Embedding Failed", f"Failed after 10 attempts: {str(e)}", level="ERROR", icon=Icons.FAIL)
                     raise
             except Exception as e:
-                pretty_log("Embedding Fatal", str(e), level="ERROR", icon=Icons.FAIL)
+                self._log("Embedding Fatal", str(e), level="ERROR", icon=Icons.FAIL)
                 raise
 
     async def stream_chat_completion(self, payload: Dict[str, Any], use_coding: bool = False):
@@ -392,47 +454,70 @@ class LLMClient:
         payload["stream"] = True
         
         client_to_use = self.http_client
+        stream_node = None
         if use_coding and getattr(self, 'coding_clients', None):
-            node = self.get_coding_node(payload.get("model"))
+            node = self.get_coding_node(payload.get("model"), strategy=getattr(self, 'coding_strategy', "round_robin"))
             if node:
                 payload["model"] = node["model"]
                 client_to_use = node["client"]
-                pretty_log("Coding Compute", f"Routing request to Coding Node ({node['model']})", level="INFO", icon=Icons.TOOL_CODE)
+                stream_node = node
+                self._log("Coding Compute", f"Routing request to Coding Node ({node['model']})", level="INFO", icon=Icons.TOOL_CODE)
 
-        # We wrap in a generic retry similar to the non-streaming one if it fails at the start.
-        # But once bytes are yielded, if it fails mid-stream, it breaks.
-        for attempt in range(10): 
-            try:
-                # We use stream() to keep the connection open and read chunks
-                req = client_to_use.build_request("POST", "/v1/chat/completions", json=payload)
-                resp = await client_to_use.send(req, stream=True)
-                resp.raise_for_status()
-                
+        # Streams are long-lived, count them against the node for least_inflight selection
+        if stream_node:
+            stream_node["inflight"] = stream_node.get("inflight", 0) + 1
+        try:
+            # We wrap in a generic retry similar to the non-streaming one if it fails at the start.
+            # But once bytes are yielded, if it fails mid-stream, it breaks.
+            for attempt in range(10): 
                 try:
-                    async for chunk in resp.aiter_lines():
-                        if chunk:
-                            yield f"{chunk}\n\n".encode('utf-8')
-                finally:
-                    await resp.aclose()
-                return
-            except (httpx.RemoteProtocolError, httpx.ReadError, httpx.WriteError, httpx.ConnectError) as e:
-                if attempt < 9:
-                    wait_time = min(2 ** (attempt + 1), 30)
-                    pretty_log("Upstream Stream Retry", f"[{attempt+1}/10] {type(e).__name__}. Retrying in {wait_time}s...", icon=Icons.RETRY)
-                    await asyncio.sleep(wait_time)
-                else:
-                    pretty_log("Upstream Stream Failed", f"Failed after 10 attempts: {str(e)}", level="ERROR", icon=Icons.FAIL)
-                    # Yield an error event to the client if the stream failed to connect
-                    error_data = {"error": f"Stream failed after 10 attempts: {str(e)}"}
-                    yield f"data: {json.dumps(error_data)}\n\n".encode('utf-8')
-                    yield b"data: [DONE]\n\n"
+                    # We use stream() to keep the connection open and read chunks
+                    req = client_to_use.build_request("POST", "/v1/chat/completions", json=payload)
+                    resp = await client_to_use.send(req, stream=True)
+                    resp.raise_for_status()
+                
+                    try:
+                        # Read large blocks and split SSE events out of them ourselves instead of
+                        # paying a Python-level iteration per line
+                        buffer = bytearray()
+                        async for block in resp.aiter_bytes(65536):
+                            buffer += block
+                            # SSE allows CRLF line endings; only the unsplit tail is rewritten, so a
+                            # "\r" left at the end of one block still pairs with the next block's "\n"
+                            if b"\r\n" in buffer:
+                                buffer = bytearray(buffer.replace(b"\r\n", b"\n"))
+                            while (sep := buffer.find(b"\n\n")) != -1:
+                                event = bytes(buffer[:sep]).strip()
+                                del buffer[:sep + 2]
+                                if event:
+                                    yield event + b"\n\n"
+                        tail = bytes(buffer).strip()
+                        if tail:
+                            yield tail + b"\n\n"
+                    finally:
+                        await resp.aclose()
+                    return
+                except (httpx.RemoteProtocolError, httpx.ReadError, httpx.WriteError, httpx.ConnectError) as e:
+                    if attempt < 9:
+                        wait_time = min(2 ** (attempt + 1), 30)
+                        self._log("Upstream Stream Retry", f"[{attempt+1}/10] {type(e).__name__}. Retrying in {wait_time}s...", icon=Icons.RETRY)
+                        await asyncio.sleep(wait_time)
+                    else:
+                        self._log("Upstream Stream Failed", f"Failed after 10 attempts: {str(e)}", level="ERROR", icon=Icons.FAIL)
+                        # Yield an error event to the client if the stream failed to connect
+                        error_data = {"error": f"Stream failed after 10 attempts: {str(e)}"}
+                        yield f"data: {json.dumps(error_data)}\n\n".encode('utf-8')
+                        yield b"data: [DONE]\n\n"
+                        raise
+                except httpx.HTTPStatusError as e:
+                    self._log("Upstream Stream Error", f"HTTP {e.response.status_code}: {await e.response.aread()}", level="ERROR", icon=Icons.FAIL)
                     raise
-            except httpx.HTTPStatusError as e:
-                pretty_log("Upstream Stream Error", f"HTTP {e.response.status_code}: {await e.response.aread()}", level="ERROR", icon=Icons.FAIL)
-                raise
-            except Exception as e:
-                pretty_log("Upstream Stream Fatal", str(e), level="ERROR", icon=Icons.FAIL)
-                raise
+                except Exception as e:
+                    self._log("Upstream Stream Fatal", str(e), level="ERROR", icon=Icons.FAIL)
+                    raise
+        finally:
+            if stream_node:
+                stream_node["inflight"] -= 1
 
     async def stream_openai(self, model: str, content: str, created_time: int, req_id: str):
         chunk_id = f"chatcmpl-{req_id}"
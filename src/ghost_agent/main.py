@@ -43,6 +43,7 @@ from .sandbox.docker import DockerSandbox
 from .utils.logging import setup_logging, pretty_log, Icons
 from .utils.token_counter import load_tokenizer
 from .tools import tasks
+from .tools.file_system import close_download_clients
 from .tools.registry import TOOL_DEFINITIONS
 
 print(" - All modules imported successfully!", flush=True)
@@ -104,7 +105,7 @@ async def proactive_runner(task_id, prompt):
         logger.error(f"Task {task_id} failed: {e}")
 
 
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="Ghost Agent: Autonomous AI Service")
     parser.add_argument("--host", default="0.0.0.0")
     parser.add_argument("--port", type=int, default=8000)
@@ -113,6 +114,8 @@ def parse_args():
     parser.add_argument("--worker-nodes", default=None, help="Comma-separated list of url|model nodes for background/edge tasks")
     parser.add_argument("--visual-nodes", default=None, help="Comma-separated list of url|model nodes for vision models")
     parser.add_argument("--coding-nodes", default=None, help="Comma-separated list of url|model nodes for code generation")
+    parser.add_argument("--coding-strategy", default="round_robin", choices=["round_robin", "least_inflight"], help="How requests are spread across coding nodes")
+    parser.add_argument("--coding-hedge-ms", type=int, default=None, help="Send a backup request to a second coding node if the first hasn't answered within this many ms")
     parser.add_argument("--model", default=os.getenv("GHOST_MODEL", "Qwen3-8B-Instruct-2507"))
     parser.add_argument("--temperature", "-t", type=float, default=0.7)
     parser.add_argument("--daemon", "-d", action="store_true")
@@ -125,7 +128,8 @@ def parse_args():
     parser.add_argument("--smart-memory", type=float, default=0.0)
     parser.add_argument("--anonymous", action="store_true", default=True, help="Always use anonymous search (Tor + DuckDuckGo)")
     parser.add_argument("--perfect-it", action="store_true", help="Enable proactive optimization suggestions after successful heavy tasks")
-    args = parser.parse_args()
+    parser.add_argument("--sandbox-cache-ttl", type=float, default=30.0, help="Seconds a cached sandbox listing is reused before it is rescanned")
+    args = parser.parse_args(argv)
     
     swarm_nodes_list = []
     if args.swarm_nodes:
@@ -181,7 +185,7 @@ async def lifespan(app):
     GLOBAL_CONTEXT = context
 
     
-    context.llm_client = LLMClient(args.upstream_url, context.tor_proxy, args.swarm_nodes_parsed, args.worker_nodes_parsed, getattr(args, 'visual_nodes_parsed', None), getattr(args, 'coding_nodes_parsed', None))
+    context.llm_client = LLMClient(args.upstream_url, context.tor_proxy, args.swarm_nodes_parsed, args.worker_nodes_parsed, getattr(args, 'visual_nodes_parsed', None), getattr(args, 'coding_nodes_parsed', None), coding_strategy=getattr(args, 'coding_strategy', "round_robin"), coding_hedge_ms=getattr(args, 'coding_hedge_ms', None))
     
     pretty_log("System Boot", "Initializing components", icon=Icons.SYSTEM_BOOT)
 
@@ -253,6 +257,7 @@ async def lifespan(app):
     if context.scheduler.running:
         context.scheduler.shutdown()
     await context.llm_client.close()
+    await close_download_clients()
 
 def main():
     args = parse_args()
@@ -1,102 +1,65 @@
-import json
+import orjson
 import threading
 import os
 from pathlib import Path
 from typing import Any, Dict
 from ..utils.logging import pretty_log
 
+def _default_profile() -> Dict[str, Any]:
+    return {"root": {"name": "User"}, "relationships": {}, "interests": {}, "assets": {}}
+
 class ProfileMemory:
     def __init__(self, path: Path):
         self.file_path = path / "user_profile.json"
+        # Only writers take the lock. Readers don't need it: os.replace swaps the
+        # file atomically, so a load sees either the old or the new profile.
         self._lock = threading.Lock()
+        # Parsed profile, reused until the file's mtime changes
+        self._cache = None
+        self._cache_mtime = -1
         if not self.file_path.exists():
-            self.save({"root": {"name": "User"}, "relationships": {}, "interests": {}, "assets": {}})
+            self.save(_default_profile())
 
     def load(self) -> Dict[str, Any]:
-        with self._lock:
-            try: 
-                return json.loads(self.file_path.read_text())
-            except: 
-                return {"root": {"name": "User"}, "relationships": {}, "interests": {}, "assets": {}}
+        # The returned dict is shared with other readers, treat it as read-only
+        try:
+            mtime = os.stat(self.file_path).st_mtime_ns
+            if mtime == self._cache_mtime:
+                return self._cache
+            data = orjson.loads(self.file_path.read_bytes())
+            self._cache, self._cache_mtime = data, mtime
+            return data
+        except: 
+            return _default_profile()
+
+    def invalidate(self):
+        self._cache = None
+        self._cache_mtime = -1
+
+    def _read_fresh(self) -> Dict[str, Any]:
+        # Writers mutate what they read, so they never get the shared cached dict
+        try:
+            return orjson.loads(self.file_path.read_bytes())
+        except:
+            return _default_profile()
+
+    def _write_atomic(self, data: Dict[str, Any]):
+        temp_path = self.file_path.with_suffix('.tmp')
+        temp_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        os.replace(temp_path, self.file_path)
+        self._cache, self._cache_mtime = data, os.stat(self.file_path).st_mtime_ns
 
     def save(self, data: Dict[str, Any]):
         with self._lock:
-            temp_path = self.file_path.with_suffix('.tmp')
-            temp_path.write_text(json.dumps(data, indent=2))
-            os.replace(temp_path, self.file_path)
+            self._write_atomic(data)
 
     def update(self, category: str, key: str, value: Any):
-        # Note: self.load() acquires the lock, then releases it.
-        # self.save() acquires it again.
-        # This creates a race condition window between load and save.
-        
-        # Ideally we should lock the whole update operation.
-        # But for now, let's follow the simple plan of locking I/O.
-        # Wait, race condition is bad. "Thread-safe" implies the operation is safe.
-        # If I lock load() and save() individually, another thread can interleave between them.
-        
-        # Let's wrap the logic in a manual lock acquisition?
-        # A reentrant lock (RLock) would solve this if I used it everywhere.
-        # But `threading.Lock` is not reentrant.
-        
-        # Let's make `load` and `save` private `_load` and `_save` without locks?
-        # Or just use the lock in update.
-        
-        # Steps:
-        # 1. Acquire lock.
-        # 2. Read (manual read or call _internal_load)
-        # 3. Modify
-        # 4. Write (manual write or call _internal_save)
-        # 5. Release
-        
-        # Refactoring to RLock might be safer/easier given the structure?
-        # The prompt asked for `threading.Lock`. 
-        
-        # Let's use `threading.RLock` instead? The prompt said `threading.Lock`.
-        # Using `threading.Lock` means I cannot call `load()` inside a locked block if `load()` also locks.
-        
-        # I will change `load` and `save` to use the lock.
-        # In `update` and `delete`, I will NOT rely on `load`'s lock for the *transaction*, but correctness dictates transactionality.
-        
-        # However, the user request specifically said:
-        # "Wrap the file read/write operations in load(), save(), learn_lesson(), and get_playbook_context() within a with self._lock: context manager."
-        
-        # If I strictly follow this, `update` calls `load` (locked) then `save` (locked).
-        # This leaves a gap. 
-        # But `update` logic is: `data = self.load()`, modify local dict, `self.save(data)`.
-        
-        # If checking for "thread-safe atomic disk I/O", strictly speaking, individual reads/writes are safe.
-        # The higher level logical transaction might rarely race if multiple threads update *different* keys, but `update` replaces the whole file. 
-        # So yes, a race condition exists:
-        # T1 loads data.
-        # T2 loads data.
-        # T1 saves data (overwrites).
-        # T2 saves modified data (overwrites T1's changes).
-        
-        # To fix this, `update` needs to hold the lock for the duration.
-        # This requires `load` and `save` to be usable inside `update`.
-        # If `load` locks, `update` cannot lock -> valid.
-        # If `update` locks, `load` cannot lock (deadlock with Lock).
-        
-        # Decision: Use `threading.RLock` to allow reentrancy. 
-        # The prompt asked for `ordering.Lock()`, but RLock is a subclass/compatible.
-        # Actually `threading.Lock()` factory returns a lock.
-        # I'll use `threading.RLock()` to be safe and robust, meeting "Thread-safe" requirement best.
-        
-        # Wait, prompt said: `self._lock = threading.Lock()`.
-        # I should probably stick to that instructions unless I have a good reason.
-        # RLock is a very good reason. 
-        # But maybe I can just lock in `update` and modify `load`/`save` to accept an optional `lock=False`? No, too complex.
-        
-        # I'll stick to the explicit instructions: Wrap `load`, `save`...
-        # The user instructions are specific about WHERE to put the lock.
-        
-        # Instruction: "Wrap the file read/write operations in load(), save(), learn_lesson(), and get_playbook_context()"
-        # It did NOT say wrap `update` or `delete`.
-        # So I will follow instructions exactly. 
-        # The race condition in `update` might be acceptable for this iteration or outside scope (Profile is rarely updated concurrently).
-        
-        data = self.load()
+        # Hold the lock across read-modify-write so concurrent updates don't drop each other
+        with self._lock:
+            return self._update(category, key, value)
+
+    def _update(self, category: str, key: str, value: Any):
+        data = self._read_fresh()
         cat = str(category).strip().lower()
         k = str(key).strip().lower()
         v = str(value).strip()
@@ -123,11 +86,15 @@ class ProfileMemory:
             data[cat] = {}
 
         data[cat][target_key] = v
-        self.save(data)
+        self._write_atomic(data)
         return f"Synchronized: {cat}.{target_key} = {v}"
 
     def delete(self, category: str, key: str) -> str:
-        data = self.load()
+        with self._lock:
+            return self._delete(category, key)
+
+    def _delete(self, category: str, key: str) -> str:
+        data = self._read_fresh()
         cat = str(category).strip().lower()
         k = str(key).strip().lower()
 
@@ -136,13 +103,12 @@ class ProfileMemory:
             # Clean up empty categories
             if not data[cat]:
                 del data[cat]
-            self.save(data)
+            self._write_atomic(data)
             return f"Removed from Profile: {cat}.{k}"
         
         return f"Profile key not found: {cat}.{k}"
 
     def get_context_string(self) -> str:
-        # Load is thread-safe now
         data = self.load()
         lines = []
         for key, val in data.items():
@@ -1,4 +1,4 @@
-import json
+import orjson
 import logging
 import threading
 import os
@@ -9,38 +9,83 @@ from ..utils.logging import Icons, pretty_log
 logger = logging.getLogger("GhostAgent")
 
 class SkillMemory:
+    # Lessons are appended to a JSONL log and folded into the JSON snapshot every N appends
+    COMPACT_EVERY = 50
+    MAX_LESSONS = 50
+
     def __init__(self, memory_dir: Path):
         self.file_path = memory_dir / "skills_playbook.json"
+        self.log_path = memory_dir / "skills.jsonl"
         self._lock = threading.Lock()
+        self._pending = 0
         if not self.file_path.exists():
             self.save_playbook([])
+        elif self.log_path.exists():
+            # Fold any lessons left in the log by a previous run into the snapshot
+            with self._lock:
+                self._compact()
+
+    def _read_playbook(self) -> list:
+        # Caller must hold self._lock. Snapshot first, then replay the JSONL tail (newest first).
+        try:
+            content = self.file_path.read_bytes()
+            playbook = orjson.loads(content) if content else []
+        except:
+            playbook = []
+
+        tail = []
+        try:
+            with open(self.log_path, "rb") as f:
+                for line in f:
+                    if not line.strip(): continue
+                    try:
+                        tail.append(orjson.loads(line))
+                    except orjson.JSONDecodeError:
+                        continue # Torn write from a crash, skip it
+        except FileNotFoundError:
+            pass
+
+        return (tail[::-1] + playbook)[:self.MAX_LESSONS]
+
+    def _write_snapshot(self, playbook):
+        # Caller must hold self._lock
+        temp_path = self.file_path.with_suffix('.tmp')
+        temp_path.write_bytes(orjson.dumps(playbook, option=orjson.OPT_INDENT_2))
+        os.replace(temp_path, self.file_path)
+        # The snapshot now supersedes the log
+        self.log_path.unlink(missing_ok=True)
+        self._pending = 0
+
+    def _compact(self):
+        self._write_snapshot(self._read_playbook())
+
+    def load_playbook(self) -> list:
+        with self._lock:
+            return self._read_playbook()
 
     def save_playbook(self, playbook):
         # Helper for atomic save
         with self._lock:
-            temp_path = self.file_path.with_suffix('.tmp')
-            temp_path.write_text(json.dumps(playbook, indent=2))
-            os.replace(temp_path, self.file_path)
+            self._write_snapshot(playbook)
 
     def learn_lesson(self, task: str, mistake: str, solution: str, memory_system=None):
         try:
-            with self._lock:
-                try:
-                    content = self.file_path.read_text()
-                    playbook = json.loads(content) if content else []
-                except:
-                    playbook = []
-            
             new_lesson = {
                 "timestamp": datetime.now().isoformat(),
                 "task": task,
                 "mistake": mistake,
                 "solution": solution
             }
-            # Keep only the last 50 high-value lessons in the JSON backup
-            playbook = [new_lesson] + playbook[:49]
-            
-            self.save_playbook(playbook)
+
+            # Append-only: one line per lesson instead of rewriting the whole playbook
+            with self._lock:
+                with open(self.log_path, "ab") as f:
+                    f.write(orjson.dumps(new_lesson) + b"\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._pending += 1
+                if self._pending >= self.COMPACT_EVERY:
+                    self._compact()
             
             # Index in Vector Memory for Semantic Retrieval
             if memory_system:
@@ -88,10 +133,7 @@ class SkillMemory:
                         return ""
 
             # Fallback to recent lessons if no vector search or no results
-            with self._lock:
-                try:
-                    playbook = json.loads(self.file_path.read_text())
-                except: playbook = []
+            playbook = self.load_playbook()
                 
             if not playbook: return "No lessons learned yet."
             
@@ -104,12 +146,7 @@ class SkillMemory:
     def get_recent_failures(self, limit: int = 5) -> str:
         """Fetch the most recent mistakes and their tasks to generate targeted self-play scenarios."""
         try:
-            with self._lock:
-                try:
-                    content = self.file_path.read_text()
-                    playbook = json.loads(content) if content else []
-                except:
-                    playbook = []
+            playbook = self.load_playbook()
             
             if not playbook:
                 return "No recent failures recorded."
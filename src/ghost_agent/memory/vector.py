@@ -3,6 +3,7 @@ import json
 import logging
 import sys
 import os
+import time
 from pathlib import Path
 from typing import List, Optional
 
@@ -34,7 +35,6 @@ class GhostEmbeddingFunction(EmbeddingFunction):
 
     def __call__(self, input: Documents) -> Embeddings:
         # ChromaDB expects a List of Embeddings
-        import time
         for attempt in range(3):
             try:
                 resp = self.client.post(self.url, json={"input": input, "model": "default"})
@@ -73,7 +73,6 @@ class VectorMemory:
             except Exception as e:
                 logger.warning(f"Error loading embedding model (Attempt {attempt + 1}/{max_retries}): {e}")
                 if attempt < max_retries - 1:
-                    import time
                     time.sleep(6) # Wait before retry
                 else:
                     logger.error(f"Failed to load embedding model after {max_retries} attempts.")
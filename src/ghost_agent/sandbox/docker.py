@@ -1,6 +1,12 @@
+import hashlib
 import logging
 import os
+import re
+import shlex
+import sys
+import threading
 import time
+import uuid
 from pathlib import Path
 from ..utils.logging import Icons, pretty_log
 
@@ -8,12 +14,73 @@ logger = logging.getLogger("GhostAgent")
 
 CONTAINER_NAME = "ghost-agent-sandbox"
 CONTAINER_WORKDIR = "/workspace"
+# Host-side wheel cache shared by every sandbox, so reprovisioning skips re-downloading
+CONTAINER_PIP_CACHE = "/root/.cache/pip"
+# Per-stream cap on what execute() keeps in memory; the middle of longer output is dropped
+MAX_EXEC_OUTPUT_BYTES = 1024 * 1024
+# Exit codes of the provisioning script, mapped to the stage that failed
+PROVISION_ERRORS = {
+    10: "System package installation failed",
+    20: "Python package installation failed",
+    30: "PySocks bootstrap failed",
+}
+# Concurrent execs allowed per sandbox; parallel tool calls beyond this queue up
+MAX_PARALLEL_EXECS = int(os.getenv("GHOST_SANDBOX_PARALLEL", "4"))
+BASE_IMAGE = "python:3.11-slim-bookworm"
+# Built from docker/ghost-sandbox.Dockerfile; ships with every package preinstalled
+PREBUILT_IMAGE = "ghost-sandbox:latest"
+SANDBOX_DOCKERFILE = Path(__file__).resolve().parents[3] / "docker" / "ghost-sandbox.Dockerfile"
+# How long a successful readiness probe is trusted before the next exec re-checks
+READY_TTL_SECONDS = 5.0
+
+class _OutputBuffer:
+    """Keeps the first and last `limit // 2` bytes of a stream, so both the start of a run and its final errors survive."""
+    def __init__(self, limit: int = None):
+        self.half = (limit or MAX_EXEC_OUTPUT_BYTES) // 2
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.dropped = 0
+
+    def push(self, data: bytes):
+        room = self.half - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data:
+            self.tail += data
+            excess = len(self.tail) - self.half
+            if excess > 0:
+                del self.tail[:excess]
+                self.dropped += excess
+
+    def recent(self, n: int) -> bytes:
+        if len(self.tail) >= n:
+            return bytes(self.tail[-n:])
+        return bytes(self.head[max(0, len(self.head) - (n - len(self.tail))):] + self.tail)
+
+    def drop_last(self, n: int):
+        cut = min(n, len(self.tail))
+        if cut: del self.tail[-cut:]
+        if n > cut: del self.head[-(n - cut):]
+
+    def __bool__(self):
+        return bool(self.head or self.tail)
+
+    def decode(self) -> str:
+        text = self.head.decode("utf-8", errors="replace")
+        if self.dropped:
+            text += f"\n... [{self.dropped} bytes omitted] ...\n"
+        return text + self.tail.decode("utf-8", errors="replace")
 
 class DockerSandbox:
-    def __init__(self, host_workspace: Path, tor_proxy: str = None):
-        import hashlib
+    def __init__(self, host_workspace: Path, tor_proxy: str = None, persistent_shell: bool = True):
         short_hash = hashlib.md5(str(host_workspace.absolute()).encode()).hexdigest()[:8]
         self.container_name = f"ghost-agent-sandbox-{short_hash}"
+        # Resolved once: these never change for the life of the process (Windows has no getuid)
+        user_id = os.getuid() if hasattr(os, 'getuid') else 1000
+        group_id = os.getgid() if hasattr(os, 'getgid') else 1000
+        self._user_str = f"{user_id}:{group_id}"
+        self._skip_user = sys.platform == "darwin"
         try:
             import docker
             from docker.errors import NotFound, APIError
@@ -28,8 +95,6 @@ class DockerSandbox:
             self.client = self.docker_lib.from_env()
             self.client.ping()
         except self.docker_lib.errors.DockerException as handle_err:
-            import sys
-            import os
             if sys.platform == "darwin":
                 orb_sock = os.path.expanduser("~/.orbstack/run/docker.sock")
                 target_sock = os.path.expanduser("~/.docker/run/docker.sock") # alternative fallback
@@ -46,10 +111,20 @@ class DockerSandbox:
                     raise handle_err
             else:
                 raise handle_err
+        # Low-level client: exec_start can stream output instead of buffering it whole
+        self._api = self.client.api
         self.host_workspace = host_workspace.absolute()
+        self.host_pip_cache = Path.home() / ".cache" / "ghost-agent-pip"
+        self.provision_marker = self.host_workspace / ".ga_supercharged"
         self.tor_proxy = tor_proxy
         self.container = None
-        self.image = "python:3.11-slim-bookworm"
+        self._ready_until = 0.0
+        self._exec_slots = threading.BoundedSemaphore(MAX_PARALLEL_EXECS)
+        # One long-lived bash per sandbox saves a docker exec per command; concurrent callers fall back to exec
+        self.persistent_shell = persistent_shell
+        self._shell = None
+        self._shell_lock = threading.Lock()
+        self.image = BASE_IMAGE
 
         pretty_log("Sandbox Init", f"Mounting {self.host_workspace} -> {CONTAINER_WORKDIR}", icon=Icons.SYSTEM_BOOT)
 
@@ -58,6 +133,32 @@ class DockerSandbox:
         try: return self.container.stats(stream=False)
         except: return None
 
+    def _ensure_image(self) -> str:
+        """Picks the fastest-booting image available, building the prebuilt one from the repo if needed."""
+        # Prefer the prebuilt image, then the committed cache, for instant boot
+        for cached_image in (PREBUILT_IMAGE, "ghost-agent-base:latest"):
+            try:
+                self.client.images.get(cached_image)
+                return cached_image
+            except self.docker_lib.errors.ImageNotFound:
+                pass
+
+        if SANDBOX_DOCKERFILE.exists():
+            try:
+                pretty_log("Sandbox", f"Building {PREBUILT_IMAGE} (one-time, a few minutes)...", icon="🏗️")
+                # The Dockerfile copies nothing, so its own directory is the whole build context
+                self.client.images.build(path=str(SANDBOX_DOCKERFILE.parent), dockerfile=SANDBOX_DOCKERFILE.name, tag=PREBUILT_IMAGE, rm=True)
+                return PREBUILT_IMAGE
+            except Exception as e:
+                logger.warning(f"Failed to build {PREBUILT_IMAGE}, falling back to runtime install: {e}")
+
+        try:
+            self.client.images.get(BASE_IMAGE)
+        except self.docker_lib.errors.ImageNotFound:
+            pretty_log("Sandbox", f"Pulling required Docker image: {BASE_IMAGE}", icon="📥")
+            self.client.images.pull(BASE_IMAGE)
+        return BASE_IMAGE
+
     def _is_container_ready(self):
         try:
             self.container.reload()
@@ -65,7 +166,6 @@ class DockerSandbox:
                 return False
                 
             # Verify the volume mount is still valid (not a deleted host inode)
-            import uuid
             test_file = f".mount_sync_{uuid.uuid4().hex}"
             test_path = self.host_workspace / test_file
             
@@ -93,6 +193,10 @@ class DockerSandbox:
             return False
 
     def ensure_running(self):
+        # Back-to-back tool calls skip the reload/stat/test -f round-trips
+        if self.container and time.monotonic() < self._ready_until:
+            return
+
         try:
             if not self.container:
                 self.container = self.client.containers.get(self.container_name)
@@ -101,6 +205,7 @@ class DockerSandbox:
 
         if not (self.container and self._is_container_ready()):
             pretty_log("Sandbox", "Initializing High-Performance Environment...", icon="⚙️")
+            self._close_shell()
             try:
                 try:
                     old = self.client.containers.get(self.container_name)
@@ -108,17 +213,20 @@ class DockerSandbox:
                     time.sleep(1) 
                 except self.NotFound: pass
 
-                import sys
                 is_linux = sys.platform.startswith("linux")
                 is_mac = sys.platform == "darwin"
                 
+                self.image = self._ensure_image()
                 run_kwargs = {
                     "image": self.image,
                     "command": "sleep infinity",
                     "name": self.container_name,
                     "detach": True,
                     "tty": True,
-                    "volumes": {str(self.host_workspace): {'bind': CONTAINER_WORKDIR, 'mode': 'rw'}},
+                    "volumes": {
+                        str(self.host_workspace): {'bind': CONTAINER_WORKDIR, 'mode': 'rw'},
+                        str(self.host_pip_cache): {'bind': CONTAINER_PIP_CACHE, 'mode': 'rw'},
+                    },
                     "mem_limit": "512m",
                 }
                 
@@ -128,20 +236,6 @@ class DockerSandbox:
                     run_kwargs["network_mode"] = "bridge"
                     if not is_mac:
                         run_kwargs["extra_hosts"] = {"host.docker.internal": "host-gateway"}
-
-                # Check for cached environment image for instant boot
-                try:
-                    self.client.images.get("ghost-agent-base:latest")
-                    self.image = "ghost-agent-base:latest"
-                    run_kwargs["image"] = self.image
-                except self.docker_lib.errors.ImageNotFound:
-                    pass
-
-                try:
-                    self.client.images.get(self.image)
-                except self.docker_lib.errors.ImageNotFound:
-                    pretty_log("Sandbox", f"Pulling required Docker image: {self.image}", icon="📥")
-                    self.client.images.pull(self.image)
                     
                 self.container = self.client.containers.run(**run_kwargs)
                 
@@ -153,6 +247,26 @@ class DockerSandbox:
                 pretty_log("Sandbox Error", f"Failed to start: {e}", level="ERROR")
                 raise e
 
+        # The host-side marker saves a docker exec on every start; it only counts for the container that wrote it
+        if not self._is_provisioned():
+            self._provision()
+            self._mark_provisioned()
+
+        self._ready_until = time.monotonic() + READY_TTL_SECONDS
+
+    def _is_provisioned(self) -> bool:
+        try:
+            return self.provision_marker.read_text() == str(self.container.id)
+        except OSError:
+            return False
+
+    def _mark_provisioned(self):
+        try:
+            self.provision_marker.write_text(str(self.container.id))
+        except OSError as e:
+            logger.warning(f"Failed to write sandbox provision marker: {e}")
+
+    def _provision(self):
         env_vars = {}
         # We don't set HTTP_PROXY for the sandbox because we don't want to route
         # heavy package installs through Tor to avoid timeouts and IP blocks.
@@ -161,37 +275,13 @@ class DockerSandbox:
         if exit_code != 0:
             pretty_log("Sandbox", "Installing Deep Learning Stack (Wait ~60s)...", icon="📦")
             
-            apt_cmd = "sh -c 'apt-get update && apt-get install -y sudo coreutils nodejs npm g++ curl wget git procps postgresql-client libpq-dev'"
-            code, out = self.container.exec_run(apt_cmd, environment=env_vars)
+            # One exec for the whole provisioning run; stage markers and exit codes keep failures attributable
+            code, out = self.container.exec_run(f"sh -c {shlex.quote(self._provision_script())}", environment=env_vars)
             if code != 0:
-                err_msg = out.decode("utf-8", errors="replace") if out else "Unknown error"
-                raise Exception(f"System package installation failed: {err_msg}")
-                
-            self.container.exec_run("sh -c 'echo \"ALL ALL=(ALL) NOPASSWD: ALL\" >> /etc/sudoers'")
-            
-            if self.tor_proxy:
-                code, out = self.container.exec_run("pip install --no-cache-dir pysocks requests")
-                if code != 0:
-                    err_msg = out.decode("utf-8", errors="replace") if out else "Unknown error"
-                    raise Exception(f"PySocks bootstrap failed: {err_msg}")
-            
-            install_cmd = (
-                "pip install --no-cache-dir "
-                "numpy pandas scipy matplotlib seaborn "
-                "scikit-learn yfinance beautifulsoup4 networkx requests "
-                "pylint black mypy bandit dill "
-                "psycopg2-binary asyncpg sqlalchemy tabulate sqlglot"
-            )
-            code, out = self.container.exec_run(install_cmd, environment=env_vars)
-            if code != 0:
-                err_msg = out.decode("utf-8", errors="replace") if out else "Unknown error"
-                raise Exception(f"Python package installation failed: {err_msg}")
-
-                
-            self.container.exec_run("touch /root/.supercharged")
+                raise Exception(f"{PROVISION_ERRORS.get(code, 'Sandbox provisioning failed')}: {self._stage_output(out)}")
 
             # Cache the fully installed environment for instant future startups
-            if self.image != "ghost-agent-base:latest":
+            if self.image not in (PREBUILT_IMAGE, "ghost-agent-base:latest"):
                 try:
                     pretty_log("Sandbox", "Committing fast-boot image cache...", icon=Icons.MEM_SAVE)
                     self.container.commit(repository="ghost-agent-base", tag="latest")
@@ -200,10 +290,127 @@ class DockerSandbox:
 
             pretty_log("Sandbox", "Environment Ready.", icon="✅")
 
+    def _provision_script(self) -> str:
+        stages = [
+            # The wheel and HTTP/metadata caches both live under the mounted dir; skip pip's self-update check
+            f"export PIP_CACHE_DIR={CONTAINER_PIP_CACHE} PIP_DISABLE_PIP_VERSION_CHECK=1",
+            "echo __STAGE=apt__",
+            "(apt-get update && apt-get install -y sudo coreutils nodejs npm g++ curl wget git procps postgresql-client libpq-dev) || exit 10",
+            "echo __STAGE=sudoers__",
+            "echo \"ALL ALL=(ALL) NOPASSWD: ALL\" >> /etc/sudoers",
+        ]
+        if self.tor_proxy:
+            stages += ["echo __STAGE=pysocks__", "pip install pysocks requests || exit 30"]
+        stages += [
+            "echo __STAGE=pip__",
+            "pip install "
+            "numpy pandas scipy matplotlib seaborn "
+            "scikit-learn yfinance beautifulsoup4 networkx requests "
+            "pylint black mypy bandit dill "
+            "psycopg2-binary asyncpg sqlalchemy tabulate sqlglot || exit 20",
+            "touch /root/.supercharged",
+        ]
+        return "\n".join(stages)
+
+    @staticmethod
+    def _stage_output(out) -> str:
+        """Returns what the failing stage printed, i.e. everything after the last stage marker."""
+        text = out.decode("utf-8", errors="replace") if out else ""
+        text = re.split(r"__STAGE=\w+__\n?", text)[-1].strip()
+        return text or "Unknown error"
+
+    def _exec_stream(self, cmd_string: str):
+        """Starts cmd_string in the container; returns (exec_id, iterator of (stdout, stderr) chunks)."""
+        create_kwargs = {"workdir": CONTAINER_WORKDIR, "tty": False}
+        if not self._skip_user:
+            create_kwargs["user"] = self._user_str
+        exec_id = self._api.exec_create(self.container.id, cmd_string, **create_kwargs)["Id"]
+        return exec_id, self._api.exec_start(exec_id, stream=True, demux=True)
+
+    def _exec_once(self, cmd_string: str):
+        """Runs cmd_string in its own docker exec; returns (stdout, stderr, exit_code)."""
+        exec_id, chunks = self._exec_stream(cmd_string)
+        stdout_buf, stderr_buf = _OutputBuffer(), _OutputBuffer()
+        for out, err in chunks:
+            if out: stdout_buf.push(out)
+            if err: stderr_buf.push(err)
+        return stdout_buf, stderr_buf, self._api.exec_inspect(exec_id)["ExitCode"]
+
+    def _ensure_shell(self):
+        if self._shell is None:
+            create_kwargs = {"workdir": CONTAINER_WORKDIR, "stdin": True, "tty": False}
+            if not self._skip_user:
+                create_kwargs["user"] = self._user_str
+            exec_id = self._api.exec_create(self.container.id, ["bash"], **create_kwargs)["Id"]
+            sock = self._api.exec_start(exec_id, socket=True)
+            # docker-py hands back a SocketIO wrapper; writes need the underlying socket
+            self._shell = getattr(sock, "_sock", sock)
+        return self._shell
+
+    def _close_shell(self):
+        if self._shell is not None:
+            try: self._shell.close()
+            except Exception: pass
+            self._shell = None
+
+    @staticmethod
+    def _recv_exact(sock, n: int) -> bytes:
+        data = bytearray()
+        while len(data) < n:
+            chunk = sock.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("Sandbox shell closed unexpectedly")
+            data += chunk
+        return bytes(data)
+
+    def _shell_execute(self, cmd_string: str, timeout: int):
+        """Runs cmd_string through the persistent shell; returns (stdout, stderr, exit_code)."""
+        nonce = uuid.uuid4().hex
+        # Re-quoted argv gives the same semantics as exec_run's shlex split; </dev/null keeps it off our command stream
+        line = f"{shlex.join(shlex.split(cmd_string))} </dev/null; printf '\\n__GA_EXIT_{nonce}=%d__\\n' $?; printf '\\n__GA_END_{nonce}__\\n' >&2\n"
+        try:
+            sock = self._ensure_shell()
+            sock.sendall(line.encode())
+        except OSError:
+            # The old shell died between commands; nothing ran yet, so retry once on a fresh one
+            self._close_shell()
+            sock = self._ensure_shell()
+            sock.sendall(line.encode())
+
+        exit_re = re.compile(rb"\n__GA_EXIT_" + nonce.encode() + rb"=(\d+)__\n")
+        end_re = re.compile(rb"\n__GA_END_" + nonce.encode() + rb"__\n")
+        bufs = {1: _OutputBuffer(), 2: _OutputBuffer()}
+        done = {1: False, 2: False}
+        exit_code = None
+        try:
+            # The command itself is killed by `timeout`; this only guards against a wedged shell
+            sock.settimeout(timeout + 30)
+            while not (done[1] and done[2]):
+                # Non-tty exec output is multiplexed: 8-byte header (stream id, size) + payload
+                header = self._recv_exact(sock, 8)
+                stream, size = header[0], int.from_bytes(header[4:8], "big")
+                data = self._recv_exact(sock, size)
+                buf = bufs.get(stream)
+                if buf is None or done[stream]: continue
+                buf.push(data)
+                recent = buf.recent(len(data) + 128)
+                match = (exit_re if stream == 1 else end_re).search(recent)
+                if match:
+                    # The marker is the last thing the stream carries for this command
+                    buf.drop_last(len(recent) - match.start())
+                    done[stream] = True
+                    if stream == 1: exit_code = int(match.group(1))
+        except Exception:
+            # A half-read reply would desync every later command
+            self._close_shell()
+            raise
+
+        return bufs[1], bufs[2], exit_code
+
     def execute(self, cmd: str, timeout: int = 300):
         try:
             self.ensure_running()
-            if not self._is_container_ready():
+            if time.monotonic() >= self._ready_until and not self._is_container_ready():
                 return "Error: Container refused to start.", 1
  
  
@@ -211,33 +418,24 @@ class DockerSandbox:
             cmd_string = f"timeout -k 5s {timeout}s {cmd}"
             pretty_log("Docker Execute Debug", f"Command: {cmd_string}", icon=Icons.TOOL_CODE)
             
-            # Cross-platform safe UID/GID fetching (Windows doesn't have getuid)
-            user_id = os.getuid() if hasattr(os, 'getuid') else 1000
-            group_id = os.getgid() if hasattr(os, 'getgid') else 1000
-            
-            import sys
-            is_mac = sys.platform == "darwin"
-            
-            exec_kwargs = {
-                "workdir": CONTAINER_WORKDIR,
-                "demux": True
-            }
-            if not is_mac:
-                exec_kwargs["user"] = f"{user_id}:{group_id}"
-            
-            exec_result = self.container.exec_run(
-                cmd_string,
-                **exec_kwargs 
-            )
-            
-            stdout_bytes, stderr_bytes = exec_result.output
-            exit_code = exec_result.exit_code
+            with self._exec_slots:
+                if self.persistent_shell and self._shell_lock.acquire(blocking=False):
+                    try:
+                        stdout_buf, stderr_buf, exit_code = self._shell_execute(cmd_string, timeout)
+                    finally:
+                        self._shell_lock.release()
+                else:
+                    stdout_buf, stderr_buf, exit_code = self._exec_once(cmd_string)
+
+            if exit_code != 0:
+                # A failing exec may mean a dead container or a stale mount; re-probe next time
+                self._ready_until = 0.0
 
             output = ""
-            if stdout_bytes: output += stdout_bytes.decode("utf-8", errors="replace")
-            if stderr_bytes: 
+            if stdout_buf: output += stdout_buf.decode()
+            if stderr_buf: 
                 if output: output += "\n--- STDERR ---\n"
-                output += stderr_bytes.decode("utf-8", errors="replace")
+                output += stderr_buf.decode()
 
             if not output.strip() and exit_code != 0:
                  output = f"[SYSTEM ERROR]: Process failed (Exit {exit_code}) with no output."
@@ -245,4 +443,5 @@ class DockerSandbox:
             return output, exit_code
 
         except Exception as e:
+            self._ready_until = 0.0
             return f"Container Execution Error: {str(e)}", 1
\ No newline at end of file
@@ -0,0 +1,194 @@
+"""
+Long-lived Python session behind stateful `execute` calls; runs inside the sandbox.
+
+`python3 session_host.py script.py [args...]` hands the script to the session
+process (starting it on first use), relays its output and exits with its exit
+status. Scripts share one globals namespace, so variables survive between calls
+without a dill load/dump of the whole session per command. Stdlib only.
+"""
+import builtins
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import uuid
+import _thread
+
+RUN_DIR = os.environ.get("GHOST_SESSION_DIR", "/tmp")
+SOCK_PATH = os.path.join(RUN_DIR, ".ghost_session.sock")
+LOCK_PATH = os.path.join(RUN_DIR, ".ghost_session.lock")
+# Reported when the session cannot be reached, so the caller can fall back to the dill wrapper
+UNAVAILABLE_EXIT = 75
+UNAVAILABLE_MARKER = "__GA_SESSION_UNAVAILABLE__"
+START_TIMEOUT_SECONDS = 10
+# An abandoned script that ignores KeyboardInterrupt this long takes the session down with it
+KILL_GRACE_SECONDS = 10
+
+def _run(namespace: dict, argv: list) -> int:
+    sys.argv = list(argv)
+    namespace["__file__"] = argv[0]
+    try:
+        with open(argv[0]) as f:
+            code = compile(f.read(), argv[0], "exec")
+        exec(code, namespace)
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    except BaseException as e:
+        # Drop this frame so the traceback starts in the user's script
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        return 1
+
+def _forget_workspace_modules(root: str):
+    """Drops modules imported from the workspace so an edited helper is re-read, as in a fresh interpreter."""
+    prefix = os.path.join(os.path.realpath(root), "")
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if path and os.path.realpath(path).startswith(prefix):
+            del sys.modules[name]
+
+def _watch(conn: socket.socket, done: threading.Event):
+    try:
+        conn.recv(1)  # Returns once the client hangs up, e.g. when `timeout` kills it
+    except OSError:
+        pass
+    if done.is_set():
+        return
+    _thread.interrupt_main()
+    if not done.wait(KILL_GRACE_SECONDS):
+        os._exit(1)
+
+def serve():
+    if os.path.exists(SOCK_PATH):
+        os.unlink(SOCK_PATH)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(SOCK_PATH)
+    listener.listen(8)
+
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    while True:
+        try:
+            conn, _ = listener.accept()
+            try:
+                with conn.makefile("r") as f:
+                    request = f.readline()
+                if not request:
+                    continue  # Liveness probe
+                nonce, cwd, argv = json.loads(request)
+                os.chdir(cwd)
+                _forget_workspace_modules(cwd)
+
+                done = threading.Event()
+                threading.Thread(target=_watch, args=(conn, done), daemon=True).start()
+                # Point fds 1/2 at the client so subprocesses' output is relayed too
+                saved = os.dup(1), os.dup(2)
+                os.dup2(conn.fileno(), 1)
+                os.dup2(conn.fileno(), 2)
+                try:
+                    code = _run(namespace, argv)
+                finally:
+                    done.set()
+                    os.dup2(saved[0], 1)
+                    os.dup2(saved[1], 2)
+                    os.close(saved[0])
+                    os.close(saved[1])
+                conn.sendall(f"{nonce}={code}\n".encode())
+            finally:
+                try:
+                    conn.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                conn.close()
+        except (KeyboardInterrupt, OSError, ValueError):
+            # A late interrupt or a vanished client only ends that request
+            continue
+
+def _try_connect():
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(SOCK_PATH)
+        return sock
+    except OSError:
+        sock.close()
+        return None
+
+def _connect():
+    sock = _try_connect()
+    if sock:
+        return sock
+    import fcntl
+    with open(LOCK_PATH, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        # Another client may have started the session while we waited for the lock
+        sock = _try_connect()
+        if sock:
+            return sock
+        subprocess.Popen(
+            [sys.executable, "-u", os.path.abspath(__file__), "--serve"],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        deadline = time.monotonic() + START_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            sock = _try_connect()
+            if sock:
+                return sock
+    return None
+
+def request(argv: list) -> int:
+    sock = _connect()
+    if sock is None:
+        print(UNAVAILABLE_MARKER)
+        return UNAVAILABLE_EXIT
+
+    nonce = uuid.uuid4().hex
+    marker = f"{nonce}=".encode()
+    trailer = re.compile(re.escape(marker) + rb"(-?\d+)\n$")
+    # Output is relayed as it arrives; only bytes that could be the start of the trailer are held back
+    out = sys.stdout.buffer
+    tail = bytearray()
+    with sock:
+        sock.sendall((json.dumps([nonce, os.getcwd(), argv]) + "\n").encode())
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            tail += data
+            match = trailer.search(tail)
+            if match:
+                out.write(tail[:match.start()])
+                out.flush()
+                return int(match.group(1))
+            start = tail.find(marker)
+            if start == -1:
+                held = next((k for k in range(min(len(marker) - 1, len(tail)), 0, -1) if tail.endswith(marker[:k])), 0)
+                start = len(tail) - held
+            if start:
+                out.write(tail[:start])
+                out.flush()
+                del tail[:start]
+
+    out.write(tail)
+    out.flush()
+    print("\nSession terminated before the script finished; variables were reset.", file=sys.stderr)
+    return 1
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--serve"]:
+        serve()
+    elif not sys.argv[1:]:
+        sys.exit("usage: session_host.py script.py [args...]")
+    else:
+        sys.stdout.flush()
+        sys.exit(request(sys.argv[1:]))
@@ -1,16 +1,38 @@
-import asyncio
+import re
 from typing import Optional
 from ..utils.logging import Icons, pretty_log
 from ..utils.sanitizer import extract_code_from_markdown
 
+MAX_RESULT_ROWS = 300
+_HAS_LIMIT_RE = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+# SELECT ... INTO and data-modifying CTEs are illegal in a subquery and write rather than read
+_WRITES_RE = re.compile(r"\b(?:INTO|INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+# Comments would swallow the closing paren of "SELECT * FROM (...)"
+_COMMENT_RE = re.compile(r"--|/\*")
+
+def _is_read_query(sql: str) -> bool:
+    stripped = sql.strip()
+    return stripped.upper().startswith(("SELECT", "WITH")) and not _WRITES_RE.search(stripped)
+
+def _apply_row_limit(sql: str, limit: int = MAX_RESULT_ROWS + 1) -> str:
+    """Pushes the row cap into plain single-statement SELECTs; anything else is sent unchanged."""
+    stripped = sql.strip().rstrip(";").strip()
+    if not stripped.upper().startswith(("SELECT", "WITH")) or ";" in stripped:
+        return sql
+    if _HAS_LIMIT_RE.search(stripped) or _COMMENT_RE.search(stripped) or _WRITES_RE.search(stripped):
+        return sql
+    return f"SELECT * FROM ({stripped}) _q LIMIT {limit}"
+
+def _column_names(rows) -> list:
+    return list(rows[0].keys())
+
 async def tool_postgres_admin(action: str, connection_string: Optional[str] = None, query: Optional[str] = None, table_name: Optional[str] = None, default_uri: Optional[str] = None, **kwargs):
     pretty_log("Postgres Admin", f"Action: {action}", icon=Icons.POSTGRES)
     try:
-        import psycopg2
-        import psycopg2.extras
+        import asyncpg
         from tabulate import tabulate
     except ImportError:
-        return "Error: psycopg2 or tabulate library is missing."
+        return "Error: asyncpg or tabulate library is missing."
 
     connection_string = connection_string or default_uri
     if not connection_string:
@@ -19,52 +41,65 @@ async def tool_postgres_admin(action: str, connection_string: Optional[str] = No
     if query:
         query = extract_code_from_markdown(query)
 
-    def execute_db():
+    async def execute_db():
         conn = None
         try:
-            conn = psycopg2.connect(connection_string)
-            conn.autocommit = True
-            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                if action == "schema":
-                    sql = "SELECT table_name, column_name, data_type FROM information_schema.columns WHERE table_schema = 'public'"
-                    if table_name:
-                        sql += f" AND table_name = '{table_name}'"
-                    cur.execute(sql)
-                    rows = cur.fetchall()
-                    if not rows: return "No schema found."
-                    return tabulate(rows, headers="keys", tablefmt="pipe")
-                
-                elif action == "activity":
-                    cur.execute("SELECT pid, state, query, extract(epoch from now() - query_start) as duration_sec FROM pg_stat_activity WHERE state != 'idle';")
-                    rows = cur.fetchall()
-                    if not rows: return "No active queries."
-                    return tabulate(rows, headers="keys", tablefmt="pipe")
-                
-                elif action in ["query", "explain_analyze"]:
-                    if not query: return "Error: query parameter required."
-                    sql = query
-                    if action == "explain_analyze" and not sql.upper().strip().startswith("EXPLAIN"):
-                        sql = f"EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) {sql}"
-                    
-                    cur.execute("SET statement_timeout = 15000;")
-                    cur.execute(sql)
-                    if cur.description:
-                        rows = cur.fetchmany(301)
-                        if not rows: return "Query executed successfully. No rows returned."
-                        output = tabulate(rows[:300], headers="keys", tablefmt="pipe")
-                        if len(rows) > 300:
-                            output += f"\n\n... [Truncated {len(rows)-300} rows]"
-                        return output
-                    return "Query executed successfully. No rows returned."
+            # statement_timeout rides along with the startup packet instead of costing a round-trip
+            conn = await asyncpg.connect(dsn=connection_string, timeout=10, server_settings={"statement_timeout": "15000"})
+            if action == "schema":
+                sql = "SELECT table_name, column_name, data_type FROM information_schema.columns WHERE table_schema = 'public'"
+                params = []
+                if table_name:
+                    sql += " AND table_name = $1"
+                    params.append(table_name)
+                rows = await conn.fetch(sql, *params)
+                if not rows: return "No schema found."
+                return tabulate(rows, headers=_column_names(rows), tablefmt="pipe")
+            
+            elif action == "activity":
+                rows = await conn.fetch("SELECT pid, state, query, extract(epoch from now() - query_start) as duration_sec FROM pg_stat_activity WHERE state != 'idle';")
+                if not rows: return "No active queries."
+                return tabulate(rows, headers=_column_names(rows), tablefmt="pipe")
+            
+            elif action in ["query", "explain_analyze"]:
+                if not query: return "Error: query parameter required."
+                sql = query
+                use_cursor = False
+                if action == "explain_analyze" and not sql.upper().strip().startswith("EXPLAIN"):
+                    sql = f"EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) {sql}"
                 else:
-                    return f"Unknown action: {action}"
+                    limited = _apply_row_limit(sql)
+                    # Reads the cap could not be pushed into are pulled through a portal, one page only
+                    use_cursor = limited == sql and _is_read_query(sql)
+                    sql = limited
+                
+                try:
+                    if use_cursor:
+                        async with conn.transaction():
+                            cur = await conn.cursor(sql)
+                            rows = await cur.fetch(MAX_RESULT_ROWS + 1)
+                    else:
+                        rows = await conn.fetch(sql)
+                except asyncpg.PostgresSyntaxError as e:
+                    # Preparing the statement rejects multi-statement scripts; execute() runs them
+                    # but returns no result set, not even the final SELECT's
+                    if "multiple commands" not in str(e): raise
+                    await conn.execute(sql)
+                    return "Query executed successfully. No rows returned. (Multi-statement scripts return no rows; run the SELECT on its own to see its results.)"
+                if not rows: return "Query executed successfully. No rows returned."
+                output = tabulate(rows[:MAX_RESULT_ROWS], headers=_column_names(rows), tablefmt="pipe")
+                if len(rows) > MAX_RESULT_ROWS:
+                    output += f"\n\n... [Truncated {len(rows)-MAX_RESULT_ROWS} rows]"
+                return output
+            else:
+                return f"Unknown action: {action}"
         except Exception as e:
             return f"Error: Postgres execution failed - {str(e)}"
         finally:
             if conn:
-                conn.close()
+                await conn.close()
 
-    result = await asyncio.to_thread(execute_db)
+    result = await execute_db()
     if result.startswith("Error:"):
         return result
     return f"### POSTGRES RESULT ###\n{result}"
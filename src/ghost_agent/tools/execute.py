@@ -12,6 +12,64 @@ from typing import List
 from ..utils.logging import Icons, pretty_log
 from ..utils.sanitizer import sanitize_code
 from .file_system import _get_safe_path
+from ..sandbox.session_host import UNAVAILABLE_EXIT, UNAVAILABLE_MARKER
+
+# Native JSON tools the LLM often hallucinates as importable Python modules
+FORBIDDEN_MODULES = frozenset({
+    "knowledge_base", "system_utility", "file_system", "manage_tasks", 
+    "postgres_admin", "web_search", "fact_check", "deep_research", 
+    "vision_analysis", "delegate_to_swarm", "recall", "scratchpad", 
+    "learn_skill", "update_profile", "dream_mode", "replan"
+})
+# Top-level module named by: import mod, from mod import, !pip install mod
+_IMPORT_TARGET_RE = re.compile(r"\bimport\s+(\w+)|\bfrom\s+(\w+)[\w.]*(?=\s+import\b)|pip\s+install\s+(\w+)")
+# Stateful scripts are handed to this long-lived interpreter instead of reloading a dill session each time
+SESSION_HOST_FILE = ".ghost_session.py"
+_SESSION_HOST_CODE = (Path(__file__).resolve().parent.parent / "sandbox" / "session_host.py").read_bytes()
+# Raw HTML/CSS pasted into a script
+_WEB_CONTENT_RE = re.compile(r"<html|body \{|<div|font-family:", re.IGNORECASE)
+
+def _install_session_host(sandbox_dir: Path):
+    target = Path(sandbox_dir) / SESSION_HOST_FILE
+    if not target.exists() or target.read_bytes() != _SESSION_HOST_CODE:
+        target.write_bytes(_SESSION_HOST_CODE)
+
+def _dill_wrapper(content: str) -> str:
+    """Fallback for when the session host is unavailable: reload and save the whole session around the script."""
+    state_file = "/workspace/.ghost_state.dill"
+    wrapper_code = f"""
+import os, sys
+try:
+    import dill
+except ImportError:
+    print("SYSTEM ERROR: 'dill' library missing. Run `pip install dill`.")
+    sys.exit(1)
+
+# 1. Load previous state
+if os.path.exists("{state_file}"):
+    try:
+        dill.load_session("{state_file}")
+    except Exception as e:
+        print(f"Warning: Could not load previous state: {{e}}")
+
+# --- AGENT CODE START ---
+{content}
+# --- AGENT CODE END ---
+
+# 2. Save new state
+try:
+    dill.dump_session("{state_file}")
+except Exception as e:
+    print(f"\\nWarning: Could not save state for next turn: {{e}}")
+"""
+    return wrapper_code.strip()
+
+def _find_forbidden_import(content: str):
+    for match in _IMPORT_TARGET_RE.finditer(content):
+        mod = match.group(match.lastindex)
+        if mod in FORBIDDEN_MODULES:
+            return mod
+    return None
 
 async def tool_execute(filename: str, content: str, sandbox_dir: Path, sandbox_manager, scrapbook=None, args: List[str] = None, memory_dir: Path = None, stateful: bool = False, **kwargs):
     # --- 🛡️ HIJACK LAYER: CODE SANITIZATION ---
@@ -37,7 +95,7 @@ async def tool_execute(filename: str, content: str, sandbox_dir: Path, sandbox_m
         pretty_log("Sanitization Failed", syntax_error, level="WARNING", icon=Icons.BUG)
         
         # HTML/Web guard for when the LLM pastes raw HTML into a Python script
-        if "<html" in content.lower() or "body {" in content.lower() or "<div" in content.lower() or "font-family:" in content.lower():
+        if _WEB_CONTENT_RE.search(content):
             html_tip = "SYSTEM TIP: It looks like you are trying to write HTML, CSS, or JS intended for the browser. DO NOT use the 'execute' tool to create web pages. Use the 'file_system' tool with operation='write' to save the code directly to a file."
             return _format_error(f"Syntax Error Detected: {syntax_error}\n\n{html_tip}")
             
@@ -47,58 +105,21 @@ async def tool_execute(filename: str, content: str, sandbox_dir: Path, sandbox_m
     # 2. Hard Sandbox Guard against Native Tool Imports
     # The LLM frequently hallucinates that native JSON tools are importable Python modules.
     if ext == "py":
-        forbidden_modules = [
-            "knowledge_base", "system_utility", "file_system", "manage_tasks", 
-            "postgres_admin", "web_search", "fact_check", "deep_research", 
-            "vision_analysis", "delegate_to_swarm", "recall", "scratchpad", 
-            "learn_skill", "update_profile", "dream_mode", "replan"
-        ]
-        
-        # Check for direct imports or pip installs
-        for mod in forbidden_modules:
-            # We look for simple patterns: import mod, from mod import, !pip install mod
-            if re.search(rf"\bimport\s+{mod}\b", content) or re.search(rf"\bfrom\s+{mod}\s+import\b", content) or re.search(rf"pip\s+install\s+{mod}\b", content):
-                pretty_log("Sandbox Guard Invoked", f"Blocked hallucinated import: {mod}", level="WARNING", icon=Icons.SHIELD)
-                return _format_error(
-                    f"SYSTEM ERROR: FORBIDDEN IMPORT DETECTED -> '{mod}'\n"
-                    f"CRITICAL: '{mod}' is a Native JSON Tool, NOT a Python module.\n"
-                    f"You CANNOT import it or install it in this sandbox.\n"
-                    f"To use '{mod}', you MUST stop writing code and call the JSON tool directly!"
-                )
+        mod = _find_forbidden_import(content)
+        if mod:
+            pretty_log("Sandbox Guard Invoked", f"Blocked hallucinated import: {mod}", level="WARNING", icon=Icons.SHIELD)
+            return _format_error(
+                f"SYSTEM ERROR: FORBIDDEN IMPORT DETECTED -> '{mod}'\n"
+                f"CRITICAL: '{mod}' is a Native JSON Tool, NOT a Python module.\n"
+                f"You CANNOT import it or install it in this sandbox.\n"
+                f"To use '{mod}', you MUST stop writing code and call the JSON tool directly!"
+            )
 
     # 3. Final Trim
     content = content.strip()
     
-    # 4. Stateful Execution Wrapper (Jupyter-like behavior)
-    if ext == "py" and stateful:
-        pretty_log("Stateful Execution", "Injecting Dill State Manager", icon=Icons.TOOL_CODE)
-        state_file = "/workspace/.ghost_state.dill"
-        wrapper_code = f"""
-import os, sys
-try:
-    import dill
-except ImportError:
-    print("SYSTEM ERROR: 'dill' library missing. Run `pip install dill`.")
-    sys.exit(1)
-
-# 1. Load previous state
-if os.path.exists("{state_file}"):
-    try:
-        dill.load_session("{state_file}")
-    except Exception as e:
-        print(f"Warning: Could not load previous state: {{e}}")
-
-# --- AGENT CODE START ---
-{content}
-# --- AGENT CODE END ---
-
-# 2. Save new state
-try:
-    dill.dump_session("{state_file}")
-except Exception as e:
-    print(f"\\nWarning: Could not save state for next turn: {{e}}")
-"""
-        content = wrapper_code.strip()
+    # 4. Stateful Execution (Jupyter-like behavior) runs in the sandbox's persistent session
+    stateful = stateful and ext == "py"
 
     # ----------------------------------------
     if stateful:
@@ -130,19 +151,27 @@ except Exception as e:
     try: await asyncio.to_thread(host_path.write_text, content)
     except Exception as e: return _format_error(f"Error writing script: {e}")
 
-    if rel_path.endswith(".py"):
-        await asyncio.to_thread(sandbox_manager.execute, f"python3 -m black {rel_path}", timeout=15)
-
     try:
         ext = rel_path.split('.')[-1].lower()
-        runtime_map = {"py": "python3 -u", "js": "node", "sh": "bash"}
-        runner = runtime_map.get(ext, "")
-        cmd = f"{runner} {rel_path}" if runner else f"./{rel_path}"
-        if args: 
-            # SECURITY FIX: Use shlex.quote to safely escape all arguments
-            cmd += " " + " ".join(shlex.quote(str(a)) for a in args)
+        runtime_map = {"py": ["python3", "-u"], "js": ["node"], "sh": ["bash"]}
+        runner = runtime_map.get(ext, [])
+        if stateful:
+            await asyncio.to_thread(_install_session_host, sandbox_dir)
+            runner = ["python3", "-u", SESSION_HOST_FILE]
+        # SECURITY FIX: shlex.join safely escapes the path and all arguments
+        argv = [str(a) for a in args or []]
+        cmd = shlex.join([*runner, rel_path, *argv] if runner else [f"./{rel_path}", *argv])
+        if ext == "py":
+            # Format and run in one sandbox exec; black's own output and exit status are not reported
+            cmd = "sh -c " + shlex.quote(f"timeout 15s python3 -m black -q {shlex.quote(rel_path)} >/dev/null 2>&1; exec {cmd}")
 
         output, exit_code = await asyncio.to_thread(sandbox_manager.execute, cmd)
+
+        if stateful and exit_code == UNAVAILABLE_EXIT and UNAVAILABLE_MARKER in output:
+            pretty_log("Stateful Execution", "Session host unavailable, injecting Dill State Manager", level="WARNING", icon=Icons.TOOL_CODE)
+            content = _dill_wrapper(content)
+            await asyncio.to_thread(host_path.write_text, content)
+            output, exit_code = await asyncio.to_thread(sandbox_manager.execute, shlex.join(["python3", "-u", rel_path, *argv]))
         
         diagnostic_info = ""
         if exit_code != 0:
@@ -1,10 +1,13 @@
 import asyncio
+import contextlib
+import functools
 import hashlib
 import os
+import re
 import urllib.parse
 import json
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional, Tuple
 import httpx
 try:
     from curl_cffi import requests as curl_requests
@@ -13,23 +16,48 @@ except ImportError:
 from ..utils.logging import Icons, pretty_log
 from ..utils.helpers import request_new_tor_identity
 
+# Downloaded chunks are buffered and written a few MB at a time instead of one thread hop per chunk
+DOWNLOAD_FLUSH_BYTES = 4 * 1024 * 1024
+# Larger reads mean fewer Python-level iterations per MB on the httpx path
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+# One pooled client per proxy so repeat downloads skip the TCP/TLS setup
+_DOWNLOAD_CLIENTS: dict = {}
+# Streams currently open on each client; a dropped client is only closed once its count reaches zero
+_CLIENT_LEASES: dict = {}
+# The sandbox listing shown to the model is capped at this many files
+LIST_FILES_MAX_LINES = 200
+# Escaped runs of spaces/tabs in a search block; the flexible replace turns each into [ \t]+
+_ESCAPED_BLANKS_RE = re.compile(r'\\([ \t]+)')
+
+@functools.lru_cache(maxsize=32)
+def _resolved_root(sandbox_dir: Path) -> Path:
+    return sandbox_dir.resolve()
+
 def _get_safe_path(sandbox_dir: Path, filename: str) -> Path:
     """
     Safely resolves a path while preventing traversal attacks.
     """
     # 1. Strip leading slashes to treat as relative
     clean_name = str(filename).lstrip("/")
+    root = _resolved_root(sandbox_dir)
+    
+    # Fast path: a plain name directly under the sandbox only needs one lstat to rule out
+    # a symlink (the container can plant those in the bind mount to reach host files)
+    if clean_name and "/" not in clean_name and clean_name not in (".", ".."):
+        target_path = root / clean_name
+        if not target_path.is_symlink():
+            return target_path
     
     # 2. Resolve to absolute path
     target_path = (sandbox_dir / clean_name).resolve()
     
     # 3. Ensure it's still inside sandbox (Robust Pathlib Check)
     try:
-        if not target_path.is_relative_to(sandbox_dir.resolve()):
+        if not target_path.is_relative_to(root):
             raise ValueError(f"Security Error: Path '{filename}' attempts to access outside sandbox.")
     except AttributeError:
         # Fallback for Python < 3.9
-        if not str(target_path.resolve()).startswith(str(sandbox_dir.resolve())):
+        if not str(target_path.resolve()).startswith(str(root)):
             raise ValueError(f"Security Error: Path '{filename}' attempts to access outside sandbox.")
         
     return target_path
@@ -60,6 +88,30 @@ async def tool_read_file(filename: str, sandbox_dir: Path):
     except ValueError as ve: return str(ve)
     except Exception as e: return f"Error: {e}"
 
+def _replace_in_text(file_content: str, old_text: str, new_text: str, filename: str) -> Tuple[Optional[str], str]:
+    """
+    Replace old_text in file_content. Returns (new content, or None if nothing was replaced; status message).
+    """
+    # 1. Exact match attempt
+    if old_text in file_content:
+        occurrences = file_content.count(old_text)
+        msg = f"SUCCESS: Exact match found and replaced in '{filename}'."
+        if occurrences > 1: msg += f" WARNING: Replaced {occurrences} identical occurrences."
+        return file_content.replace(old_text, new_text), msg
+        
+    # 2. Heuristic match (ignore leading/trailing whitespace & newlines)
+    # LLMs often mess up the exact indentation of the search block
+    normalized_old = re.escape(old_text.strip())
+    flexible_old = _ESCAPED_BLANKS_RE.sub(r'[ \t]+', normalized_old)
+    
+    matches = re.findall(flexible_old, file_content)
+    if len(matches) == 1:
+        return file_content.replace(matches[0], new_text.strip()), f"SUCCESS: Flexible match found and replaced in '{filename}'."
+    elif len(matches) > 1:
+        return None, "Error: Multiple instances of this text block found. Please provide a larger, more unique block of code in 'content' to ensure we replace the correct one."
+        
+    return None, "Error: The exact search block was NOT found in the file. Ensure you copy the old code exactly as it appears in the file, including indentation and comments."
+
 async def tool_replace_text(filename: str, old_text: str, new_text: str, sandbox_dir: Path):
     pretty_log("File Replace", filename, icon=Icons.TOOL_FILE_W)
     if not old_text: return "Error: You must specify the exact 'content' to be replaced."
@@ -77,31 +129,10 @@ async def tool_replace_text(filename: str, old_text: str, new_text: str, sandbox
         if not path.exists(): return f"Error: '{filename}' not found."
         
         file_content = await asyncio.to_thread(path.read_text)
-        
-        # 1. Exact match attempt
-        if old_text in file_content:
-            occurrences = file_content.count(old_text)
-            new_file_content = file_content.replace(old_text, new_text)
+        new_file_content, msg = _replace_in_text(file_content, old_text, new_text, filename)
+        if new_file_content is not None:
             await asyncio.to_thread(path.write_text, new_file_content)
-            msg = f"SUCCESS: Exact match found and replaced in '{filename}'."
-            if occurrences > 1: msg += f" WARNING: Replaced {occurrences} identical occurrences."
-            return msg
-            
-        # 2. Heuristic match (ignore leading/trailing whitespace & newlines)
-        # LLMs often mess up the exact indentation of the search block
-        import re
-        normalized_old = re.escape(old_text.strip())
-        flexible_old = re.sub(r'\\([ \t]+)', r'[ \t]+', normalized_old)
-        
-        matches = re.findall(flexible_old, file_content)
-        if len(matches) == 1:
-            new_file_content = file_content.replace(matches[0], new_text.strip())
-            await asyncio.to_thread(path.write_text, new_file_content)
-            return f"SUCCESS: Flexible match found and replaced in '{filename}'."
-        elif len(matches) > 1:
-            return "Error: Multiple instances of this text block found. Please provide a larger, more unique block of code in 'content' to ensure we replace the correct one."
-            
-        return "Error: The exact search block was NOT found in the file. Ensure you copy the old code exactly as it appears in the file, including indentation and comments."
+        return msg
         
     except ValueError as ve: return str(ve)
     except Exception as e: return f"Error: {e}"
@@ -133,11 +164,26 @@ async def tool_write_file(filename: str, content: Any, sandbox_dir: Path):
     except ValueError as ve: return str(ve)
     except Exception as e: return f"Error: {e}"
 
+@functools.lru_cache(maxsize=4096)
+def _python_signatures(path: str, mtime_ns: int, size: int) -> tuple:
+    """
+    Top-level def/class names of a Python file. Keyed on mtime and size, so only files that changed
+    since the last listing are parsed again.
+    """
+    import ast
+    parsed = ast.parse(Path(path).read_text(errors='ignore'))
+    sigs = []
+    for node in parsed.body:
+        if isinstance(node, ast.FunctionDef):
+            sigs.append(f"def {node.name}()")
+        elif isinstance(node, ast.ClassDef):
+            sigs.append(f"class {node.name}")
+    return tuple(sigs)
+
 async def tool_list_files(sandbox_dir: Path, memory_system=None):
     pretty_log("Sandbox Tree", "Listing workspace files & mapping repo", icon=Icons.TOOL_FILE_I)
     try:
         def _build_map():
-            import ast
             import os
             tree_lines = []
             
@@ -154,31 +200,75 @@ async def tool_list_files(sandbox_dir: Path, memory_system=None):
                     line = f"  {root_prefix}{f}"
                     
                     # --- REPO MAP: Extract AST Signatures for Python files ---
-                    if f.endswith('.py') and path.stat().st_size < 100000:
+                    if f.endswith('.py'):
                         try:
-                            code = path.read_text(errors='ignore')
-                            parsed = ast.parse(code)
-                            sigs = []
-                            for node in parsed.body:
-                                if isinstance(node, ast.FunctionDef):
-                                    sigs.append(f"def {node.name}()")
-                                elif isinstance(node, ast.ClassDef):
-                                    sigs.append(f"class {node.name}")
-                            if sigs:
-                                line += f"  [{', '.join(sigs[:5])}{'...' if len(sigs)>5 else ''}]"
+                            st = path.stat()
+                            if st.st_size < 100000:
+                                sigs = _python_signatures(str(path), st.st_mtime_ns, st.st_size)
+                                if sigs:
+                                    line += f"  [{', '.join(sigs[:5])}{'...' if len(sigs)>5 else ''}]"
                         except Exception:
                             pass
                     tree_lines.append(line)
+                    # Only the first LIST_FILES_MAX_LINES are shown, so stop walking (and parsing) there
+                    if len(tree_lines) >= LIST_FILES_MAX_LINES:
+                        return "\n".join(tree_lines)
                     
-            return "\n".join(tree_lines[:200]) if tree_lines else "[Empty]"
+            return "\n".join(tree_lines) if tree_lines else "[Empty]"
             
         sandbox_tree = await asyncio.to_thread(_build_map)
-        if len(sandbox_tree.splitlines()) >= 200:
+        if len(sandbox_tree.splitlines()) >= LIST_FILES_MAX_LINES:
             sandbox_tree += "\n  ... [Truncated for length]"
             
         return f"CURRENT SANDBOX DIRECTORY STRUCTURE:\n{sandbox_tree}\n\n(Use these filenames for all file tools)"
     except Exception as e: return f"Error scanning sandbox: {e}"
 
+def _get_client(proxy_url: str = None) -> httpx.AsyncClient:
+    client = _DOWNLOAD_CLIENTS.get(proxy_url)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(proxy=proxy_url, headers={"User-Agent": "Mozilla/5.0"}, follow_redirects=True, timeout=60.0, verify=False, http2=True)
+        _DOWNLOAD_CLIENTS[proxy_url] = client
+    return client
+
+@contextlib.asynccontextmanager
+async def _leased_client(proxy_url: str = None):
+    client = _get_client(proxy_url)
+    _CLIENT_LEASES[client] = _CLIENT_LEASES.get(client, 0) + 1
+    try:
+        yield client
+    finally:
+        remaining = _CLIENT_LEASES.pop(client, 1) - 1
+        if remaining:
+            _CLIENT_LEASES[client] = remaining
+        elif _DOWNLOAD_CLIENTS.get(proxy_url) is not client:
+            # Dropped while we were streaming and we were its last user
+            await client.aclose()
+
+async def _drop_client(proxy_url: str = None) -> None:
+    # Pooled connections would keep riding the old Tor circuit after an identity change.
+    # Downloads already streaming on the old client finish on it; the last one closes it.
+    client = _DOWNLOAD_CLIENTS.pop(proxy_url, None)
+    if client is not None and client not in _CLIENT_LEASES:
+        await client.aclose()
+
+async def close_download_clients() -> None:
+    clients = set(_DOWNLOAD_CLIENTS.values()) | set(_CLIENT_LEASES)
+    _DOWNLOAD_CLIENTS.clear()
+    _CLIENT_LEASES.clear()
+    for client in clients:
+        await client.aclose()
+
+async def _write_chunks(f, chunks) -> None:
+    buf = bytearray()
+    async for chunk in chunks:
+        if not chunk: continue
+        buf += chunk
+        if len(buf) >= DOWNLOAD_FLUSH_BYTES:
+            await asyncio.to_thread(f.write, bytes(buf))
+            buf.clear()
+    if buf:
+        await asyncio.to_thread(f.write, bytes(buf))
+
 async def tool_download_file(url: str, sandbox_dir: Path, tor_proxy: str, filename: str = None):
     # 1. Clean Proxy URL
     proxy_url = tor_proxy
@@ -189,7 +279,6 @@ async def tool_download_file(url: str, sandbox_dir: Path, tor_proxy: str, filena
     if proxy_url and proxy_url.startswith("socks5://"): 
         proxy_url = proxy_url.replace("socks5://", "socks5h://")
 
-    headers = {"User-Agent": "Mozilla/5.0"}
     last_error = None
     for attempt in range(3):
         try:
@@ -214,39 +303,38 @@ async def tool_download_file(url: str, sandbox_dir: Path, tor_proxy: str, filena
                     
                     target_path.parent.mkdir(parents=True, exist_ok=True)
                     with open(target_path, "wb") as f:
-                        async for chunk in resp.aiter_content():
-                            if chunk:
-                                await asyncio.to_thread(f.write, chunk)
+                        await _write_chunks(f, resp.aiter_content())
                     return f"SUCCESS: Downloaded '{url}' to '{filename}'."
             else:
-                async with httpx.AsyncClient(proxy=proxy_url, headers=headers, follow_redirects=True, timeout=60.0, verify=False) as client:
-                    async with client.stream("GET", url) as resp:
-                        if resp.status_code != 200:
-                            if resp.status_code in [401, 403, 503] and mode == "TOR":
-                                await asyncio.to_thread(request_new_tor_identity)
-                                await asyncio.sleep(5)
-                                continue
-                            return f"Error {resp.status_code} - Failed to download from {url}"
-                        
-                        clength = resp.headers.get("Content-Length")
-                        if clength and int(clength) > 50000000:
-                            return f"Error: File is too large ({int(clength)/1000000:.1f}MB). Download limit is 50MB."
+                async with _leased_client(proxy_url) as client, client.stream("GET", url) as resp:
+                    if resp.status_code != 200:
+                        if resp.status_code in [401, 403, 503] and mode == "TOR":
+                            await asyncio.to_thread(request_new_tor_identity)
+                            await _drop_client(proxy_url)
+                            await asyncio.sleep(5)
+                            continue
+                        return f"Error {resp.status_code} - Failed to download from {url}"
+                    
+                    clength = resp.headers.get("Content-Length")
+                    if clength and int(clength) > 50000000:
+                        return f"Error: File is too large ({int(clength)/1000000:.1f}MB). Download limit is 50MB."
 
-                        try:
-                            target_path = _get_safe_path(sandbox_dir, filename)
-                        except ValueError as ve: return str(ve)
-
-                        target_path.parent.mkdir(parents=True, exist_ok=True)
-                        
-                        with open(target_path, "wb") as f:
-                            async for chunk in resp.aiter_bytes():
-                                await asyncio.to_thread(f.write, chunk)
-                                
-                    return f"SUCCESS: Downloaded '{url}' to '{filename}'."
+                    try:
+                        target_path = _get_safe_path(sandbox_dir, filename)
+                    except ValueError as ve: return str(ve)
+
+                    target_path.parent.mkdir(parents=True, exist_ok=True)
+                    
+                    with open(target_path, "wb") as f:
+                        await _write_chunks(f, resp.aiter_bytes(chunk_size=DOWNLOAD_CHUNK_BYTES))
+                            
+                return f"SUCCESS: Downloaded '{url}' to '{filename}'."
         except Exception as e:
             last_error = e
             if mode == "TOR":
                 await asyncio.to_thread(request_new_tor_identity)
+                if not curl_requests:
+                    await _drop_client(proxy_url)
                 await asyncio.sleep(5)
                 continue
             
@@ -77,13 +77,28 @@ async def tool_gain_knowledge(filename: str, sandbox_dir: Path, memory_system):
     if is_web and filename.lower().split("?")[0].endswith(".pdf"):
         return "Error: You cannot directly ingest a PDF URL. If you already downloaded it to the sandbox, pass the LOCAL FILENAME (e.g. 'document.pdf') instead of the URL. If you haven't downloaded it, use file_system(operation='download') first."
 
-    full_text = ""
+    def _split_and_ingest(full_text):
+        if not full_text or not full_text.strip(): return "Error: Extracted text is empty."
+
+        pretty_log("KB Split", f"{len(full_text)} chars", icon=Icons.MEM_SPLIT)
+        # Reduced chunk size to 600 to prevent silent truncation by all-MiniLM-L6-v2's 256 token limit
+        chunks = recursive_split_text(full_text, chunk_size=600, chunk_overlap=100)
+        if not chunks: return "Error: No chunks created."
+
+        pretty_log("KB Embed", f"{len(chunks)} fragments", icon=Icons.MEM_EMBED)
+        try:
+            # Vector system handles enrichment, batching and the library index
+            memory_system.ingest_document(filename, chunks)
+        except Exception as e: return f"Embedding Error: {e}"
+        return None
+
     if is_web:
         pretty_log("Fetching URL", filename, icon=Icons.TOOL_DOWN)
         try:
             full_text = await helper_fetch_url_content(filename)
             if full_text.startswith("Error"): return full_text 
         except Exception as e: return f"Web Error: {str(e)}"
+        error = await asyncio.to_thread(_split_and_ingest, full_text)
     else:
         file_path = sandbox_dir / filename
         
@@ -121,43 +136,31 @@ async def tool_gain_knowledge(filename: str, sandbox_dir: Path, memory_system):
             except:
                 return f"Error: File '{filename}' not found."
                 
-        try:
-            def _extract_text():
-                extracted = ""
-                binary_exts = ['.png', '.jpg', '.jpeg', '.gif', '.zip', '.tar', '.gz', '.sqlite', '.db', '.mp4', '.exe']
-                if any(filename.lower().endswith(ext) for ext in binary_exts):
-                    raise ValueError("Cannot ingest binary or media files into text memory.")
-                if filename.lower().endswith(".pdf"):
-                    import fitz
-                    doc = fitz.open(file_path)
-                    for page in doc:
-                        text = page.get_text()
-                        if text: extracted += text + "\n"
-                    doc.close()
-                else:
-                    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                        extracted = f.read()
-                return extracted
-            full_text = await asyncio.to_thread(_extract_text)
-        except Exception as e: return f"Disk Error: {str(e)}"
-
-    if not full_text or not full_text.strip(): return "Error: Extracted text is empty."
-
-    pretty_log("KB Split", f"{len(full_text)} chars", icon=Icons.MEM_SPLIT)
-    # Reduced chunk size to 600 to prevent silent truncation by all-MiniLM-L6-v2's 256 token limit
-    chunks = recursive_split_text(full_text, chunk_size=600, chunk_overlap=100)
-    if not chunks: return "Error: No chunks created."
-
-    pretty_log("KB Embed", f"{len(chunks)} fragments", icon=Icons.MEM_EMBED)
-    try:
-        # Offload ingestion to vector system logic (which now handles enrichment and batching)
-        await asyncio.to_thread(memory_system.ingest_document, filename, chunks)
-        preview = full_text[:300].replace("\n", " ") + "..."
-    except Exception as e: return f"Embedding Error: {e}"
-
-    try: await asyncio.to_thread(memory_system._update_library_index, filename, "add")
-    except: pass 
-
+        def _extract_text():
+            extracted = ""
+            binary_exts = ['.png', '.jpg', '.jpeg', '.gif', '.zip', '.tar', '.gz', '.sqlite', '.db', '.mp4', '.exe']
+            if any(filename.lower().endswith(ext) for ext in binary_exts):
+                raise ValueError("Cannot ingest binary or media files into text memory.")
+            if filename.lower().endswith(".pdf"):
+                import fitz
+                doc = fitz.open(file_path)
+                for page in doc:
+                    text = page.get_text()
+                    if text: extracted += text + "\n"
+                doc.close()
+            else:
+                with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+                    extracted = f.read()
+            return extracted
+
+        def _extract_and_ingest():
+            # One worker hop per document: read, split and embed back to back
+            try: full_text = _extract_text()
+            except Exception as e: return f"Disk Error: {str(e)}"
+            return _split_and_ingest(full_text)
+        error = await asyncio.to_thread(_extract_and_ingest)
+
+    if error: return error
     return f"SUCCESS: Ingested '{filename}'."
 
 async def tool_recall(query: str, memory_system, **kwargs):
@@ -244,13 +247,13 @@ async def tool_unified_forget(target: str, sandbox_dir: Path, memory_system, pro
         try:
             # Naive attempt to map "Forget my location" -> location
             # If target is specific "Forget London", we search the profile
-            data = profile_memory.load()
+            data = await asyncio.to_thread(profile_memory.load)
             found_key = False
             for cat, subdata in data.items():
                 if isinstance(subdata, dict):
                     for k, v in list(subdata.items()): # list() for safe deletion during iteration
                         if target.lower() in k.lower() or target.lower() in str(v).lower():
-                            profile_memory.delete(cat, k)
+                            await asyncio.to_thread(profile_memory.delete, cat, k)
                             report.append(f"✅ Profile: Removed {cat}.{k}")
                             found_key = True
             
@@ -290,7 +293,7 @@ async def tool_update_profile(category: str, key: str, value: str, profile_memor
 
 async def tool_learn_skill(task: str, mistake: str, solution: str, skill_memory, memory_system=None, **kwargs):
     if not skill_memory: return "Error: Skill memory not active."
-    skill_memory.learn_lesson(task, mistake, solution, memory_system=memory_system)
+    await asyncio.to_thread(skill_memory.learn_lesson, task, mistake, solution, memory_system=memory_system)
     return "SUCCESS: Lesson learned and saved to the Skill Playbook and Vector Memory."
 
 async def tool_knowledge_base(action: str, sandbox_dir: Path, memory_system, **kwargs):
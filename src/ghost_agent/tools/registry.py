@@ -126,7 +126,7 @@ TOOL_DEFINITIONS = [
                     },
                     "query": {
                         "type": "string",
-                        "description": "The SQL query to execute. Required for 'query' and 'explain_analyze'."
+                        "description": "The SQL query to execute. Required for 'query' and 'explain_analyze'. At most 300 rows are returned. A multi-statement script runs but returns no rows, so send a SELECT on its own to see its results."
                     },
                     "table_name": {
                         "type": "string",
@@ -139,38 +139,40 @@ TOOL_DEFINITIONS = [
     }
 ]
 
+VISION_TOOL_DEFINITION = {
+    "type": "function",
+    "function": {
+        "name": "vision_analysis",
+        "description": "Send an image or PDF to a Vision AI for analysis (OCR, graph reading, or picture description).",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "action": {
+                    "type": "string",
+                    "enum": ["graph_analysis", "describe_picture", "extract_text_picture", "extract_text_pdf"],
+                    "description": "The exact operation to perform."
+                },
+                "target": {
+                    "type": "string",
+                    "description": "Local sandbox path to the image/pdf OR an HTTP/HTTPS URL."
+                },
+                "prompt": {
+                    "type": "string",
+                    "description": "Optional specific questions or instructions for the analysis."
+                }
+            },
+            "required": ["action", "target"]
+        }
+    }
+}
+
+# Both tool lists are built once at import; callers only read them
+TOOL_DEFINITIONS_WITH_VISION = TOOL_DEFINITIONS + [VISION_TOOL_DEFINITION]
+
 def get_active_tool_definitions(context):
-    active_tools = list(TOOL_DEFINITIONS)
-    
     if context and getattr(context.llm_client, 'vision_clients', None):
-        active_tools.append({
-            "type": "function",
-            "function": {
-                "name": "vision_analysis",
-                "description": "Send an image or PDF to a Vision AI for analysis (OCR, graph reading, or picture description).",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "action": {
-                            "type": "string",
-                            "enum": ["graph_analysis", "describe_picture", "extract_text_picture", "extract_text_pdf"],
-                            "description": "The exact operation to perform."
-                        },
-                        "target": {
-                            "type": "string",
-                            "description": "Local sandbox path to the image/pdf OR an HTTP/HTTPS URL."
-                        },
-                        "prompt": {
-                            "type": "string",
-                            "description": "Optional specific questions or instructions for the analysis."
-                        }
-                    },
-                    "required": ["action", "target"]
-                }
-            }
-        })
-        
-    return active_tools
+        return TOOL_DEFINITIONS_WITH_VISION
+    return TOOL_DEFINITIONS
 
 def get_available_tools(context):
     from .memory import tool_dream_mode, tool_self_play # Lazy import to avoid circular dependencies
@@ -17,7 +17,7 @@ async def tool_get_current_time():
 async def tool_get_weather(tor_proxy: str, profile_memory=None, location: str = None):
     if not location and profile_memory:
         try:
-            data = profile_memory.load()
+            data = await asyncio.to_thread(profile_memory.load)
             found_loc = _find_location_in_profile(data)
             if found_loc:
                 location = found_loc
@@ -178,7 +178,7 @@ def _find_location_in_profile(data: dict) -> str:
 async def tool_check_location(profile_memory):
     if not profile_memory: return "Error: Profile memory not loaded."
     try:
-        data = profile_memory.load()
+        data = await asyncio.to_thread(profile_memory.load)
         loc = _find_location_in_profile(data)
         if loc:
             return f"User Location: {loc}"
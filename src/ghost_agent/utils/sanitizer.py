@@ -79,6 +79,13 @@ def fix_python_syntax(code: str) -> str:
     Attempts to fix common Python syntax errors using a targeted AST-driven healing loop,
     falling back to regex and tokenization checks for edge cases.
     """
+    return _heal_python_syntax(code)[0]
+
+def _heal_python_syntax(code: str) -> Tuple[str, Optional[SyntaxError]]:
+    """
+    Healing loop behind fix_python_syntax.
+    Returns: (code, error) where error is the SyntaxError of the final parse, or None if it parsed.
+    """
     # 0. Brute-force cleanup
     code = re.sub(r'(\?[\w,]{1,3}){3,}', '', code) # Stuttering
     code = re.sub(r'(\?){3,}$', '', code) # Trailing ? sequence
@@ -96,12 +103,12 @@ def fix_python_syntax(code: str) -> str:
     # 2. AST-Driven Iterative Healing Loop
     lines = code.splitlines()
     if not lines:
-        return code
+        return code, None
     max_retries = 20
     for _ in range(max_retries):
         try:
             ast.parse("\n".join(lines))
-            return "\n".join(lines)
+            return "\n".join(lines), None
         except SyntaxError as e:
             msg = e.msg.lower() if e.msg else ""
             lineno = e.lineno
@@ -197,11 +204,9 @@ def fix_python_syntax(code: str) -> str:
     code = "\n".join(fixed_lines)
     try:
         ast.parse(code)
-        return code
-    except SyntaxError:
-        pass
-
-    return code
+        return code, None
+    except SyntaxError as e:
+        return code, e
 
 def sanitize_code(content: str, filename: str) -> Tuple[str, Optional[str]]:
     """
@@ -219,14 +224,12 @@ def sanitize_code(content: str, filename: str) -> Tuple[str, Optional[str]]:
     
     # 2. Language specific fixes
     if ext == "py":
-        content = fix_python_syntax(content)
-        # Final Verification
-        try:
-            ast.parse(content)
-        except SyntaxError as e:
+        # Final Verification: the healing loop already parsed what it returns
+        content, syntax_error = _heal_python_syntax(content)
+        if syntax_error:
             # We return the content anyway, but with an error message
             # The execution tool might decide to run it anyway or report the error.
             # But the requirement says "return a helpful error".
-            return content, f"SyntaxError: {e}"
+            return content, f"SyntaxError: {syntax_error}"
             
     return content, None
@@ -0,0 +1,88 @@
+"""Plain stand-ins for the docker SDK objects DockerSandbox touches; much cheaper to build than MagicMock trees."""
+import types
+from unittest.mock import MagicMock, patch
+
+from ghost_agent.sandbox.docker import DockerSandbox
+
+class NotFound(Exception): pass
+class APIError(Exception): pass
+class ImageNotFound(Exception): pass
+class DockerException(Exception): pass
+
+class FakeContainer:
+    """Records every exec_run and answers it with handler(cmd, kwargs) -> (exit_code, output)."""
+    def __init__(self, handler=None):
+        self._h = handler or (lambda cmd, kw: (0, b""))
+        self.id = "fake-container"
+        self.status = "running"
+        self.calls = []
+        self.commits = []
+
+    def exec_run(self, cmd, **kw):
+        self.calls.append((cmd, kw))
+        return self._h(cmd, kw)
+
+    def reload(self): pass
+    def start(self): self.status = "running"
+    def wait(self, **kw): return {"StatusCode": 0}
+    def remove(self, **kw): self.status = "removed"
+    def commit(self, **kw): self.commits.append(kw)
+
+class FakeContainers:
+    def __init__(self, container):
+        self._container = container
+        self.run_kwargs = None
+
+    def get(self, name):
+        raise NotFound(name)
+
+    def run(self, **kw):
+        self.run_kwargs = kw
+        return self._container
+
+class FakeImages:
+    def __init__(self, available=None):
+        # None means every image is already present locally
+        self.available = available
+        self.built = []
+        self.pulled = []
+
+    def get(self, name):
+        if self.available is not None and name not in self.available:
+            raise ImageNotFound(name)
+
+    def build(self, **kw):
+        self.built.append(kw)
+
+    def pull(self, name):
+        self.pulled.append(name)
+
+class FakeClient:
+    def __init__(self, container, images=None):
+        self.containers = FakeContainers(container)
+        self.images = FakeImages(images)
+        self.api = None
+
+    def ping(self):
+        return True
+
+def docker_modules(client):
+    """sys.modules entries under which `import docker` hands out the fake client."""
+    errors = types.SimpleNamespace(NotFound=NotFound, APIError=APIError, ImageNotFound=ImageNotFound, DockerException=DockerException)
+    docker = types.SimpleNamespace(from_env=lambda: client, errors=errors)
+    return {"docker": docker, "docker.errors": errors}
+
+def make_sandbox(workspace, exec_chunks=((b"ok", None),), persistent_shell=False):
+    """DockerSandbox over `workspace` (pass tmp_path) with a running MagicMock container and low-level API."""
+    with patch.dict("sys.modules", docker_modules(FakeClient(FakeContainer()))):
+        sandbox = DockerSandbox(workspace)
+    sandbox.container = MagicMock()
+    sandbox.container.status = "running"
+    # ensure_running probes with exec_run and expects a (exit_code, output) tuple
+    sandbox.container.exec_run.return_value = (0, b"")
+    sandbox.persistent_shell = persistent_shell
+    sandbox._api = MagicMock()
+    sandbox._api.exec_create.return_value = {"Id": "exec-1"}
+    sandbox._api.exec_start.side_effect = lambda *a, **kw: iter(exec_chunks)
+    sandbox._api.exec_inspect.return_value = {"ExitCode": 0}
+    return sandbox
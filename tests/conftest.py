@@ -1,10 +1,35 @@
 import pytest
 import os
+import sys
 import shutil
 import tempfile
 from pathlib import Path
 from unittest.mock import MagicMock, AsyncMock
 
+# Make both `ghost_agent` and `src.ghost_agent` importable once for the whole session
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT / "src", ROOT):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+try:
+    import docker  # noqa: F401
+except ImportError:
+    # The sandbox tests mock the client anyway; a single stub keeps them importable without the SDK
+    sys.modules["docker"] = MagicMock()
+    sys.modules["docker.errors"] = MagicMock(NotFound=type("NotFound", (Exception,), {}))
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+if uvloop is not None:
+    # libuv-backed loops for every async test when uvloop is installed; optional so older pytest-asyncio ignores it
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_asyncio_loop_factories(config, item):
+        return {"uvloop": uvloop.new_event_loop}
+
 @pytest.fixture
 def mock_llm():
     client = MagicMock()
@@ -13,6 +38,22 @@ def mock_llm():
     })
     return client
 
+@pytest.fixture(scope="session")
+def shared_sandbox(tmp_path_factory):
+    """One sandbox per session for tests that only read the files they put there."""
+    return tmp_path_factory.mktemp("sandbox")
+
+@pytest.fixture(scope="session")
+def tool_map():
+    """Tool definitions keyed by function name, built once per session."""
+    from ghost_agent.tools.registry import TOOL_DEFINITIONS
+    return {t["function"]["name"]: t for t in TOOL_DEFINITIONS}
+
+@pytest.fixture(scope="session")
+def prompts_source():
+    """Raw text of core/prompts.py, read once per session for tests that avoid importing the agent."""
+    return (ROOT / "src" / "ghost_agent" / "core" / "prompts.py").read_text(encoding="utf-8")
+
 @pytest.fixture
 def temp_dirs():
     base = Path(tempfile.mkdtemp())
@@ -35,6 +76,7 @@ def mock_context(temp_dirs, mock_llm):
     context.args.smart_memory = 0.0 # Prevent comparison error
     context.args.verbose = False
     context.args.temperature = 0.1
+    context.cached_sandbox_state_expiry = float("inf") # Prevent comparison error
     
     # Mock return values as strings to prevent TypeErrors in string manipulation
     context.profile_memory = MagicMock()
@@ -16,6 +16,7 @@ def mock_agent():
     mock_context.args.smart_memory = 0.0
     mock_context.scratchpad.list_all.return_value = "A" * 2000
     mock_context.cached_sandbox_state = "B" * 2000
+    mock_context.cached_sandbox_state_expiry = float("inf")
     
     mock_context.profile_memory.get_context_string.return_value = "Some profile text"
     mock_context.short_term_memory.get_recent_summary.return_value = "Some recent summary"
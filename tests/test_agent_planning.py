@@ -1,8 +1,3 @@
-
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
-
 import pytest
 from unittest.mock import MagicMock
 from ghost_agent.core.agent import GhostAgent, GhostContext
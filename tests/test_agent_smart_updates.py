@@ -12,6 +12,7 @@ def mock_context():
     ctx.args = MagicMock()
     ctx.args.smart_memory = 0.5
     ctx.args.max_context = 4000
+    ctx.cached_sandbox_state_expiry = float("inf")
     return ctx
 
 @pytest.mark.asyncio
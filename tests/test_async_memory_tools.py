@@ -3,7 +3,7 @@ import pytest
 import asyncio
 from unittest.mock import MagicMock, AsyncMock, patch
 from pathlib import Path
-from ghost_agent.tools.memory import tool_unified_forget
+from ghost_agent.tools.memory import tool_unified_forget, tool_learn_skill
 
 @pytest.fixture
 def mock_memory_system():
@@ -67,3 +67,14 @@ async def test_unified_forget_async_calls(mock_memory_system):
                 
         assert query_called, "collection.query was not offloaded to thread"
         assert delete_called, "collection.delete was not offloaded to thread"
+
+@pytest.mark.asyncio
+async def test_learn_skill_offloads_disk_write():
+    """learn_lesson fsyncs the playbook log, so it must not run on the event loop"""
+    skill_memory = MagicMock()
+    
+    with patch('asyncio.to_thread', new_callable=AsyncMock) as mock_to_thread:
+        await tool_learn_skill("Task", "Mistake", "Solution", skill_memory)
+        
+        assert mock_to_thread.call_args.args[0] == skill_memory.learn_lesson
+        skill_memory.learn_lesson.assert_not_called()
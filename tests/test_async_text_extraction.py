@@ -32,12 +32,8 @@ async def test_tool_gain_knowledge_async_extraction_pdf(tmp_path):
         # We can't easily check identity of inner function, but we can return data
         
         # Side effect to run the function passed to to_thread?
-        # The code will call: await asyncio.to_thread(_extract_text)
-        # And later: await asyncio.to_thread(memory_system.ingest_document, ...)
-        
-        # Let's mock to_thread to return "PDF Content" for the first call (extraction)
-        # and None for the second call (ingestion)
-        # But wait, if we mock it, the inner function won't run unless we run it.
+        # The code will call: await asyncio.to_thread(_extract_and_ingest),
+        # which extracts, splits and calls memory_system.ingest_document in one hop
         
         async def side_effect(func, *args, **kwargs):
             if callable(func):
@@ -52,8 +48,9 @@ async def test_tool_gain_knowledge_async_extraction_pdf(tmp_path):
         # Verify fitz was used (inside the thread)
         mock_fitz_open.assert_called_with(file_path)
         
-        # Verify to_thread was called at least twice (extraction + ingestion)
-        assert mock_to_thread.call_count >= 2
+        # Verify extraction and ingestion shared one worker hop
+        assert mock_to_thread.call_count == 1
+        mock_memory.ingest_document.assert_called_once_with(filename, ["chunk1"])
 
 @pytest.mark.asyncio
 async def test_tool_gain_knowledge_async_extraction_text(tmp_path):
@@ -81,5 +78,6 @@ async def test_tool_gain_knowledge_async_extraction_text(tmp_path):
         # Verify open was used
         mock_file_open.assert_called_with(file_path, "r", encoding="utf-8", errors="ignore")
         
-        # Verify to_thread was called
-        assert mock_to_thread.call_count >= 2
+        # Verify extraction and ingestion shared one worker hop
+        assert mock_to_thread.call_count == 1
+        mock_memory.ingest_document.assert_called_once_with(filename, ["chunk1"])
@@ -33,19 +33,56 @@ def test_profile_memory_atomic_save_real_fs(tmp_path):
         assert expected_tmp.exists()
         assert json.loads(expected_tmp.read_text()) == data
 
+def test_profile_memory_load_cached_until_mtime_changes(tmp_path):
+    pm = ProfileMemory(tmp_path)
+    pm.invalidate()
+    
+    with patch.object(Path, "read_bytes", autospec=True, side_effect=Path.read_bytes) as spy:
+        first = pm.load()
+        second = pm.load()
+        assert first is second
+        assert spy.call_count == 1
+        
+        # An external edit bumps the mtime and forces a re-parse
+        stat = os.stat(pm.file_path)
+        pm.file_path.write_text(json.dumps({"root": {"name": "Edited"}}))
+        os.utime(pm.file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert pm.load()["root"]["name"] == "Edited"
+        assert spy.call_count == 2
+
 def test_skill_memory_atomic_learn_real_fs(tmp_path):
     sm = SkillMemory(tmp_path)
     
     with patch("os.replace") as mock_replace:
         sm.learn_lesson("Task", "Mistake", "Solution")
         
-        expected_tmp = sm.file_path.with_suffix('.tmp')
-        mock_replace.assert_called_with(expected_tmp, sm.file_path)
+        # Lessons are appended to the JSONL log, the snapshot is not rewritten
+        mock_replace.assert_not_called()
         
-        assert expected_tmp.exists()
-        content = json.loads(expected_tmp.read_text())
-        assert len(content) == 1
-        assert content[0]["task"] == "Task"
+        lines = sm.log_path.read_text().splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])["task"] == "Task"
+        assert sm.load_playbook()[0]["task"] == "Task"
+
+def test_skill_memory_compaction(tmp_path):
+    sm = SkillMemory(tmp_path)
+    sm.COMPACT_EVERY = 3
+    
+    sm.learn_lesson("T1", "M", "S")
+    sm.learn_lesson("T2", "M", "S")
+    assert json.loads(sm.file_path.read_text()) == []
+    
+    sm.learn_lesson("T3", "M", "S")
+    
+    # Third append folds the log into the snapshot (newest first) and drops the log
+    assert not sm.log_path.exists()
+    assert [p["task"] for p in json.loads(sm.file_path.read_text())] == ["T3", "T2", "T1"]
+    
+    # Leftover log entries from a previous run are folded in at startup
+    sm.learn_lesson("T4", "M", "S")
+    sm2 = SkillMemory(tmp_path)
+    assert not sm2.log_path.exists()
+    assert [p["task"] for p in sm2.load_playbook()] == ["T4", "T3", "T2", "T1"]
 
 def test_profile_memory_locking(tmp_path):
     # Verify that the lock is acquired
@@ -64,8 +101,15 @@ def test_profile_memory_locking(tmp_path):
     pm.save({"a": 1})
     mock_lock.__enter__.assert_called()
     
+    # Readers rely on os.replace atomicity and never take the writer lock
+    mock_lock.reset_mock()
     pm.load()
-    mock_lock.__enter__.assert_called()
+    pm.get_context_string()
+    mock_lock.__enter__.assert_not_called()
+    
+    pm.update("root", "city", "Athens")
+    mock_lock.__enter__.assert_called_once()
+    assert pm.load()["root"]["city"] == "Athens"
 
 def test_skill_memory_locking(tmp_path):
     sm = SkillMemory(tmp_path)
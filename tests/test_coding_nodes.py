@@ -1,5 +1,7 @@
 import pytest
 import asyncio
+import time
+import httpx
 from unittest.mock import MagicMock, AsyncMock, patch
 from ghost_agent.core.llm import LLMClient
 
@@ -16,7 +18,7 @@ async def test_llm_client_initializes_coding_nodes(mock_coding_nodes):
     assert len(client.coding_clients) == 2
     assert client.coding_clients[0]["model"] == "qwen2.5-coder:7b"
     assert client.coding_clients[1]["model"] == "deepseek-coder:6.7b"
-    assert hasattr(client, "_coding_index")
+    assert hasattr(client, "_coding_counter")
     await client.close()
 
 @pytest.mark.asyncio
@@ -32,6 +34,67 @@ async def test_get_coding_node_round_robin(mock_coding_nodes):
     assert node3["model"] == "qwen2.5-coder:7b"  # Wraps around
     await client.close()
 
+@pytest.mark.asyncio
+async def test_get_coding_node_least_inflight(mock_coding_nodes):
+    client = LLMClient(upstream_url="http://main-node:8000", coding_nodes=mock_coding_nodes + [
+        {"url": "http://coding-node-3:8000", "model": "codestral:22b"}
+    ], coding_strategy="least_inflight")
+    
+    # Simulate a burst of concurrent requests: each hangs until released
+    release = asyncio.Event()
+    async def slow_post(*args, **kwargs):
+        await release.wait()
+        resp = MagicMock()
+        resp.json.return_value = {"choices": [{"message": {"content": "ok"}}]}
+        return resp
+    for node in client.coding_clients:
+        node["client"].post = AsyncMock(side_effect=slow_post)
+    
+    payload = {"messages": [{"role": "user", "content": "code"}], "model": "any"}
+    tasks = [asyncio.create_task(client.chat_completion(payload, use_coding=True)) for _ in range(6)]
+    await asyncio.sleep(0)
+    
+    # Load is spread evenly instead of piling onto one node
+    assert [n["inflight"] for n in client.coding_clients] == [2, 2, 2]
+    
+    # A node that is already busy is skipped
+    client.coding_clients[0]["inflight"] += 5
+    assert client.get_coding_node(strategy="least_inflight")["model"] != "qwen2.5-coder:7b"
+    client.coding_clients[0]["inflight"] -= 5
+    
+    release.set()
+    await asyncio.gather(*tasks)
+    assert [n["inflight"] for n in client.coding_clients] == [0, 0, 0]
+    await client.close()
+
+@pytest.mark.asyncio
+async def test_chat_completion_coding_retry_honours_least_inflight(mock_coding_nodes):
+    client = LLMClient(upstream_url="http://main-node:8000", coding_nodes=mock_coding_nodes + [
+        {"url": "http://coding-node-3:8000", "model": "codestral:22b"}
+    ], coding_strategy="least_inflight")
+    first, busy, idle = client.coding_clients
+    busy["inflight"], idle["inflight"] = 5, 1
+    
+    seen_inflight = []
+    async def ok_post(*args, **kwargs):
+        seen_inflight.append(idle["inflight"])
+        resp = MagicMock()
+        resp.json.return_value = {"choices": [{"message": {"content": "ok"}}]}
+        return resp
+    first["client"].post = AsyncMock(side_effect=Exception("Node Offline"))
+    busy["client"].post = AsyncMock(side_effect=ok_post)
+    idle["client"].post = AsyncMock(side_effect=ok_post)
+    
+    payload = {"messages": [{"role": "user", "content": "code"}], "model": "any"}
+    await client.chat_completion(payload, use_coding=True)
+    
+    # The retry skips the busy node and is counted against the one it lands on
+    first["client"].post.assert_awaited_once()
+    busy["client"].post.assert_not_awaited()
+    assert seen_inflight == [2]
+    assert [n["inflight"] for n in client.coding_clients] == [0, 5, 1]
+    await client.close()
+
 @pytest.mark.asyncio
 async def test_get_coding_node_by_model(mock_coding_nodes):
     client = LLMClient(upstream_url="http://main-node:8000", coding_nodes=mock_coding_nodes)
@@ -44,12 +107,24 @@ async def test_get_coding_node_by_model(mock_coding_nodes):
     node = client.get_coding_node("qwen")
     assert node["model"] == "qwen2.5-coder:7b"
     
+    # Exact and family names resolve through the index
+    assert client._coding_model_index["deepseek-coder:6.7b"]["model"] == "deepseek-coder:6.7b"
+    node = client.get_coding_node("QWEN2.5")
+    assert node is client._coding_family_index["qwen2.5"]
+    
     await client.close()
 
 @pytest.mark.asyncio
 @patch("httpx.AsyncClient.post")
 async def test_chat_completion_uses_coding_node(mock_post, mock_coding_nodes):
-    client = LLMClient(upstream_url="http://main-node:8000", coding_nodes=mock_coding_nodes)
+    with patch("ghost_agent.core.llm.httpx.AsyncHTTPTransport", wraps=httpx.AsyncHTTPTransport) as transport_spy:
+        client = LLMClient(upstream_url="http://main-node:8000", coding_nodes=mock_coding_nodes)
+    
+    # Main client + one per coding node, all HTTP/2 capable; node pools are capped below the upstream's
+    assert transport_spy.call_count == 3
+    for call in transport_spy.call_args_list:
+        assert call.kwargs["http2"] is True
+    assert [c.kwargs["limits"].max_connections for c in transport_spy.call_args_list] == [64, 8, 8]
     
     # Mock the coding node response
     mock_response = MagicMock()
@@ -99,19 +174,81 @@ async def test_chat_completion_coding_node_fallback(mock_post, mock_coding_nodes
     assert client.http_client.post.called
     await client.close()
 
+@pytest.mark.asyncio
+async def test_chat_completion_coding_node_hedged(mock_coding_nodes):
+    client = LLMClient(upstream_url="http://main-node:8000", coding_nodes=mock_coding_nodes, coding_hedge_ms=50)
+    
+    hung = asyncio.Event()
+    async def hang(*args, **kwargs):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            hung.set()
+            raise
+    
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"choices": [{"message": {"content": "Backup node response"}}]}
+    client.coding_clients[0]["client"].post = AsyncMock(side_effect=hang)
+    client.coding_clients[1]["client"].post = AsyncMock(return_value=mock_response)
+    client.http_client.post = AsyncMock()
+    
+    payload = {"messages": [{"role": "user", "content": "Write unit tests"}], "model": "any"}
+    start = time.monotonic()
+    response = await client.chat_completion(payload, use_coding=True)
+    
+    # Bounded by the hedge delay, not by the hung node
+    assert time.monotonic() - start < 1.0
+    assert response["choices"][0]["message"]["content"] == "Backup node response"
+    await asyncio.wait_for(hung.wait(), 1.0)  # Loser was cancelled
+    assert [n["inflight"] for n in client.coding_clients] == [0, 0]
+    assert not client.http_client.post.called
+    await client.close()
+
+@pytest.mark.asyncio
+async def test_chat_completion_coding_node_hedged_cancellation(mock_coding_nodes):
+    client = LLMClient(upstream_url="http://main-node:8000", coding_nodes=mock_coding_nodes, coding_hedge_ms=10)
+    
+    both_running = asyncio.Semaphore(0)
+    cancelled = []
+    async def hang(*args, **kwargs):
+        both_running.release()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(kwargs["json"]["model"])
+            raise
+    for node in client.coding_clients:
+        node["client"].post = AsyncMock(side_effect=hang)
+    client.http_client.post = AsyncMock()
+    
+    payload = {"messages": [{"role": "user", "content": "Write unit tests"}], "model": "any"}
+    call = asyncio.create_task(client.chat_completion(payload, use_coding=True))
+    for _ in range(2):
+        await asyncio.wait_for(both_running.acquire(), 1.0)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    
+    # Both hedged requests are torn down with the caller instead of being left running
+    await asyncio.sleep(0)
+    assert sorted(cancelled) == sorted(n["model"] for n in mock_coding_nodes)
+    assert [n["inflight"] for n in client.coding_clients] == [0, 0]
+    assert not client.http_client.post.called
+    await client.close()
+
 @pytest.mark.asyncio
 async def test_stream_chat_completion_uses_coding_node(mock_coding_nodes):
     client = LLMClient(upstream_url="http://main-node:8000", coding_nodes=mock_coding_nodes)
     
     # Mock the coding node response for streaming
-    async def mock_aiter_lines():
-        yield b'data: {"choices": [{"delta": {"content": "Streamed "}}]}'
-        yield b'data: {"choices": [{"delta": {"content": "code"}}]}'
-        yield b'data: [DONE]'
+    # Upstream blocks don't line up with SSE event boundaries
+    async def mock_aiter_bytes(chunk_size=None):
+        yield b'data: {"choices": [{"delta": {"content": "Streamed "}}]}\n\ndata: {"choices": [{"delta": '
+        yield b'{"content": "code"}}]}\n\ndata: [DONE]\n\n'
         
     mock_response = MagicMock()
     mock_response.raise_for_status = MagicMock()
-    mock_response.aiter_lines = mock_aiter_lines
+    mock_response.aiter_bytes = mock_aiter_bytes
     mock_response.aclose = AsyncMock()
     
     client.coding_clients[0]["client"].build_request = MagicMock()
@@ -123,8 +260,40 @@ async def test_stream_chat_completion_uses_coding_node(mock_coding_nodes):
     async for chunk in client.stream_chat_completion(payload, use_coding=True):
         chunks.append(chunk.decode('utf-8'))
         
-    assert len(chunks) == 3
-    assert 'content": "Streamed "' in chunks[0]
+    assert chunks == [
+        'data: {"choices": [{"delta": {"content": "Streamed "}}]}\n\n',
+        'data: {"choices": [{"delta": {"content": "code"}}]}\n\n',
+        'data: [DONE]\n\n',
+    ]
     
     client.coding_clients[0]["client"].send.assert_called_once()
     await client.close()
+
+@pytest.mark.asyncio
+async def test_stream_chat_completion_splits_crlf_events(mock_coding_nodes):
+    client = LLMClient(upstream_url="http://main-node:8000", coding_nodes=mock_coding_nodes)
+    
+    # CRLF-separated events, with one separator split across two blocks
+    async def mock_aiter_bytes(chunk_size=None):
+        yield b'data: {"choices": [{"delta": {"content": "Streamed "}}]}\r\n\r'
+        yield b'\ndata: {"choices": [{"delta": {"content": "code"}}]}\r\n\r\n'
+        yield b'data: [DONE]\r\n\r\n'
+        
+    mock_response = MagicMock()
+    mock_response.raise_for_status = MagicMock()
+    mock_response.aiter_bytes = mock_aiter_bytes
+    mock_response.aclose = AsyncMock()
+    
+    client.coding_clients[0]["client"].build_request = MagicMock()
+    client.coding_clients[0]["client"].send = AsyncMock(return_value=mock_response)
+    
+    chunks = []
+    async for chunk in client.stream_chat_completion({"messages": [], "model": "any"}, use_coding=True):
+        chunks.append(chunk.decode('utf-8'))
+        
+    assert chunks == [
+        'data: {"choices": [{"delta": {"content": "Streamed "}}]}\n\n',
+        'data: {"choices": [{"delta": {"content": "code"}}]}\n\n',
+        'data: [DONE]\n\n',
+    ]
+    await client.close()
@@ -1,63 +1,39 @@
 import pytest
-import os
-from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 from ghost_agent.sandbox.docker import DockerSandbox
+from tests._fakes import FakeClient, FakeContainer, docker_modules
 
-@pytest.mark.asyncio
-async def test_docker_sandbox_installs_dill_and_others():
+def test_docker_sandbox_installs_dill_and_others(tmp_path):
     """
     Test that the DockerSandbox install_cmd includes the required packages,
     specifically ensuring `dill` was recently added.
     """
-    # 1. Setup mock sandbox
-    host_workspace = Path("/tmp/workspace")
-    sandbox = DockerSandbox(host_workspace)
-    sandbox.container = MagicMock()
-    sandbox.container.status = "running"
-    
-    # 2. Mock exec code
-    def exec_side_effect(cmd, **kwargs):
+    # 1. Setup fake docker; the marker probe fails as on first boot, every install step succeeds
+    def exec_run(cmd, kwargs):
         if "test -f" in cmd:
-            # Simulate first boot where it's not installed yet
             return (1, b"")
-        if "apt-get" in cmd or "sudoers" in cmd or "PySocks" in cmd or "pip install" in cmd:
-            # Simulate successful install
-            return (0, b"Success")
-        if "touch" in cmd:
-            return (0, b"")
-        return (0, b"")
-        
-    sandbox.container.exec_run.side_effect = exec_side_effect
-    
-    # 3. Trigger the install by ensuring it runs
-    with patch.dict("sys.modules", {"docker": MagicMock(), "docker.errors": MagicMock()}):
+        return (0, b"Success")
+
+    container = FakeContainer(exec_run)
+
+    # 2. Trigger the install by ensuring it runs; the sandbox must be built under the fake docker
+    with patch.dict("sys.modules", docker_modules(FakeClient(container))):
+        sandbox = DockerSandbox(tmp_path)
         with patch.object(sandbox, "_is_container_ready", return_value=True):
             sandbox.ensure_running()
-            
-            # 4. Grab all calls to exec_run
-            calls = sandbox.container.exec_run.call_args_list
-            
-            # 5. Find the pip install call
-            pip_install_call = None
-            for call in calls:
-                args, _ = call
-                cmd = args[0]
-                if "pip install --no-cache-dir" in cmd:
-                    if "pysocks" not in cmd: # Ignore the pysocks bootstrap
-                        pip_install_call = cmd
-                        break
-                        
-            assert pip_install_call is not None, "Python package installation command was never called"
-            
-            # 6. Verify required packages are in the install string
-            packages = [
-                "numpy", "pandas", "scipy", "matplotlib", "seaborn",
-                "scikit-learn", "yfinance", "beautifulsoup4", "networkx", "requests",
-                "pylint", "black", "mypy", "bandit", "dill", 
-                "psycopg2-binary", "asyncpg", "sqlalchemy", "tabulate", "sqlglot"
-            ]
-            
-            for pkg in packages:
-                assert pkg in pip_install_call, f"Package '{pkg}' is missing from Sandbox installation"
+
+    # 3. Find the pip install call
+    pip_install_call = next((cmd for cmd, _ in container.calls if "pip install numpy" in cmd), None)
+    assert pip_install_call is not None, "Python package installation command was never called"
+
+    # 4. Verify required packages are in the install string
+    packages = [
+        "numpy", "pandas", "scipy", "matplotlib", "seaborn",
+        "scikit-learn", "yfinance", "beautifulsoup4", "networkx", "requests",
+        "pylint", "black", "mypy", "bandit", "dill",
+        "psycopg2-binary", "asyncpg", "sqlalchemy", "tabulate", "sqlglot"
+    ]
+
+    for pkg in packages:
+        assert pkg in pip_install_call, f"Package '{pkg}' is missing from Sandbox installation"
@@ -1,187 +1,125 @@
 import pytest
-import sys
-import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 from pathlib import Path
 
-# Add the src directory to Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 from ghost_agent.sandbox.docker import DockerSandbox
+from tests._fakes import FakeClient, FakeContainer, docker_modules
 
 # We remove the global sys.modules overwrite to avoid poisoning subsequent tests.
 
-def test_docker_init_installs_packages(tmp_path):
-    # Setup mock docker environment
-    mock_client = MagicMock()
-    mock_container = MagicMock()
-    
-    class MockNotFound(Exception): pass
-    
-    with patch.dict('sys.modules', {
-        'docker': MagicMock(from_env=MagicMock(return_value=mock_client)),
-        'docker.errors': MagicMock(NotFound=MockNotFound)
-    }):
-        mock_client.containers.get.side_effect = MockNotFound()
-
-        mock_client.containers.run.return_value = mock_container
-        mock_container.status = "running"
-        
-        def exec_run_side_effect(cmd, **kwargs):
-            if hasattr(cmd, '__contains__'):
-                if "test -f" in cmd:
-                    return (1, b"")
-                elif "apt-get" in cmd:
-                    return (0, b"")
-                elif "/etc/sudoers" in cmd:
-                    return (0, b"")
-                elif "pip install" in cmd:
-                    return (0, b"")
-                elif "touch" in cmd:
-                    return (0, b"")
-            return (0, b"")
-
-        mock_container.exec_run.side_effect = exec_run_side_effect
+def provision(tmp_path, script_result=(0, b""), tor_proxy=None, supercharged=False):
+    """Boots a sandbox against a fake docker client; returns (client, container)."""
+    def exec_run(cmd, kwargs):
+        if "test -f" in cmd:
+            return (0 if supercharged else 1, b"")
+        return script_result
+
+    container = FakeContainer(exec_run)
+    client = FakeClient(container)
+
+    with patch.dict('sys.modules', docker_modules(client)):
+        sandbox = DockerSandbox(host_workspace=tmp_path, tor_proxy=tor_proxy)
+        with patch.object(sandbox, "_is_container_ready", return_value=True):
+            sandbox.ensure_running()
+    return client, container
 
+def provision_calls(container):
+    return [c for c in container.calls if "test -f" not in c[0]]
+
+def test_docker_init_installs_packages(tmp_path):
+    _, container = provision(tmp_path)
+
+    # The whole install runs as a single shell exec
+    calls = provision_calls(container)
+    assert len(calls) == 1
+    script = calls[0][0]
+    assert script.startswith("sh -c '")
+    assert "apt-get update && apt-get install -y" in script
+    assert script.index("__STAGE=apt__") < script.index("__STAGE=pip__")
+    assert script.rstrip("'").endswith("touch /root/.supercharged")
+
+def test_docker_init_marker_skips_provision_check(tmp_path):
+    _, container = provision(tmp_path)
+    assert (tmp_path / ".ga_supercharged").read_text() == container.id
+
+    # A restarted agent finds the same container already provisioned without a docker exec
+    client = FakeClient(container)
+    with patch.dict('sys.modules', docker_modules(client)):
         sandbox = DockerSandbox(host_workspace=tmp_path)
-        sandbox._is_container_ready = MagicMock(return_value=True)
+        sandbox.container = container
+        container.calls.clear()
+        with patch.object(sandbox, "_is_container_ready", return_value=True):
+            sandbox.ensure_running()
+    assert container.calls == []
+
+    # A recreated container is checked again
+    container.id = "other-container"
+    sandbox._ready_until = 0
+    with patch.object(sandbox, "_is_container_ready", return_value=True):
         sandbox.ensure_running()
+    assert [c[0] for c in container.calls][0] == "test -f /root/.supercharged"
 
-        # Verify that the correct shell command was used for apt-get
-        exec_calls = mock_container.exec_run.call_args_list
-        
-        apt_call_found = False
-        for call in exec_calls:
-            cmd_arg = call[0][0]
-            if hasattr(cmd_arg, '__contains__') and "apt-get update" in cmd_arg:
-                apt_call_found = True
-                assert cmd_arg.startswith("sh -c 'apt-get update && apt-get install -y")
-        
-        assert apt_call_found, "The apt-get update && install command was not found in exec_run calls"
+def test_docker_init_mounts_pip_cache(tmp_path):
+    client, container = provision(tmp_path)
 
+    # Wheels land in a host directory that outlives the container
+    volumes = client.containers.run_kwargs["volumes"]
+    assert volumes[str(Path.home() / ".cache" / "ghost-agent-pip")] == {"bind": "/root/.cache/pip", "mode": "rw"}
+    script = provision_calls(container)[0][0]
+    assert "--no-cache-dir" not in script
+    # Every pip call in the script resolves against the mounted cache
+    assert script.index("export PIP_CACHE_DIR=/root/.cache/pip") < script.index("pip install")
 
-def test_docker_init_raises_on_apt_fail(tmp_path):
-    mock_client = MagicMock()
-    mock_container = MagicMock()
-    
-    class MockNotFound(Exception): pass
-
-    with patch.dict('sys.modules', {
-        'docker': MagicMock(from_env=MagicMock(return_value=mock_client)),
-        'docker.errors': MagicMock(NotFound=MockNotFound)
-    }):
-        mock_client.containers.get.side_effect = MockNotFound()
-
-        mock_client.containers.run.return_value = mock_container
-        mock_container.status = "running"
-        
-        # Mock apt-get failure
-        def exec_run_side_effect(cmd, **kwargs):
-            if hasattr(cmd, '__contains__'):
-                if "test -f" in cmd:
-                    return (1, b"")
-                elif "apt-get" in cmd:
-                    return (1, b"E: Invalid operation update") # Fail
-            return (0, b"")
-
-        mock_container.exec_run.side_effect = exec_run_side_effect
 
-        sandbox = DockerSandbox(host_workspace=tmp_path)
-        sandbox._is_container_ready = MagicMock(return_value=True)
-        
-        with pytest.raises(Exception, match="System package installation failed: E: Invalid operation update"):
-            sandbox.ensure_running()
+def test_docker_init_raises_on_apt_fail(tmp_path):
+    out = b"__STAGE=apt__\nE: Invalid operation update\n"
+    with pytest.raises(Exception, match="System package installation failed: E: Invalid operation update"):
+        provision(tmp_path, script_result=(10, out))
 
 
 def test_docker_init_raises_on_pip_fail(tmp_path):
-    mock_client = MagicMock()
-    mock_container = MagicMock()
-    
-    class MockNotFound(Exception): pass
-    
-    with patch.dict('sys.modules', {
-        'docker': MagicMock(from_env=MagicMock(return_value=mock_client)),
-        'docker.errors': MagicMock(NotFound=MockNotFound)
-    }):
-        mock_client.containers.get.side_effect = MockNotFound()
-
-        mock_client.containers.run.return_value = mock_container
-        mock_container.status = "running"
-        
-        # Mock pip install failure
-        def exec_run_side_effect(cmd, **kwargs):
-            if hasattr(cmd, '__contains__'):
-                if "test -f" in cmd:
-                    return (1, b"")
-                elif "apt-get" in cmd:
-                    return (0, b"")
-                elif "/etc/sudoers" in cmd:
-                    return (0, b"")
-                elif "pip install" in cmd:
-                    return (1, b"ERROR: Could not find a version...") # Fail
-            return (0, b"")
-
-        mock_container.exec_run.side_effect = exec_run_side_effect
+    out = b"__STAGE=apt__\nReading package lists...\n__STAGE=sudoers__\n__STAGE=pip__\nERROR: Could not find a version...\n"
+    with pytest.raises(Exception, match="Python package installation failed: ERROR: Could not find a version...$"):
+        provision(tmp_path, script_result=(20, out))
 
+def test_docker_init_tor_proxy_installs_pysocks(tmp_path):
+    client, container = provision(tmp_path, tor_proxy="socks5://127.0.0.1:9050")
+
+    # Verify that containers.run was called
+    run_call_kwargs = client.containers.run_kwargs
+    assert run_call_kwargs is not None
+
+    calls = provision_calls(container)
+    assert len(calls) == 1
+    script = calls[0][0]
+    # PySocks is bootstrapped before the main install
+    assert "pip install pysocks requests" in script
+    assert script.index("pysocks requests") < script.index("pip install numpy")
+    # Package installs run without the tor_proxy environment vars
+    assert not calls[0][1].get('environment'), "Install should run without tor_proxy environment vars"
+
+def test_docker_skips_pip_when_image_prebuilt(tmp_path):
+    # Every image is available on the fake client, so ghost-sandbox:latest is used,
+    # and the prebuilt image ships the sentinel file
+    client, container = provision(tmp_path, supercharged=True)
+
+    assert client.containers.run_kwargs["image"] == "ghost-sandbox:latest"
+    assert client.images.pulled == []
+    assert container.commits == []
+    assert provision_calls(container) == []
+
+def test_docker_builds_image_when_missing(tmp_path):
+    container = FakeContainer()
+    # Neither the prebuilt image nor the committed cache exist yet
+    client = FakeClient(container, images={"python:3.11-slim-bookworm"})
+
+    with patch.dict('sys.modules', docker_modules(client)):
         sandbox = DockerSandbox(host_workspace=tmp_path)
-        sandbox._is_container_ready = MagicMock(return_value=True)
-        
-        with pytest.raises(Exception, match="Python package installation failed: ERROR: Could not find a version..."):
+        with patch.object(sandbox, "_is_container_ready", return_value=True):
             sandbox.ensure_running()
 
-def test_docker_init_tor_proxy_installs_pysocks(tmp_path):
-    mock_client = MagicMock()
-    mock_container = MagicMock()
-    
-    class MockNotFound(Exception): pass
-
-    with patch.dict('sys.modules', {
-        'docker': MagicMock(from_env=MagicMock(return_value=mock_client)),
-        'docker.errors': MagicMock(NotFound=MockNotFound)
-    }):
-        mock_client.containers.get.side_effect = MockNotFound()
-
-        mock_client.containers.run.return_value = mock_container
-        mock_container.status = "running"
-        
-        def exec_run_side_effect(cmd, **kwargs):
-            if hasattr(cmd, '__contains__'):
-                if "test -f" in cmd:
-                    return (1, b"")
-                elif "apt-get" in cmd:
-                    return (0, b"")
-                elif "/etc/sudoers" in cmd:
-                    return (0, b"")
-                elif "pip install" in cmd:
-                    return (0, b"")
-                elif "touch" in cmd:
-                    return (0, b"")
-            return (0, b"")
-
-        mock_container.exec_run.side_effect = exec_run_side_effect
-
-        sandbox = DockerSandbox(host_workspace=tmp_path, tor_proxy="socks5://127.0.0.1:9050")
-        sandbox._is_container_ready = MagicMock(return_value=True)
-        sandbox.ensure_running()
-
-        # Verify that containers.run was called
-        run_call_kwargs = mock_client.containers.run.call_args[1]
-        assert run_call_kwargs is not None
-
-        # Verify that the correct shell commands were used
-        exec_calls = mock_container.exec_run.call_args_list
-        
-        pysocks_bootstrap_found = False
-        pip_install_found = False
-        for call in exec_calls:
-            cmd_arg = call[0][0]
-            if hasattr(cmd_arg, '__contains__'):
-                if "pip install --no-cache-dir pysocks requests" in cmd_arg:
-                    pysocks_bootstrap_found = True
-                    # verify it runs without environment variable proxies
-                    assert not call[1].get('environment'), "Bootstrap should run without tor_proxy environment vars"
-                elif "pip install --no-cache-dir numpy" in cmd_arg:
-                    pip_install_found = True
-                    assert not call[1].get('environment'), "Main install should run without tor_proxy environment vars"
-        
-        assert pysocks_bootstrap_found, "The PySocks bootstrap command was not found"
-        assert pip_install_found, "The main pip install command was not found"
+    build_kwargs, = client.images.built
+    assert build_kwargs["tag"] == "ghost-sandbox:latest"
+    assert Path(build_kwargs["path"], build_kwargs["dockerfile"]).exists()
+    assert client.containers.run_kwargs["image"] == "ghost-sandbox:latest"
+    assert client.images.pulled == []
@@ -0,0 +1,41 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+from pathlib import Path
+
+from ghost_agent.sandbox.docker import DockerSandbox
+
+def test_parallel_execs_are_bounded():
+    with patch.dict("sys.modules", {"docker": MagicMock(), "docker.errors": MagicMock()}):
+        sandbox = DockerSandbox(Path("/tmp/workspace"))
+    sandbox.container = MagicMock()
+    sandbox.container.exec_run.return_value = (0, b"")
+    sandbox._exec_slots = threading.BoundedSemaphore(2)
+
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def slow_stream():
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.05)
+        yield (b"done", None)
+        with lock:
+            state["running"] -= 1
+
+    # Exercise the one-exec-per-command path
+    sandbox.persistent_shell = False
+    sandbox._api = MagicMock()
+    sandbox._api.exec_create.return_value = {"Id": "exec-1"}
+    sandbox._api.exec_start.side_effect = lambda *a, **kw: slow_stream()
+    sandbox._api.exec_inspect.return_value = {"ExitCode": 0}
+
+    with patch.object(sandbox, "_is_container_ready", return_value=True):
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(lambda i: sandbox.execute(f"echo {i}"), range(6)))
+
+    assert all(code == 0 for _, code in results)
+    # Overlapping, but never more than the configured number at once
+    assert state["peak"] == 2
@@ -0,0 +1,30 @@
+import pytest
+from unittest.mock import patch
+
+from tests._fakes import make_sandbox
+
+def test_readiness_probe_cached_across_executes(tmp_path):
+    sandbox = make_sandbox(tmp_path)
+
+    exit_codes = {"next": 0}
+    sandbox._api.exec_inspect.side_effect = lambda exec_id: {"ExitCode": exit_codes["next"]}
+
+    with patch.object(sandbox, "_is_container_ready", return_value=True) as ready:
+        for i in range(10):
+            output, code = sandbox.execute(f"echo {i}")
+            assert code == 0
+
+        probes = [c for c in sandbox.container.exec_run.call_args_list if "test -f" in c.args[0]]
+        assert len(probes) == 1
+        assert ready.call_count == 1
+
+        # A failing exec invalidates the cache so the next call re-probes
+        exit_codes["next"] = 1
+        sandbox.execute("false")
+        exit_codes["next"] = 0
+        sandbox.execute("echo after")
+
+        assert ready.call_count == 2
+        # The host-side marker still vouches for this container, so provisioning is not re-checked
+        probes = [c for c in sandbox.container.exec_run.call_args_list if "test -f" in c.args[0]]
+        assert len(probes) == 1
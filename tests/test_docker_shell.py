@@ -0,0 +1,93 @@
+import struct
+import subprocess
+from unittest.mock import MagicMock, patch
+
+from tests._fakes import make_sandbox
+
+def frame(stream, payload):
+    return struct.pack(">BxxxL", stream, len(payload)) + payload
+
+class FakeShellSocket:
+    """Stands in for the attached bash: runs each line locally and replies with multiplexed frames."""
+    def __init__(self):
+        self.lines = []
+        self.pending = bytearray()
+        self.closed = False
+
+    def settimeout(self, t):
+        pass
+
+    def sendall(self, data):
+        line = data.decode()
+        self.lines.append(line)
+        res = subprocess.run(["bash", "-c", line], capture_output=True)
+        # Split output across several small frames like the daemon does
+        for i in range(0, len(res.stdout), 7):
+            self.pending += frame(1, res.stdout[i:i + 7])
+        self.pending += frame(2, res.stderr)
+
+    def recv(self, n):
+        data = bytes(self.pending[:n])
+        del self.pending[:n]
+        return data
+
+    def close(self):
+        self.closed = True
+
+def make_shell_sandbox(workspace):
+    sandbox = make_sandbox(workspace, persistent_shell=True)
+    sandbox._api.exec_create.return_value = {"Id": "shell-1"}
+    sandbox._api.exec_start.side_effect = lambda *a, **kw: MagicMock(_sock=FakeShellSocket())
+    return sandbox
+
+def test_execute_reuses_persistent_shell(tmp_path):
+    sandbox = make_shell_sandbox(tmp_path)
+
+    with patch.object(sandbox, "_is_container_ready", return_value=True):
+        output, code = sandbox.execute("echo 'hello world'")
+        assert (output, code) == ("hello world\n", 0)
+
+        output, code = sandbox.execute("sh -c 'echo out; echo err >&2; exit 3'")
+        assert output == "out\n\n--- STDERR ---\nerr\n"
+        assert code == 3
+
+        # Output containing shell metacharacters is passed through as literal arguments
+        output, code = sandbox.execute("echo '$(whoami); # not a comment'")
+        assert output == "$(whoami); # not a comment\n"
+
+    # One docker exec for the shell, none per command
+    assert sandbox._api.exec_create.call_count == 1
+    args, kwargs = sandbox._api.exec_create.call_args
+    assert args[1] == ["bash"]
+    assert kwargs["stdin"] is True
+    sandbox._api.exec_start.assert_called_once_with("shell-1", socket=True)
+
+def test_shell_replaced_after_protocol_error(tmp_path):
+    sandbox = make_shell_sandbox(tmp_path)
+
+    with patch.object(sandbox, "_is_container_ready", return_value=True):
+        sandbox.execute("echo one")
+        shell = sandbox._shell
+        shell.recv = MagicMock(return_value=b"")  # daemon hung up mid-reply
+
+        output, code = sandbox.execute("echo two")
+        assert code == 1
+        assert "Container Execution Error" in output
+        assert shell.closed and sandbox._shell is None
+
+        output, code = sandbox.execute("echo three")
+        assert (output, code) == ("three\n", 0)
+
+    assert sandbox._api.exec_create.call_count == 2
+
+def test_shell_output_keeps_head_and_tail(tmp_path):
+    sandbox = make_shell_sandbox(tmp_path)
+
+    with patch.object(sandbox, "_is_container_ready", return_value=True), \
+         patch("ghost_agent.sandbox.docker.MAX_EXEC_OUTPUT_BYTES", 1000):
+        output, code = sandbox.execute("sh -c 'echo first; seq 1 5000; echo last'")
+
+    assert code == 0
+    assert output.startswith("first\n1\n")
+    assert output.endswith("5000\nlast\n")
+    assert "bytes omitted" in output
@@ -1,38 +1,23 @@
 import pytest
-import sys
-import os
-from unittest.mock import MagicMock, patch, call
-from pathlib import Path
+from unittest.mock import patch
 
-# Add the src directory to Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 from ghost_agent.sandbox.docker import DockerSandbox
+from tests._fakes import FakeClient, FakeContainer, docker_modules
 
-def test_docker_ensure_running_installs_sudo():
+def test_docker_ensure_running_installs_sudo(tmp_path):
     # Setup
-    host_workspace = Path("/tmp/workspace")
+    host_workspace = tmp_path
     
-    mock_client = MagicMock()
-    mock_container = MagicMock()
-    mock_container.status = "running"
-    
-    def exec_side_effect(cmd, **kwargs):
+    def exec_side_effect(cmd, kwargs):
         if "test -f /root/.supercharged" in cmd:
             return (1, b"") # Return non-zero to trigger installation
         return (0, b"")
         
-    mock_container.exec_run.side_effect = exec_side_effect
+    mock_container = FakeContainer(exec_side_effect)
+    mock_client = FakeClient(mock_container)
     
     # Execute within patch context to prevent global poisoning of imported docker
-    with patch.dict('sys.modules', {'docker': MagicMock(), 'docker.errors': MagicMock()}):
-        import sys
-        
-        sys.modules["docker"].from_env = MagicMock(return_value=mock_client)
-        mock_client.containers.run.return_value = mock_container
-        class MockNotFound(Exception): pass
-        sys.modules["docker.errors"].NotFound = MockNotFound
-        mock_client.containers.get.side_effect = MockNotFound()
-
+    with patch.dict('sys.modules', docker_modules(mock_client)):
         # Instantiate within patched scope
         sandbox = DockerSandbox(host_workspace)
         
@@ -43,13 +28,10 @@ def test_docker_ensure_running_installs_sudo():
             sandbox.ensure_running()
     
     # Verify
-    exec_calls = mock_container.exec_run.call_args_list
-    
     installed_sudo = False
     configured_sudoers = False
     
-    for call_obj in exec_calls:
-        cmd = call_obj[0][0]
+    for cmd, _ in mock_container.calls:
         if "apt-get install -y sudo" in cmd:
             installed_sudo = True
         if "ALL ALL=(ALL) NOPASSWD: ALL" in cmd and "/etc/sudoers" in cmd:
@@ -14,9 +14,9 @@ async def test_tool_download_file_writes_asynchronously():
     
     # Mock httpx client
     with patch("ghost_agent.tools.file_system.curl_requests", None), \
-         patch("ghost_agent.tools.file_system.httpx.AsyncClient") as mock_client_cls:
+         patch("ghost_agent.tools.file_system._get_client") as mock_get_client:
         mock_client = AsyncMock()
-        mock_client_cls.return_value.__aenter__.return_value = mock_client
+        mock_get_client.return_value = mock_client
         
         # Mock stream response
         mock_resp = AsyncMock()
@@ -24,7 +24,8 @@ async def test_tool_download_file_writes_asynchronously():
         mock_resp.headers = {"Content-Length": "100"}
         
         # Mock aiter_bytes to yield chunks
-        async def mock_aiter_bytes():
+        async def mock_aiter_bytes(chunk_size=None):
+            assert chunk_size == 1024 * 1024
             yield b"chunk1"
             yield b"chunk2"
         mock_resp.aiter_bytes = mock_aiter_bytes
@@ -59,13 +60,79 @@ async def test_tool_download_file_writes_asynchronously():
                     # Verify
                     mock_file_handle = m_open()
                     
-                    # Verify to_thread was called for each chunk with write
-                    assert mock_to_thread.call_count == 2
+                    # Small chunks are coalesced into a single threaded write
+                    assert mock_to_thread.call_count == 1
                     
-                    # Inspect calls to ensure the first argument was the write method
-                    # (mock_file_handle.write) and second was the chunk
+                    # Inspect the call to ensure the first argument was the write method
+                    # (mock_file_handle.write) and second was the buffered data
                     calls = mock_to_thread.call_args_list
                     assert calls[0][0][0] == mock_file_handle.write
-                    assert calls[0][0][1] == b"chunk1"
-                    assert calls[1][0][0] == mock_file_handle.write
-                    assert calls[1][0][1] == b"chunk2"
+                    assert calls[0][0][1] == b"chunk1chunk2"
+
+@pytest.mark.asyncio
+async def test_write_chunks_flushes_at_threshold():
+    from ghost_agent.tools import file_system
+    
+    async def chunks():
+        for _ in range(5):
+            yield b"x" * 4
+    
+    f = MagicMock()
+    with patch.object(file_system, "DOWNLOAD_FLUSH_BYTES", 8):
+        await file_system._write_chunks(f, chunks())
+    
+    # Two full buffers plus the tail
+    assert [c.args[0] for c in f.write.call_args_list] == [b"x" * 8, b"x" * 8, b"x" * 4]
+
+@pytest.mark.asyncio
+async def test_download_client_reused_per_proxy():
+    from ghost_agent.tools import file_system
+    
+    with patch.dict(file_system._DOWNLOAD_CLIENTS, clear=True):
+        direct = file_system._get_client(None)
+        assert file_system._get_client(None) is direct
+        tor = file_system._get_client("socks5h://127.0.0.1:9050")
+        assert tor is not direct
+        
+        await file_system._drop_client("socks5h://127.0.0.1:9050")
+        assert tor.is_closed
+        assert file_system._get_client(None) is direct
+        
+        await file_system.close_download_clients()
+        assert direct.is_closed and not file_system._DOWNLOAD_CLIENTS
+
+@pytest.mark.asyncio
+async def test_dropped_client_outlives_open_streams():
+    from ghost_agent.tools import file_system
+    proxy = "socks5h://127.0.0.1:9050"
+    
+    with patch.dict(file_system._DOWNLOAD_CLIENTS, clear=True), patch.dict(file_system._CLIENT_LEASES, clear=True):
+        async with file_system._leased_client(proxy) as first:
+            async with file_system._leased_client(proxy) as second:
+                assert second is first
+                # A Tor retry in one download must not pull the client out from under the other
+                await file_system._drop_client(proxy)
+                assert not first.is_closed
+                assert file_system._get_client(proxy) is not first
+            assert not first.is_closed
+        assert first.is_closed
+        await file_system.close_download_clients()
+
+@pytest.mark.asyncio
+async def test_curl_retry_leaves_pooled_client_alone():
+    from ghost_agent.tools import file_system
+    
+    resp_403 = MagicMock(status_code=403)
+    session = AsyncMock()
+    session.get.return_value = resp_403
+    curl = MagicMock()
+    curl.AsyncSession.return_value.__aenter__.return_value = session
+    
+    with patch.object(file_system, "curl_requests", curl), \
+         patch.object(file_system, "request_new_tor_identity"), \
+         patch.object(file_system, "_drop_client", new_callable=AsyncMock) as mock_drop, \
+         patch("asyncio.sleep", new_callable=AsyncMock):
+        result = await tool_download_file("http://example.com/f", Path("/tmp/sandbox"), "socks5://127.0.0.1:9050", "f")
+    
+    assert "Failed after 3 attempts" in result
+    mock_drop.assert_not_awaited()
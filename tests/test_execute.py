@@ -5,8 +5,11 @@ from ghost_agent.tools.execute import tool_execute
 
 # Mock Sandbox Manager
 class MockSandbox:
+    def __init__(self):
+        self.commands = []
+
     def execute(self, cmd, timeout=None):
-        if "python3 -m black" in cmd: return "reformatted", 0
+        self.commands.append(cmd)
         if "error_script.py" in cmd:
              return 'File "error_script.py", line 2, in <module>\n    x = 1 / 0\nZeroDivisionError: division by zero', 1
         return "Hello World", 0
@@ -29,3 +32,15 @@ print("End")
     assert "DIAGNOSTIC HINT" in result
     assert "Error detected at Line 2" in result
     assert "x = 1 / 0" in result
+
+@pytest.mark.asyncio
+async def test_execute_formats_and_runs_in_one_exec(tmp_path):
+    mock_manager = MockSandbox()
+    
+    result = await tool_execute("hello.py", "print('Hello World')", tmp_path, mock_manager, args=["a b"])
+    
+    assert "Hello World" in result
+    assert len(mock_manager.commands) == 1
+    cmd = mock_manager.commands[0]
+    assert cmd.startswith("sh -c ")
+    assert cmd.index("python3 -m black -q hello.py") < cmd.index("exec python3 -u hello.py")
@@ -21,5 +21,14 @@ async def test_tool_execute_shell_argument_escaping():
         with patch.object(Path, "write_text"), patch("os.chmod"):
              await tool_execute(filename, content, sandbox_dir, sandbox_manager, args=args)
              
-             expected_cmd = "bash script.sh " + shlex.quote(malicious_arg)
+             expected_cmd = shlex.join(["bash", "script.sh", malicious_arg])
              sandbox_manager.execute.assert_called_with(expected_cmd)
+
+@pytest.mark.asyncio
+async def test_tool_execute_quotes_script_path(tmp_path):
+    sandbox_manager = MagicMock()
+    sandbox_manager.execute = MagicMock(return_value=("output", 0))
+    
+    await tool_execute("my scripts/run it.sh", "echo $#", tmp_path, sandbox_manager, args=["a", "b c"])
+    
+    sandbox_manager.execute.assert_called_with("bash 'my scripts/run it.sh' a 'b c'")
@@ -1,5 +1,6 @@
 import pytest
 import asyncio
+import shlex
 from unittest.mock import MagicMock, patch
 from pathlib import Path
 from ghost_agent.tools.execute import tool_execute
@@ -31,8 +32,11 @@ async def test_execute_direct_python():
         
         result = await tool_execute("calc_salary.py", "print('Hello World')", mock_sandbox_dir, mock_sandbox)
         
-        # Verify the command ran directly with python3 -u
-        mock_sandbox.execute.assert_any_call("python3 -u calc_salary.py")
+        # Verify the script ran directly with python3 -u, after black, in a single exec
+        mock_sandbox.execute.assert_called_once()
+        shell, flag, script = shlex.split(mock_sandbox.execute.call_args[0][0])
+        assert (shell, flag) == ("sh", "-c")
+        assert script.endswith("; exec python3 -u calc_salary.py")
         assert "Hello World" in result
 
 @pytest.mark.asyncio
@@ -30,3 +30,14 @@ async def test_execute_sandbox_guard_allows_valid_imports():
         # Assuming the execution mocking bypasses actual shell but returns stdout
         assert "EXIT CODE: 0" in result
         
+
+@pytest.mark.parametrize("content, mod", [
+    ("import os\nimport scratchpad", "scratchpad"),
+    ("from os import knowledge_base", "knowledge_base"),
+    ("from web_search.client import search", "web_search"),
+    ("# !pip install recall\nprint(1)", "recall"),
+])
+@pytest.mark.asyncio
+async def test_execute_sandbox_guard_finds_any_import_form(content, mod):
+    result = await tool_execute("test.py", content, "mock_dir", MagicMock())
+    assert f"FORBIDDEN IMPORT DETECTED -> '{mod}'" in result
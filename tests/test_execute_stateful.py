@@ -4,15 +4,32 @@ from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 from ghost_agent.tools.execute import tool_execute
+from ghost_agent.sandbox.session_host import UNAVAILABLE_EXIT, UNAVAILABLE_MARKER
+
+@pytest.mark.asyncio
+async def test_tool_execute_stateful_runs_in_session_host(tmp_path):
+    sandbox_manager = MagicMock()
+    sandbox_manager.execute.return_value = ("10\n", 0)
+    original_code = "x = 10\nprint(x)"
+
+    result = await tool_execute("test_script.py", original_code, tmp_path, sandbox_manager, stateful=True, args=["a b"])
+
+    assert "EXIT CODE: 0" in result
+    # The script is written as-is and handed to the persistent interpreter
+    assert (tmp_path / "test_script.py").read_text() == original_code
+    assert (tmp_path / ".ghost_session.py").exists()
+    cmd = sandbox_manager.execute.call_args[0][0]
+    assert cmd.endswith("exec python3 -u .ghost_session.py test_script.py '\"'\"'a b'\"'\"''")
 
 @pytest.mark.asyncio
 async def test_tool_execute_stateful_wrapper():
     """
-    Test that the tool_execute properly injects the dill wrapper
-    when stateful=True and the file is a python script.
+    Test that the tool_execute falls back to the dill wrapper
+    when the session host is unavailable in the sandbox.
     """
     sandbox_dir = Path("/tmp/workspace")
     sandbox_manager = MagicMock()
+    sandbox_manager.execute.side_effect = [(UNAVAILABLE_MARKER, UNAVAILABLE_EXIT), ("output", 0)]
     
     # We mock out the actual execution and file operations
     with patch("ghost_agent.tools.execute._get_safe_path") as mock_safe_path, \
@@ -31,7 +48,7 @@ async def test_tool_execute_stateful_wrapper():
             elif func == mock_path.parent.mkdir:
                 return None
             elif func == sandbox_manager.execute:
-                return ("output", 0)
+                return func(*args)
             return None
             
         mock_to_thread.side_effect = mock_to_thread_impl
@@ -56,3 +73,5 @@ async def test_tool_execute_stateful_wrapper():
         assert original_code in written_content
         assert "# --- AGENT CODE START ---" in written_content
         assert "# --- AGENT CODE END ---" in written_content
+        assert sandbox_manager.execute.call_args[0][0] == "python3 -u test_script.py"
+        assert "output" in result
@@ -1,137 +1,130 @@
+import asyncio
 import pytest
-from unittest.mock import AsyncMock, patch, MagicMock
-import sys
+from unittest.mock import AsyncMock, MagicMock
 import httpx
 
 from src.ghost_agent.core.llm import LLMClient
 from src.ghost_agent.main import parse_args
 from src.ghost_agent.utils.logging import Icons
 
-@pytest.mark.asyncio
-async def test_llm_client_swarm_success():
-    client = LLMClient(
-        upstream_url="http://ghost:8088", 
-        swarm_nodes=[{"url": "http://node1:8088", "model": "qwen"}]
-    )
-    
-    mock_response = MagicMock()
-    mock_response.json.return_value = {"choices": [{"message": {"content": "swarm reply"}}]}
-    mock_response.raise_for_status = MagicMock()
-    mock_swarm_post = AsyncMock(return_value=mock_response)
-    
-    # We have one swarm client
-    client.swarm_clients[0]["client"].post = mock_swarm_post
-    
-    mock_main_post = AsyncMock()
-    client.http_client.post = mock_main_post
-    
-    with patch("src.ghost_agent.core.llm.pretty_log") as mock_log:
-        resp = await client.chat_completion({"model": "qwen", "prompt": "hello"}, use_swarm=True)
-        
-        assert resp == {"choices": [{"message": {"content": "swarm reply"}}]}
-        mock_swarm_post.assert_called_once()
-        mock_main_post.assert_not_called()
-        
-    await client.close()
+NODE_1 = {"url": "http://node1:8088", "model": "llama-3-8b"}
+NODE_2 = {"url": "http://node2:8088", "model": "qwen-coder-32b"}
+
+def fake_http_client(base_url):
+    # Specced stand-in: post/aclose come out as AsyncMocks and no pools or SSL contexts are built
+    return MagicMock(spec=httpx.AsyncClient, base_url=base_url)
+
+def silent(*args, **kwargs):
+    pass
+
+def reply(content):
+    response = MagicMock()
+    response.json.return_value = {"choices": [{"message": {"content": content}}]}
+    return response
+
+@pytest.fixture(scope="module")
+def swarm_client():
+    # One client for the module; each test swaps in its own post mocks
+    client = LLMClient(upstream_url="http://ghost:8088", swarm_nodes=[NODE_1, NODE_2], client_factory=fake_http_client, log_fn=silent)
+    yield client
+    asyncio.run(client.close())
 
+@pytest.mark.parametrize("qwen_node_post, expected", [
+    # The model-matched node answers directly
+    (AsyncMock(return_value=reply("swarm reply")), "swarm reply"),
+    # Every swarm node fails, so the main upstream answers
+    (AsyncMock(side_effect=httpx.TimeoutException("Timeout")), "main reply"),
+])
 @pytest.mark.asyncio
-async def test_llm_client_swarm_fallback():
-    # Test that it falls back to the main client if swarm nodes fail
-    client = LLMClient(
-        upstream_url="http://ghost:8088", 
-        swarm_nodes=[
-            {"url": "http://node1:8088", "model": "qwen"},
-            {"url": "http://node2:8088", "model": "llama"}
-        ]
-    )
+async def test_llm_client_swarm_routing(swarm_client, monkeypatch, qwen_node_post, expected):
+    qwen_node_post.reset_mock()
+    llama_node_post = AsyncMock(side_effect=httpx.ConnectError("Connection Error"))
+    main_post = AsyncMock(return_value=reply("main reply"))
+    monkeypatch.setattr(swarm_client.swarm_clients[0]["client"], "post", llama_node_post)
+    monkeypatch.setattr(swarm_client.swarm_clients[1]["client"], "post", qwen_node_post)
+    monkeypatch.setattr(swarm_client.http_client, "post", main_post)
     
-    mock_swarm_post_1 = AsyncMock(side_effect=httpx.ConnectError("Connection Error"))
-    mock_swarm_post_2 = AsyncMock(side_effect=httpx.TimeoutException("Timeout"))
+    resp = await swarm_client.chat_completion({"model": "qwen", "prompt": "hello"}, use_swarm=True)
     
-    client.swarm_clients[0]["client"].post = mock_swarm_post_1
-    client.swarm_clients[1]["client"].post = mock_swarm_post_2
-    
-    mock_main_response = MagicMock()
-    mock_main_response.json.return_value = {"choices": [{"message": {"content": "main reply"}}]}
-    mock_main_response.raise_for_status = MagicMock()
-    mock_main_post = AsyncMock(return_value=mock_main_response)
-    client.http_client.post = mock_main_post
-    
-    with patch("src.ghost_agent.core.llm.pretty_log") as mock_log:
-        resp = await client.chat_completion({"model": "qwen", "prompt": "hello"}, use_swarm=True)
-        assert resp == {"choices": [{"message": {"content": "main reply"}}]}
-        
+    assert resp == {"choices": [{"message": {"content": expected}}]}
+    qwen_node_post.assert_called_once()
+    if expected == "swarm reply":
+        llama_node_post.assert_not_called()
+        main_post.assert_not_called()
+    else:
         # It should try both swarm nodes before falling back to main
-        assert mock_swarm_post_1.call_count == 1
-        assert mock_swarm_post_2.call_count == 1
-        mock_main_post.assert_called_once()    
-        
-    await client.close()
+        llama_node_post.assert_called_once()
+        main_post.assert_called_once()
 
-@pytest.mark.asyncio
-async def test_llm_client_swarm_partial_match():
+def test_llm_client_swarm_partial_match(swarm_client, monkeypatch):
     # Test that get_swarm_node returns correct node based on target_model
-    client = LLMClient(
-        upstream_url="http://ghost:8088", 
-        swarm_nodes=[
-            {"url": "http://node1:8088", "model": "llama-3-8b"},
-            {"url": "http://node2:8088", "model": "qwen-coder-32b"}
-        ]
-    )
-    
-    node = client.get_swarm_node("qwen")
+    node = swarm_client.get_swarm_node("qwen")
     assert node["model"] == "qwen-coder-32b"
     assert node["url"] == "http://node2:8088"
     
-    node = client.get_swarm_node("llama")
+    node = swarm_client.get_swarm_node("llama")
     assert node["model"] == "llama-3-8b"
     assert node["url"] == "http://node1:8088"
     
     # If not found, it should do round robin
-    node_a = client.get_swarm_node("unknown")
-    node_b = client.get_swarm_node("unknown")
+    monkeypatch.setattr(swarm_client, "_swarm_index", 0)
+    node_a = swarm_client.get_swarm_node("unknown")
+    node_b = swarm_client.get_swarm_node("unknown")
     
     assert node_a["url"] == "http://node1:8088"
     assert node_b["url"] == "http://node2:8088"
-    
-    await client.close()
 
 @pytest.mark.asyncio
 async def test_llm_client_swarm_empty_fallback():
     # Test that it falls back to the main client seamlessly if no swarm nodes are provided
     client = LLMClient(
         upstream_url="http://ghost:8088", 
-        swarm_nodes=[]
+        swarm_nodes=[],
+        client_factory=fake_http_client,
+        log_fn=silent
     )
     
-    mock_main_response = MagicMock()
-    mock_main_response.json.return_value = {"choices": [{"message": {"content": "main reply"}}]}
-    mock_main_response.raise_for_status = MagicMock()
-    mock_main_post = AsyncMock(return_value=mock_main_response)
+    mock_main_post = AsyncMock(return_value=reply("main reply"))
     client.http_client.post = mock_main_post
     
-    with patch("src.ghost_agent.core.llm.pretty_log") as mock_log:
-        resp = await client.chat_completion({"model": "qwen", "prompt": "hello"}, use_swarm=True)
-        assert resp == {"choices": [{"message": {"content": "main reply"}}]}
-        
-        mock_main_post.assert_called_once()    
-        
-    await client.close()
+    resp = await client.chat_completion({"model": "qwen", "prompt": "hello"}, use_swarm=True)
+    assert resp == {"choices": [{"message": {"content": "main reply"}}]}
+    
+    mock_main_post.assert_called_once()
 
-def test_parse_args_swarm_nodes():
-    test_args = ["main.py", "--swarm-nodes", "http://node1:8088|qwen,http://node2:8080|llama,http://node3:8088"]
-    with patch.object(sys, 'argv', test_args):
-        args = parse_args()
-        assert len(args.swarm_nodes_parsed) == 3
-        assert args.swarm_nodes_parsed[0]["url"] == "http://node1:8088"
-        assert args.swarm_nodes_parsed[0]["model"] == "qwen"
-        assert args.swarm_nodes_parsed[1]["url"] == "http://node2:8080"
-        assert args.swarm_nodes_parsed[1]["model"] == "llama"
-        assert args.swarm_nodes_parsed[2]["url"] == "http://node3:8088"
-        assert args.swarm_nodes_parsed[2]["model"] == "default"
+@pytest.mark.asyncio
+async def test_llm_client_swarm_cancellation_propagates():
+    # Cancelling the caller mid swarm attempt must not read as a node failure and move on to the next node
+    client = LLMClient(upstream_url="http://ghost:8088", swarm_nodes=[NODE_1, NODE_2], client_factory=fake_http_client, log_fn=silent)
+    entered = asyncio.Event()
+    async def hang(*args, **kwargs):
+        entered.set()
+        await asyncio.sleep(10)
+    client.swarm_clients[0]["client"].post = AsyncMock(side_effect=hang)
+    client.swarm_clients[1]["client"].post = AsyncMock(side_effect=hang)
+    client.http_client.post = AsyncMock(return_value=reply("main reply"))
+    
+    call = asyncio.create_task(client.chat_completion({"model": "llama", "prompt": "hello"}, use_swarm=True))
+    await asyncio.wait_for(entered.wait(), 1.0)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    
+    client.swarm_clients[1]["client"].post.assert_not_called()
+    client.http_client.post.assert_not_called()
+    await client.close()
 
-def test_parse_args_swarm_nodes_empty():
-    test_args = ["main.py"]
-    with patch.object(sys, 'argv', test_args):
-        args = parse_args()
-        assert args.swarm_nodes_parsed == []
+@pytest.mark.parametrize("argv, expected", [
+    (
+        ["--swarm-nodes", "http://node1:8088|qwen,http://node2:8080|llama,http://node3:8088"],
+        [
+            {"url": "http://node1:8088", "model": "qwen"},
+            {"url": "http://node2:8080", "model": "llama"},
+            {"url": "http://node3:8088", "model": "default"},
+        ],
+    ),
+    ([], []),
+])
+def test_parse_args_swarm_nodes(argv, expected):
+    args = parse_args(argv)
+    assert args.swarm_nodes_parsed == expected
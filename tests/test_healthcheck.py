@@ -1,12 +1,7 @@
-
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
-import sys
 import os
 
-# Ensure the src directory is in the python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
-
 from ghost_agent.tools.system import tool_check_health
 
 @pytest.fixture
@@ -1,8 +1,32 @@
 import pytest
 import asyncio
 import datetime
-from unittest.mock import MagicMock, AsyncMock, patch
+from types import SimpleNamespace
+from unittest.mock import DEFAULT, MagicMock, AsyncMock, patch, create_autospec
 from ghost_agent.main import idle_dream_watchdog
+from ghost_agent.core.agent import GhostContext
+from ghost_agent.memory.vector import VectorMemory
+
+NOW = datetime.datetime(2025, 1, 1, 12, 0, 0)
+
+class FrozenDateTime(datetime.datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW
+
+@pytest.fixture(autouse=True)
+def frozen_clock():
+    # main only reads the clock through datetime.datetime.now(); pin it so idle maths is exact
+    with patch("ghost_agent.main.datetime", SimpleNamespace(datetime=FrozenDateTime, timedelta=datetime.timedelta)):
+        yield
+
+def make_context(idle_minutes):
+    # A real context plus a specced memory system: attribute typos fail instead of minting child mocks
+    context = GhostContext(SimpleNamespace(model="default"), sandbox_dir=None, memory_dir=None, tor_proxy=None)
+    context.memory_system = create_autospec(VectorMemory, instance=True)
+    context.memory_system.collection = MagicMock(spec=["get"])
+    context.last_activity_time = NOW - datetime.timedelta(minutes=idle_minutes)
+    return context
 
 @pytest.mark.asyncio
 async def test_idle_dream_watchdog_no_context():
@@ -14,11 +38,8 @@ async def test_idle_dream_watchdog_no_context():
 @pytest.mark.asyncio
 async def test_idle_dream_watchdog_not_idle_enough():
     """Test that dream doesn't trigger if less than 15 mins idle."""
-    mock_context = MagicMock()
-    mock_context.memory_system = MagicMock()
-    
     # Only 5 minutes idle
-    mock_context.last_activity_time = datetime.datetime.now() - datetime.timedelta(minutes=5)
+    mock_context = make_context(idle_minutes=5)
     
     with patch("ghost_agent.main.GLOBAL_CONTEXT", mock_context):
         await idle_dream_watchdog()
@@ -28,9 +49,7 @@ async def test_idle_dream_watchdog_not_idle_enough():
 @pytest.mark.asyncio
 async def test_idle_dream_watchdog_triggers_dream():
     """Test that dream triggers given enough idle time and memory entropy."""
-    mock_context = MagicMock()
-    mock_context.memory_system = MagicMock()
-    mock_context.last_activity_time = datetime.datetime.now() - datetime.timedelta(minutes=20)
+    mock_context = make_context(idle_minutes=20)
     
     # Mock memory DB response with 3 items (enough entropy)
     mock_context.memory_system.collection.get.return_value = {"ids": ["1", "2", "3"]}
@@ -47,7 +66,7 @@ async def test_idle_dream_watchdog_triggers_dream():
     with patch("ghost_agent.main.GLOBAL_CONTEXT", mock_context), \
          patch("asyncio.to_thread", side_effect=mock_to_thread), \
          patch("random.random", return_value=0.1), \
-         patch("ghost_agent.core.dream.Dreamer", MockDreamer, create=True):
+         patch("ghost_agent.core.dream.Dreamer", MockDreamer):
              
         await idle_dream_watchdog()
         
@@ -59,9 +78,10 @@ async def test_idle_dream_watchdog_triggers_dream():
         assert mock_dreamer_instance.dream.called
         
         # Verify activity time was reset
-        assert (datetime.datetime.now() - mock_context.last_activity_time).total_seconds() < 5
+        assert mock_context.last_activity_time == NOW
 
-@pytest.mark.asyncio
+# lifespan swaps the app-wide globals and clients in and out; give it a loop of its own
+@pytest.mark.asyncio(loop_scope="function")
 async def test_lifespan_adds_dream_job():
     """Test that lifespan adds the idle_dream_monitor job to the scheduler."""
     from ghost_agent.main import lifespan, idle_dream_watchdog
@@ -72,21 +92,14 @@ async def test_lifespan_adds_dream_job():
     mock_context = MagicMock()
     mock_app.state.context = mock_context
     
-    with patch("ghost_agent.main.GLOBAL_CONTEXT", None), \
-         patch("ghost_agent.main.GLOBAL_AGENT", None), \
-         patch("ghost_agent.main.LLMClient") as MockLLMClient, \
-         patch("ghost_agent.main.importlib.util.find_spec", return_value=False), \
-         patch("ghost_agent.main.ProfileMemory"), \
-         patch("ghost_agent.main.AsyncIOScheduler") as MockScheduler, \
-         patch("ghost_agent.main.GhostAgent"), \
-         patch("ghost_agent.main.SQLAlchemyJobStore"):
+    # autospec builds each class's mock once from its signature; async methods like close() come out awaitable
+    with patch.multiple("ghost_agent.main", GLOBAL_CONTEXT=None, GLOBAL_AGENT=None), \
+         patch.multiple("ghost_agent.main", autospec=True,
+                        LLMClient=DEFAULT, ProfileMemory=DEFAULT, AsyncIOScheduler=DEFAULT,
+                        GhostAgent=DEFAULT, SQLAlchemyJobStore=DEFAULT) as mocks, \
+         patch("ghost_agent.main.importlib.util.find_spec", return_value=False):
              
-        mock_scheduler_instance = MagicMock()
-        MockScheduler.return_value = mock_scheduler_instance
-        
-        mock_llm_instance = MagicMock()
-        mock_llm_instance.close = AsyncMock()
-        MockLLMClient.return_value = mock_llm_instance
+        mock_scheduler_instance = mocks["AsyncIOScheduler"].return_value
         
         # Test the lifespan context manager
         async with lifespan(mock_app):
@@ -7,18 +7,13 @@ from ghost_agent.tools.memory import tool_gain_knowledge
 
 @pytest.fixture
 def mock_vector_memory():
-    memory_dir = MagicMock()
-    memory_dir.exists.return_value = True
-    upstream_url = "http://localhost:11434"
-    
-    with pytest.MonkeyPatch.context() as m:
-        m.setattr("ghost_agent.memory.vector.VectorMemory.__init__", lambda self, a, b, c=None: None)
-        vm = VectorMemory(memory_dir, upstream_url)
-        vm.collection = MagicMock()
-        vm.library_file = MagicMock()
-        # Mock ingest_document to return success
-        vm.ingest_document = MagicMock(return_value=(True, "Success"))
-        return vm
+    # Skip __init__ (chroma client, embedder) by allocating the instance directly; no patching to undo
+    vm = VectorMemory.__new__(VectorMemory)
+    vm.collection = MagicMock()
+    vm.library_file = MagicMock()
+    # Mock ingest_document to return success
+    vm.ingest_document = MagicMock(return_value=(True, "Success"))
+    return vm
 
 def test_ingest_document_enrichment(mock_vector_memory):
     # Test that chunks are enriched with source filename
@@ -26,36 +21,35 @@ def test_ingest_document_enrichment(mock_vector_memory):
     chunks = ["chunk1", "chunk2"]
     
     # Restore the real ingest_document method for this test, but mock collection
-    with pytest.MonkeyPatch.context() as m:
-        # We need to bind the real method to the mock object
-        # Using a trick: define a simple wrapper or just import the class and use the unbound method
-        from ghost_agent.memory.vector import VectorMemory as RealVectorMemory
-        
-        # Bind the real method to our mock instance
-        mock_vector_memory.ingest_document = RealVectorMemory.ingest_document.__get__(mock_vector_memory, RealVectorMemory)
-        
-        # Initialize mock_vector_memory.collection.upsert
-        mock_vector_memory.collection.upsert = MagicMock()
-        mock_vector_memory._update_library_index = MagicMock()
-        mock_vector_memory.get_library = MagicMock(return_value=[]) 
-        
-        # Run ingest
-        mock_vector_memory.ingest_document(filename, chunks)
-        
-        # Check upsert call
-        # upsert(documents=..., metadatas=..., ids=...)
-        call_args = mock_vector_memory.collection.upsert.call_args
-        assert call_args, "Upsert was not called"
-        
-        documents = call_args.kwargs['documents']
-        
-        # Verify enrichment
-        assert documents[0] == f"[Source: {filename}]\nchunk1"
-        assert documents[1] == f"[Source: {filename}]\nchunk2"
+    # We need to bind the real method to the mock object
+    # Using a trick: define a simple wrapper or just import the class and use the unbound method
+    from ghost_agent.memory.vector import VectorMemory as RealVectorMemory
+    
+    # Bind the real method to our mock instance
+    mock_vector_memory.ingest_document = RealVectorMemory.ingest_document.__get__(mock_vector_memory, RealVectorMemory)
+    
+    # Initialize mock_vector_memory.collection.upsert
+    mock_vector_memory.collection.upsert = MagicMock()
+    mock_vector_memory._update_library_index = MagicMock()
+    mock_vector_memory.get_library = MagicMock(return_value=[]) 
+    
+    # Run ingest
+    mock_vector_memory.ingest_document(filename, chunks)
+    
+    # Check upsert call
+    # upsert(documents=..., metadatas=..., ids=...)
+    call_args = mock_vector_memory.collection.upsert.call_args
+    assert call_args, "Upsert was not called"
+    
+    documents = call_args.kwargs['documents']
+    
+    # Verify enrichment
+    assert documents[0] == f"[Source: {filename}]\nchunk1"
+    assert documents[1] == f"[Source: {filename}]\nchunk2"
 
 @pytest.mark.asyncio
 async def test_tool_gain_knowledge_calls_ingest_async(mock_vector_memory):
-    # Test that tool_gain_knowledge uses asyncio.to_thread(memory_system.ingest_document, ...)
+    # Test that tool_gain_knowledge runs memory_system.ingest_document inside its single to_thread call
     
     # Mock inputs
     filename = "test_doc.txt"
@@ -85,28 +79,15 @@ async def test_tool_gain_knowledge_calls_ingest_async(mock_vector_memory):
             
             # Mock asyncio.to_thread
             with patch("asyncio.to_thread", new_callable=AsyncMock) as mock_to_thread:
-                # to_thread is called twice:
-                # 1. _extract_text -> returns str
-                # 2. ingest_document -> returns (True, "Success")
-                
+                # Extraction, splitting and ingest_document share a single worker hop
                 async def side_effect(func, *args, **kwargs):
-                    if func.__name__ == "_extract_text":
-                        return "Mocked File Content"
-                    elif func == mock_vector_memory.ingest_document:
-                         return (True, "Success")
-                    return None
+                    return func(*args, **kwargs)
                     
                 mock_to_thread.side_effect = side_effect
                 
-                await tool_gain_knowledge(filename, sandbox_dir, mock_vector_memory)
-                
-                # Check if to_thread was called with ingest_document
-                found_call = False
-                for call in mock_to_thread.call_args_list:
-                    if call.args and call.args[0] == mock_vector_memory.ingest_document:
-                        assert call.args[1] == filename
-                        assert call.args[2] == ["chunk1", "chunk2"]
-                        found_call = True
-                        break
+                result = await tool_gain_knowledge(filename, sandbox_dir, mock_vector_memory)
                 
-                assert found_call, "Did not call ingest_document via to_thread"
+                assert result == f"SUCCESS: Ingested '{filename}'."
+                mock_to_thread.assert_awaited_once()
+                assert mock_to_thread.call_args.args[0].__name__ == "_extract_and_ingest"
+                mock_vector_memory.ingest_document.assert_called_once_with(filename, ["chunk1", "chunk2"])
@@ -25,6 +25,7 @@ def mock_agent():
     context.scratchpad = MagicMock()
     context.scratchpad.list_all.return_value = ""
     context.scheduler = None 
+    context.cached_sandbox_state_expiry = float("inf")
     
     agent = GhostAgent(context)
     return agent
@@ -3,14 +3,16 @@ import pytest
 import asyncio
 from pathlib import Path
 from unittest.mock import MagicMock, patch
-from ghost_agent.tools.file_system import tool_list_files
+from ghost_agent.tools.file_system import tool_list_files, _python_signatures, LIST_FILES_MAX_LINES
 
-@pytest.fixture
-def mock_sandbox(tmp_path):
-    (tmp_path / "file1.txt").write_text("content")
-    (tmp_path / "subdir").mkdir()
-    (tmp_path / ".hidden").touch()
-    return tmp_path
+@pytest.fixture(scope="module")
+def mock_sandbox(tmp_path_factory):
+    # One skeleton for the whole module; tests only add files and assert on presence, so they can share it
+    p = tmp_path_factory.mktemp("sandbox")
+    (p / "file1.txt").write_text("content")
+    (p / "subdir").mkdir()
+    (p / ".hidden").touch()
+    return p
 
 @pytest.mark.asyncio
 async def test_tool_list_files_formatting(mock_sandbox):
@@ -83,3 +85,35 @@ def another_func(x, y):
     result_nested = await tool_list_files(mock_sandbox)
     assert "  subdir/nested.py  [def nested_main()]" in result_nested
 
+
+@pytest.mark.asyncio
+async def test_tool_list_files_reparses_only_changed_files(mock_sandbox):
+    """Unchanged Python files reuse their cached signatures on the next listing."""
+    (mock_sandbox / "a.py").write_text("def a(): pass")
+    (mock_sandbox / "b.py").write_text("def b(): pass")
+    await tool_list_files(mock_sandbox)
+    
+    misses = _python_signatures.cache_info().misses
+    result = await tool_list_files(mock_sandbox)
+    assert _python_signatures.cache_info().misses == misses
+    assert "  a.py  [def a()]" in result
+    
+    # Editing a file changes its size/mtime key, so only that file is parsed again
+    (mock_sandbox / "b.py").write_text("def b(): pass\nclass B: pass")
+    result = await tool_list_files(mock_sandbox)
+    assert _python_signatures.cache_info().misses == misses + 1
+    assert "  b.py  [def b(), class B]" in result
+
+@pytest.mark.asyncio
+async def test_tool_list_files_stops_at_line_cap(tmp_path):
+    """Files past the listing cap are neither shown nor parsed."""
+    for i in range(LIST_FILES_MAX_LINES + 50):
+        (tmp_path / f"m{i:03d}.py").write_text(f"def f{i}(): pass")
+    
+    with patch("ghost_agent.tools.file_system._python_signatures", return_value=()) as sigs:
+        result = await tool_list_files(tmp_path)
+    
+    assert sigs.call_count == LIST_FILES_MAX_LINES
+    assert f"  m{LIST_FILES_MAX_LINES - 1:03d}.py" in result
+    assert f"  m{LIST_FILES_MAX_LINES:03d}.py" not in result
+    assert result.count("... [Truncated for length]") == 1
@@ -1,21 +1,61 @@
 
+import hashlib
+import math
+import re
 import pytest
-import shutil
-from pathlib import Path
+from unittest.mock import patch
+from chromadb.api.types import EmbeddingFunction
 from ghost_agent.memory.vector import VectorMemory
 
-@pytest.fixture
-def memory_system(tmp_path):
-    # Setup - use pytest's tmp_path which is unique per test function
-    mem_dir = tmp_path / "memory_db"
-    mem_dir.mkdir()
+class BagOfWordsEmbedding(EmbeddingFunction):
+    """
+    Deterministic stand-in for all-MiniLM-L6-v2: each word is hashed into one of DIMS buckets and the
+    vector is L2-normalised, so texts sharing more words sit closer. Cheap, offline, and close enough
+    for the distance thresholds these tests exercise.
+    """
+    DIMS = 256
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __call__(self, input):
+        return [self._embed(text) for text in input]
+
+    def _embed(self, text):
+        vec = [0.0] * self.DIMS
+        for word in re.findall(r"[a-z0-9']+", text.lower()):
+            bucket = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "big") % self.DIMS
+            vec[bucket] += 1.0
+        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+        return [v / norm for v in vec]
+
+    @staticmethod
+    def name():
+        return "ghost-test-bag-of-words"
+
+    def get_config(self):
+        return {}
+
+    @staticmethod
+    def build_from_config(config):
+        return BagOfWordsEmbedding()
+
+@pytest.fixture(scope="module")
+def memory_system(tmp_path_factory):
+    # One store per module, embedded by the stub instead of downloading and running the real model
+    mem_dir = tmp_path_factory.mktemp("memory_db_shared")
     
     # Initialize Memory (using Mock URL since we can't hit real LLM in tests usually)
-    mem = VectorMemory(mem_dir, "http://mock-url")
+    with patch("chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction", BagOfWordsEmbedding):
+        mem = VectorMemory(mem_dir, "http://mock-url")
     yield mem
-    
-    # Teardown handled by pytest's tmp_path cleanup, but we can reset if needed
-    # mem.client.reset() 
+
+@pytest.fixture(autouse=True)
+def empty_collection(memory_system):
+    # Tests count and query the whole collection, so each starts from an empty one
+    ids = memory_system.collection.get()["ids"]
+    if ids:
+        memory_system.collection.delete(ids=ids)
 
 
 def test_memory_add_and_retrieve(memory_system):
@@ -53,18 +93,14 @@ def test_smart_update_replacement(memory_system):
     
     # Exact meaning, slight wording change -> Should replace
     fact_b = "My favorite color is actually blue." 
-    # Note: SentenceTransformers are sensitive. 0.2 is very tight. 
-    # This test might reveal if 0.2 is TOO tight (i.e. we don't update when we should).
+    # One extra word out of six keeps the stub's distance (~0.17) under smart_update's 0.20 cutoff
     
     memory_system.smart_update(fact_b, "pref")
     
     results = memory_system.collection.get()
-    # If replaced, we have 1 item. If not, 2.
-    # Ideally for "correction" we want replacement.
-    # But safety is priority.
+    # Near-identical wording replaces the old entry instead of adding a second one
+    assert results["documents"] == [fact_b]
     
-    # Let's perform a query
-    query = memory_system.search("favorite color", inject_identity=False)
-    print(f"DEBUG RESULTS: {query}")
-    # We assert that we at least have the latest info
+    # Searching with the old wording now surfaces the latest info
+    query = memory_system.search(fact_a, inject_identity=False)
     assert "actually blue" in query
@@ -5,18 +5,11 @@ from ghost_agent.memory.vector import VectorMemory
 
 @pytest.fixture
 def mock_vector_memory():
-    # Mock dependencies
-    memory_dir = MagicMock()
-    memory_dir.exists.return_value = True
-    upstream_url = "http://localhost:11434"
-    
-    # Patch the __init__ to avoid ChromaDB setup
-    with pytest.MonkeyPatch.context() as m:
-        m.setattr("ghost_agent.memory.vector.VectorMemory.__init__", lambda self, a, b, c=None: None)
-        vm = VectorMemory(memory_dir, upstream_url)
-        vm.collection = MagicMock()
-        vm.library_file = MagicMock()
-        return vm
+    # Skip __init__ (chroma client, embedder) by allocating the instance directly; no patching to undo
+    vm = VectorMemory.__new__(VectorMemory)
+    vm.collection = MagicMock()
+    vm.library_file = MagicMock()
+    return vm
 
 def test_search_sorting_order(mock_vector_memory):
     # Setup mock return values for collection.query
@@ -17,6 +17,7 @@ def agent():
     context.memory_system = MagicMock()
     context.profile_memory = MagicMock()
     context.profile_memory.get_context_string.return_value = ""
+    context.cached_sandbox_state_expiry = float("inf")
     
     agent = GhostAgent(context)
     # Mock available tools
@@ -1,23 +1,42 @@
 
 import pytest
 import datetime
+import json
+from types import SimpleNamespace
 from unittest.mock import MagicMock, AsyncMock, patch
-from ghost_agent.core.agent import GhostAgent as Agent
+from ghost_agent.core.agent import GhostAgent as Agent, GhostContext
 from ghost_agent.core.planning import TaskStatus
 
+# A plan whose root task is already DONE; built once at import
+_DONE_PLAN_JSON = json.dumps({
+    "thought": "The task is finished.",
+    "tree_update": {
+        "root_id": "root-123",
+        "nodes": {
+            "root-123": {
+                "id": "root-123",
+                "description": "Main Task",
+                "status": "DONE", # <--- SIGNAL DONE
+                "children": []
+            }
+        }
+    },
+    "next_action_id": "root-123"
+})
+_DONE_PLAN_RESPONSE = {"choices": [{"message": {"content": f"```json\n{_DONE_PLAN_JSON}\n```"}}]}
+
 @pytest.fixture
 def mock_context():
-    context = MagicMock()
-    context.profile_memory = MagicMock()
-    context.memory_system = MagicMock()
-    context.skill_memory = MagicMock()
-    context.llm_client = MagicMock()
-    context.args = MagicMock()
-    context.args.max_context = 8000
-    context.args.temperature = 0.5
-    context.args.use_planning = True
-    context.scratchpad = MagicMock()
-    context.scratchpad.list_all.return_value = "No Data"
+    # A real context holding plain namespaces; only chat_completion needs a mock, for its call_count
+    context = GhostContext(
+        SimpleNamespace(max_context=8000, temperature=0.5, use_planning=True, smart_memory=0.0),
+        sandbox_dir="/tmp/sandbox", memory_dir=None, tor_proxy=None,
+    )
+    context.profile_memory = SimpleNamespace(get_context_string=lambda: "")
+    context.memory_system = SimpleNamespace(search=lambda *a, **k: "")
+    context.skill_memory = SimpleNamespace(get_playbook_context=lambda **k: "")
+    context.llm_client = SimpleNamespace(chat_completion=AsyncMock())
+    context.scratchpad = SimpleNamespace(list_all=lambda: "No Data")
     return context
 
 @pytest.mark.asyncio
@@ -32,36 +51,7 @@ async def test_planner_signals_completion_terminates_loop(mock_context):
         mock_to_thread.return_value = "Mock Content"
         
         # 1. Setup LLM to return a plan that is DONE
-        # We need a plan that sets the root task to DONE
-        done_plan_json = {
-            "thought": "The task is finished.",
-            "tree_update": {
-                "root_id": "root-123",
-                "nodes": {
-                    "root-123": {
-                        "id": "root-123",
-                        "description": "Main Task",
-                        "status": "DONE", # <--- SIGNAL DONE
-                        "children": []
-                    }
-                }
-            },
-            "next_action_id": "root-123"
-        }
-        
-        # We want to ensure it doesn't loop infinitely.
-        # If it didn't stop, it might try to call LLM again or execute tools.
-        
-        # Prepare JSON content
-        json_str = str(done_plan_json).replace('None', 'null').replace('True', 'true').replace('False', 'false').replace("'", '"')
-        mock_response = {
-            "choices": [{
-                "message": {
-                    "content": f"```json\n{json_str}\n```"
-                }
-            }]
-        }
-        mock_context.llm_client.chat_completion.return_value = mock_response
+        mock_context.llm_client.chat_completion.return_value = _DONE_PLAN_RESPONSE
         
         # Call handle_chat
         user_msg = "Do the thing"
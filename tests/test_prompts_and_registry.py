@@ -5,68 +5,72 @@ from src.ghost_agent.core.prompts import (
     PLANNING_SYSTEM_PROMPT,
     CRITIC_SYSTEM_PROMPT
 )
-from src.ghost_agent.tools.registry import TOOL_DEFINITIONS
 
-def test_system_prompt_json_tools_constraint():
-    """Verify that SYSTEM_PROMPT mandates JSON tools and does not use negative imports."""
-    assert "DO NOT manually type `<tool_call>`" in SYSTEM_PROMPT
-    assert "The native tools (file_system, knowledge_base, etc.) are triggered via the native tool_calls API, NOT by typing raw JSON" in SYSTEM_PROMPT
-    # Guarantee we removed the previous hallucination-causing suggestion
-    assert "import knowledge_base" not in SYSTEM_PROMPT
-    
-def test_code_system_prompt_positive_isolation():
-    """Verify CODE_SYSTEM_PROMPT frames tool access via isolation instead of negative import suggestions."""
-    assert "NATIVE TOOLS FIRST" in CODE_SYSTEM_PROMPT
-    assert "Do NOT write Python scripts for tasks that can be handled natively" in CODE_SYSTEM_PROMPT
-    assert "SANDBOX ISOLATION:" in CODE_SYSTEM_PROMPT
-    assert "You cannot trigger agent tools from within Python" in CODE_SYSTEM_PROMPT
-    
-def test_code_system_prompt_stateful():
-    """Verify CODE_SYSTEM_PROMPT explicitly advertises stateful execution."""
-    assert "STATEFUL EXECUTION:" in CODE_SYSTEM_PROMPT
-    assert "If you are doing Exploratory Data Analysis" in CODE_SYSTEM_PROMPT
-    assert "persistent Jupyter-like REPL" in CODE_SYSTEM_PROMPT
-    
-def test_planning_system_prompt_tool_binding():
-    """Verify the Planner explicitly performs Tool Binding."""
-    assert "7. TOOL BINDING:" in PLANNING_SYSTEM_PROMPT
-    assert "explicitly state WHICH JSON tool should be used" in PLANNING_SYSTEM_PROMPT
-    assert "[Specific next tool action]" in PLANNING_SYSTEM_PROMPT
-    assert "3. STATE UPDATE: If a sub-task is complete, you MUST change its status to \"DONE\"" in PLANNING_SYSTEM_PROMPT
+PROMPTS = {
+    "SYSTEM_PROMPT": SYSTEM_PROMPT,
+    "CODE_SYSTEM_PROMPT": CODE_SYSTEM_PROMPT,
+    "PLANNING_SYSTEM_PROMPT": PLANNING_SYSTEM_PROMPT,
+    "CRITIC_SYSTEM_PROMPT": CRITIC_SYSTEM_PROMPT,
+}
 
-def test_critic_system_prompt_tool_reinvention():
-    """Verify the Critic red-teams against tool reinvention."""
-    assert "4. TOOL REINVENTION:" in CRITIC_SYSTEM_PROMPT
-    assert "Does this script just download a file, fetch a webpage, or try to interact with the knowledge base?" in CRITIC_SYSTEM_PROMPT
-    assert "If the code reinvents a native tool, return: print('SYSTEM GUARD: Code execution blocked." in CRITIC_SYSTEM_PROMPT
+PROMPT_ASSERTIONS = [
+    # SYSTEM_PROMPT mandates JSON tools
+    ("SYSTEM_PROMPT", "DO NOT manually type `<tool_call>`"),
+    ("SYSTEM_PROMPT", "The native tools (file_system, knowledge_base, etc.) are triggered via the native tool_calls API, NOT by typing raw JSON"),
+    # CODE_SYSTEM_PROMPT frames tool access via isolation instead of negative import suggestions
+    ("CODE_SYSTEM_PROMPT", "NATIVE TOOLS FIRST"),
+    ("CODE_SYSTEM_PROMPT", "Do NOT write Python scripts for tasks that can be handled natively"),
+    ("CODE_SYSTEM_PROMPT", "SANDBOX ISOLATION:"),
+    ("CODE_SYSTEM_PROMPT", "You cannot trigger agent tools from within Python"),
+    # CODE_SYSTEM_PROMPT explicitly advertises stateful execution
+    ("CODE_SYSTEM_PROMPT", "STATEFUL EXECUTION:"),
+    ("CODE_SYSTEM_PROMPT", "If you are doing Exploratory Data Analysis"),
+    ("CODE_SYSTEM_PROMPT", "persistent Jupyter-like REPL"),
+    # The Planner explicitly performs Tool Binding
+    ("PLANNING_SYSTEM_PROMPT", "7. TOOL BINDING:"),
+    ("PLANNING_SYSTEM_PROMPT", "explicitly state WHICH JSON tool should be used"),
+    ("PLANNING_SYSTEM_PROMPT", "[Specific next tool action]"),
+    ("PLANNING_SYSTEM_PROMPT", "3. STATE UPDATE: If a sub-task is complete, you MUST change its status to \"DONE\""),
+    # The Critic red-teams against tool reinvention
+    ("CRITIC_SYSTEM_PROMPT", "4. TOOL REINVENTION:"),
+    ("CRITIC_SYSTEM_PROMPT", "Does this script just download a file, fetch a webpage, or try to interact with the knowledge base?"),
+    ("CRITIC_SYSTEM_PROMPT", "If the code reinvents a native tool, return: print('SYSTEM GUARD: Code execution blocked."),
+]
 
-def test_tool_registry_negative_constraints():
-    """Verify that critical native tools contain explicit negative execution constraints."""
-    execute_tool = next(t for t in TOOL_DEFINITIONS if t["function"]["name"] == "execute")
-    file_system_tool = next(t for t in TOOL_DEFINITIONS if t["function"]["name"] == "file_system")
-    kb_tool = next(t for t in TOOL_DEFINITIONS if t["function"]["name"] == "knowledge_base")
-    
+@pytest.mark.parametrize("prompt_name, needle", PROMPT_ASSERTIONS)
+def test_prompt_contains(prompt_name, needle):
+    assert needle in PROMPTS[prompt_name]
+
+def test_system_prompt_no_negative_imports():
+    """Guarantee we removed the previous hallucination-causing suggestion."""
+    assert "import knowledge_base" not in SYSTEM_PROMPT
+
+TOOL_DESCRIPTION_ASSERTIONS = [
     # Execute constraints
-    assert "USE THIS ONLY AS A LAST RESORT" in execute_tool["function"]["description"]
-    assert "DO NOT use this to simply create/write web files (HTML/CSS) or data files" in execute_tool["function"]["description"]
-    assert "WARNING: Native tools CANNOT be imported in Python" in execute_tool["function"]["description"]
-    
+    ("execute", "USE THIS ONLY AS A LAST RESORT"),
+    ("execute", "DO NOT use this to simply create/write web files (HTML/CSS) or data files"),
+    ("execute", "WARNING: Native tools CANNOT be imported in Python"),
     # File System constraints
-    assert "ALWAYS use this to list, read, write (including HTML, CSS, JS, JSON), DOWNLOAD, rename, move, or delete files" in file_system_tool["function"]["description"]
-    assert "Do NOT write Python scripts for these tasks." in file_system_tool["function"]["description"]
-    
+    ("file_system", "ALWAYS use this to list, read, write (including HTML, CSS, JS, JSON), DOWNLOAD, rename, move, or delete files"),
+    ("file_system", "Do NOT write Python scripts for these tasks."),
     # Knowledge Base constraints
-    assert "ALWAYS use this to ingest_document" in kb_tool["function"]["description"]
-    assert "Do NOT write Python scripts to read PDFs or ingest files." in kb_tool["function"]["description"]
+    ("knowledge_base", "ALWAYS use this to ingest_document"),
+    ("knowledge_base", "Do NOT write Python scripts to read PDFs or ingest files."),
+]
+
+@pytest.mark.parametrize("tool_name, needle", TOOL_DESCRIPTION_ASSERTIONS)
+def test_tool_registry_negative_constraints(tool_map, tool_name, needle):
+    """Verify that critical native tools contain explicit negative execution constraints."""
+    assert needle in tool_map[tool_name]["function"]["description"]
 
-def test_tool_schemas_and_properties():
+def test_tool_schemas_and_properties(tool_map):
     """Verify that recent schema modifications to tools are present and correct."""
-    file_system = next(t for t in TOOL_DEFINITIONS if t["function"]["name"] == "file_system")
-    scratchpad = next((t for t in TOOL_DEFINITIONS if t["function"]["name"] == "scratchpad"), None)
-    kb = next(t for t in TOOL_DEFINITIONS if t["function"]["name"] == "knowledge_base")
-    update_profile = next(t for t in TOOL_DEFINITIONS if t["function"]["name"] == "update_profile")
-    execute = next(t for t in TOOL_DEFINITIONS if t["function"]["name"] == "execute")
-    manage_tasks = next(t for t in TOOL_DEFINITIONS if t["function"]["name"] == "manage_tasks")
+    file_system = tool_map["file_system"]
+    scratchpad = tool_map.get("scratchpad")
+    kb = tool_map["knowledge_base"]
+    update_profile = tool_map["update_profile"]
+    execute = tool_map["execute"]
+    manage_tasks = tool_map["manage_tasks"]
     
     # 1. file_system
     fs_props = file_system["function"]["parameters"]["properties"]
@@ -107,10 +111,10 @@ def test_tool_schemas_and_properties():
     assert "interval:seconds" in mt_props["cron_expression"]["description"]
     assert "required for 'create'" in mt_props["task_name"]["description"]
 
-def test_system_prompt_rag_routing():
+def test_system_prompt_rag_routing(tool_map):
     """Verify that SYSTEM_PROMPT explicitly routes document questions to recall tool"""
     assert "KNOWLEDGE & RAG" in SYSTEM_PROMPT
     
-    recall_tool = next(t for t in TOOL_DEFINITIONS if t["function"]["name"] == "recall")
+    recall_tool = tool_map["recall"]
     assert "INGESTED DOCUMENTS" in recall_tool["function"]["description"]
     assert "ALWAYS use this FIRST" in recall_tool["function"]["description"]
@@ -1,13 +1,12 @@
-
 import pytest
 from ghost_agent.core.prompts import CODE_SYSTEM_PROMPT, CRITIC_SYSTEM_PROMPT
 
-def test_code_system_prompt_backslash_ban():
-    """Verify that CODE_SYSTEM_PROMPT contains the F-String Backslash Ban rule."""
-    expected_rule = "F-STRING BACKSLASH BAN: Python 3.11 DOES NOT allow backslashes (\\) inside f-string expressions"
-    assert expected_rule in CODE_SYSTEM_PROMPT, "CODE_SYSTEM_PROMPT is missing the F-String Backslash Ban rule."
+BACKSLASH_BAN_RULE = "F-STRING BACKSLASH BAN: Python 3.11 DOES NOT allow backslashes (\\) inside f-string expressions"
 
-def test_critic_system_prompt_backslash_ban():
-    """Verify that CRITIC_SYSTEM_PROMPT contains the F-String Backslash Ban rule."""
-    expected_rule = "F-STRING BACKSLASH BAN: Python 3.11 DOES NOT allow backslashes (\\) inside f-string expressions"
-    assert expected_rule in CRITIC_SYSTEM_PROMPT, "CRITIC_SYSTEM_PROMPT is missing the F-String Backslash Ban rule."
+@pytest.mark.parametrize("prompt_name, prompt", [
+    ("CODE_SYSTEM_PROMPT", CODE_SYSTEM_PROMPT),
+    ("CRITIC_SYSTEM_PROMPT", CRITIC_SYSTEM_PROMPT),
+])
+def test_system_prompt_backslash_ban(prompt_name, prompt):
+    """Verify that both code-writing prompts carry the F-String Backslash Ban rule."""
+    assert BACKSLASH_BAN_RULE in prompt, f"{prompt_name} is missing the F-String Backslash Ban rule."
@@ -1,9 +1,8 @@
 import pytest
 
-def test_prompts_contain_replace_instructions():
-    # To avoid importing the main agent loop, we just read the file directly to check
-    with open("src/ghost_agent/core/prompts.py", "r", encoding="utf-8") as f:
-        content = f.read()
+def test_prompts_contain_replace_instructions(prompts_source):
+    # To avoid importing the main agent loop, we check the file's source text directly
+    content = prompts_source
     
     assert "EDITING EXISTING FILES" in content
     assert "NEVER use `file_system` \"write\" (which overwrites the whole file)" in content
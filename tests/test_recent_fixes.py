@@ -1,5 +1,6 @@
 import pytest
 import asyncio
+import httpx
 from unittest.mock import MagicMock, AsyncMock, patch
 from pathlib import Path
 
@@ -29,40 +30,31 @@ async def test_file_system_write_missing_content():
 @pytest.mark.asyncio
 async def test_download_file_size_limit():
     url = "http://example.com/large"
-    mock_resp = AsyncMock()
-    mock_resp.status_code = 200
-    mock_resp.headers = {"Content-Length": "50000001"}
+    # A real httpx client over a mock transport: the tool streams a genuine Response with the oversized header
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, headers={"Content-Length": "50000001"}))
     
-    with patch("ghost_agent.tools.file_system.curl_requests", None), \
-         patch("ghost_agent.tools.file_system.httpx.AsyncClient") as mock_client_cls:
-        mock_client = AsyncMock()
-        mock_client_cls.return_value.__aenter__.return_value = mock_client
-        
-        mock_context = MagicMock()
-        mock_context.__aenter__.return_value = mock_resp
-        mock_context.__aexit__.return_value = None
-        mock_client.stream = MagicMock(return_value=mock_context)
-        
-        res = await tool_download_file(url, Path("/tmp"), None)
-        assert "Error: File is too large" in res
-        assert "50MB" in res
+    async with httpx.AsyncClient(transport=transport) as client:
+        with patch("ghost_agent.tools.file_system.curl_requests", None), \
+             patch("ghost_agent.tools.file_system._get_client", return_value=client):
+            res = await tool_download_file(url, Path("/tmp"), None)
+    
+    assert res == "Error: File is too large (50.0MB). Download limit is 50MB."
 
 @pytest.mark.asyncio
 async def test_database_statement_timeout():
-    mock_psycopg = MagicMock()
-    with patch.dict("sys.modules", {"psycopg2": mock_psycopg, "psycopg2.extras": MagicMock(), "tabulate": MagicMock()}):
-        mock_conn = MagicMock()
-        mock_cur = MagicMock()
-        mock_conn.cursor.return_value.__enter__.return_value = mock_cur
-        mock_psycopg.connect.return_value = mock_conn
-        
+    # spec_set pins the stubs to the asyncpg surface the tool uses; any other access fails loudly
+    mock_conn = MagicMock(spec_set=["fetch", "close"])
+    mock_conn.fetch = AsyncMock(return_value=[])
+    mock_conn.close = AsyncMock()
+    mock_asyncpg = MagicMock(spec_set=["connect"])
+    mock_asyncpg.connect = AsyncMock(return_value=mock_conn)
+    with patch.dict("sys.modules", {"asyncpg": mock_asyncpg, "tabulate": MagicMock(spec_set=["tabulate"])}):
         # Action 'query'
         res = await tool_postgres_admin("query", "uri", "SELECT 1")
         
-        # Verify execute was called with SET statement_timeout
-        calls = mock_cur.execute.call_args_list
-        assert calls[0][0][0] == "SET statement_timeout = 15000;"
-        assert "SELECT 1" in calls[1][0][0]
+        # Verify statement_timeout is set at connect time, before the query runs
+        assert mock_asyncpg.connect.call_args.kwargs["server_settings"] == {"statement_timeout": "15000"}
+        assert "SELECT 1" in mock_conn.fetch.call_args[0][0]
 
 @pytest.mark.asyncio
 async def test_execute_stubbornness_large_file():
@@ -89,7 +81,6 @@ async def test_execute_stubbornness_large_file():
 
 @pytest.mark.asyncio
 async def test_schedule_task_uuid_and_interval_fallback():
-    import apscheduler
     mock_scheduler = MagicMock()
     
     with patch("ghost_agent.tools.tasks.run_proactive_task_fn", new=MagicMock()):
@@ -3,12 +3,13 @@ import asyncio
 from pathlib import Path
 from unittest.mock import MagicMock
 
+# The guards only look at files each test writes under its own name, so all three share the session sandbox
+
 # 1. Test binary file read guard
 from ghost_agent.tools.file_system import tool_read_file
 @pytest.mark.asyncio
-async def test_read_binary_file_guard(tmp_path):
-    sandbox = tmp_path / "sandbox"
-    sandbox.mkdir()
+async def test_read_binary_file_guard(shared_sandbox):
+    sandbox = shared_sandbox
     image_file = sandbox / "test_image.png"
     # Write some non-decodable bytes
     image_file.write_bytes(b"\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00")
@@ -25,9 +26,8 @@ class MockSandbox:
         return "Executed", 0
 
 @pytest.mark.asyncio
-async def test_execute_forbidden_modules_extended(tmp_path):
-    sandbox = tmp_path / "sandbox"
-    sandbox.mkdir()
+async def test_execute_forbidden_modules_extended(shared_sandbox):
+    sandbox = shared_sandbox
     manager = MockSandbox()
     
     # Test one of the newly added forbidden modules
@@ -44,9 +44,8 @@ async def test_execute_forbidden_modules_extended(tmp_path):
 # 3. Test memory ingestion binary guard
 from ghost_agent.tools.memory import tool_gain_knowledge
 @pytest.mark.asyncio
-async def test_memory_binary_ingestion_guard(tmp_path):
-    sandbox = tmp_path / "sandbox"
-    sandbox.mkdir()
+async def test_memory_binary_ingestion_guard(shared_sandbox):
+    sandbox = shared_sandbox
     exe_file = sandbox / "program.exe"
     exe_file.write_text("mock binary data")
     
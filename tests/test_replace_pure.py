@@ -0,0 +1,30 @@
+import pytest
+from ghost_agent.tools.file_system import _replace_in_text
+
+EXACT = "SUCCESS: Exact match found and replaced in 'test.txt'."
+
+@pytest.mark.parametrize("content, old, new, expected_content, expected_msg", [
+    # Exact single match
+    ("Hello World\nLine 2\nLine 3", "Line 2", "Replaced Line 2", "Hello World\nReplaced Line 2\nLine 3", EXACT),
+    # Exact match, every occurrence replaced
+    ("duplicate\nduplicate", "duplicate", "single", "single\nsingle",
+     EXACT + " WARNING: Replaced 2 identical occurrences."),
+    # Heuristic match despite mangled indentation in the search block
+    ("def my_func():\n    print('hello')\n    return True",
+     "def my_func():\n print('hello')\n return True",
+     "def my_func():\n    print('world')\n    return False",
+     "def my_func():\n    print('world')\n    return False",
+     "SUCCESS: Flexible match found and replaced in 'test.txt'."),
+], ids=["exact", "exact-multiple", "heuristic"])
+def test_replace_in_text_success(content, old, new, expected_content, expected_msg):
+    assert _replace_in_text(content, old, new, "test.txt") == (expected_content, expected_msg)
+
+@pytest.mark.parametrize("content, old, expected_prefix", [
+    ("Hello World", "Goodbye", "Error: The exact search block was NOT found"),
+    # The trailing space fails exact matching but matches both blocks flexibly
+    ("    print('hello')\n\n\n    print('hello')", "print('hello') ", "Error: Multiple instances of this text block found"),
+], ids=["no-match", "heuristic-multiple"])
+def test_replace_in_text_leaves_content_alone(content, old, expected_prefix):
+    new_content, msg = _replace_in_text(content, old, "replacement", "test.txt")
+    assert new_content is None
+    assert msg.startswith(expected_prefix)
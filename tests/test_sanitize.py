@@ -1,5 +1,7 @@
 
 import pytest
+import ast
+from unittest.mock import patch
 from ghost_agent.utils.sanitizer import sanitize_code, extract_code_from_markdown, _repair_line
 
 def test_extract_code_from_markdown_basic():
@@ -61,6 +63,13 @@ def test_sanitize_code_syntax_error_reporting():
     assert err is not None
     assert "SyntaxError" in err
 
+def test_sanitize_code_parses_valid_code_once():
+    code = "import os\nprint(os.getcwd())"
+    with patch("ghost_agent.utils.sanitizer.ast.parse", wraps=ast.parse) as parse:
+        sanitized, err = sanitize_code(code, "test.py")
+    assert (sanitized, err) == (code, None)
+    assert parse.call_count == 1
+
 def test_sanitize_control_characters():
     # Backspace injection check
     bad_code = "print('Hacking')\x08\x08\x08\x08Safe"
@@ -2,6 +2,10 @@ import pytest
 from unittest.mock import MagicMock, AsyncMock, patch
 from ghost_agent.tools.search import tool_deep_research
 
+# A page larger than the 15k edge budget, and the 3k preview it falls back to
+_FETCH_PAYLOAD = "A" * 20000
+_PAYLOAD_3K = _FETCH_PAYLOAD[:3000]
+
 # We need to mock importlib.util.find_spec("ddgs") and asyncio.to_thread
 @pytest.fixture
 def mock_ddgs():
@@ -15,7 +19,7 @@ def mock_ddgs():
 def mock_fetch():
     with patch("ghost_agent.tools.search.helper_fetch_url_content", new_callable=AsyncMock) as mock_fetch_content:
         # Return a large text block
-        mock_fetch_content.return_value = "A" * 20000
+        mock_fetch_content.return_value = _FETCH_PAYLOAD
         yield mock_fetch_content
 
 @pytest.mark.asyncio
@@ -48,11 +52,18 @@ async def test_deep_research_map_reduce_online(mock_ddgs, mock_fetch):
     assert "[EDGE EXTRACTED FACTS]:" in result
     assert "Extracted facts." in result
 
-@pytest.mark.asyncio
-async def test_deep_research_map_reduce_offline(mock_ddgs, mock_fetch):
-    # Setup Edge Node LLM Client to fail (offline)
+def offline_edge():
     llm_client = MagicMock()
     llm_client.chat_completion = AsyncMock(side_effect=Exception("Offline"))
+    return llm_client
+
+@pytest.mark.parametrize("make_llm_client", [
+    pytest.param(offline_edge, id="offline"),
+    pytest.param(lambda: None, id="none"),
+])
+@pytest.mark.asyncio
+async def test_deep_research_map_reduce_fallback(mock_ddgs, mock_fetch, make_llm_client):
+    llm_client = make_llm_client()
     
     result = await tool_deep_research(
         query="test", 
@@ -62,23 +73,10 @@ async def test_deep_research_map_reduce_offline(mock_ddgs, mock_fetch):
         model_name="Test-Model"
     )
     
-    # Should fallback to 3000 chars of source text
-    assert llm_client.chat_completion.call_count == 1
-    assert "A" * 3000 in result
-    # It shouldn't contain more than that since preview is limited
-    # len(result) is ~3000 chars + boilerplate
-    assert "[EDGE EXTRACTED FACTS]:" not in result
-
-@pytest.mark.asyncio
-async def test_deep_research_map_reduce_none(mock_ddgs, mock_fetch):
-    
-    result = await tool_deep_research(
-        query="test", 
-        anonymous=False, 
-        tor_proxy="", 
-        llm_client=None, 
-    )
+    # An offline edge node is tried once; with no edge node the LLM is never called
+    if llm_client is not None:
+        assert llm_client.chat_completion.call_count == 1
     
-    # Should fallback to 3000 chars of source text directly without calling lmm
-    assert "A" * 3000 in result
+    # Either way the result falls back to 3000 chars of source text
+    assert _PAYLOAD_3K in result
     assert "[EDGE EXTRACTED FACTS]:" not in result
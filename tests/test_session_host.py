@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+import ghost_agent.sandbox.session_host as session_host
+
+HOST = Path(session_host.__file__)
+
+@pytest.fixture
+def session(tmp_path):
+    env = {**os.environ, "GHOST_SESSION_DIR": str(tmp_path)}
+    server = subprocess.Popen([sys.executable, "-u", str(HOST), "--serve"], cwd=tmp_path, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    while not (tmp_path / ".ghost_session.sock").exists():
+        time.sleep(0.01)
+
+    def run(name, code, *args, timeout=None):
+        (tmp_path / name).write_text(code)
+        cmd = [sys.executable, "-u", str(HOST), name, *args]
+        if timeout:
+            cmd = ["timeout", str(timeout)] + cmd
+        return subprocess.run(cmd, cwd=tmp_path, env=env, capture_output=True, text=True)
+
+    yield run
+    server.kill()
+    server.wait()
+
+def test_variables_survive_between_scripts(session):
+    res = session("load.py", "import sys\ndata = [1, 2]\nprint(sys.argv[1:])", "a b")
+    assert (res.returncode, res.stdout) == (0, "['a b']\n")
+
+    res = session("use.py", "import subprocess\ndata.append(3)\nprint(data)\nsubprocess.run(['echo', 'child'])")
+    assert (res.returncode, res.stdout) == (0, "[1, 2, 3]\nchild\n")
+
+def test_errors_report_script_traceback_and_exit_code(session):
+    res = session("bad.py", "x = 1\ny = x / 0")
+    assert res.returncode == 1
+    assert 'bad.py", line 2' in res.stdout
+    assert "session_host" not in res.stdout
+
+    assert session("exit.py", "raise SystemExit(3)").returncode == 3
+
+@pytest.mark.slow
+def test_timed_out_script_is_interrupted_and_session_kept(session):
+    session("setup.py", "kept = 'yes'")
+    res = session("spin.py", "while True: pass", timeout=1)
+    assert res.returncode == 124
+
+    res = session("after.py", "print(kept)")
+    assert (res.returncode, res.stdout) == (0, "yes\n")
+
+def test_edited_workspace_module_is_reimported(session, tmp_path):
+    # In the sandbox the host sits in the workspace, which puts it on sys.path
+    (tmp_path / "helper.py").write_text("VALUE = 1\n")
+    res = session("first.py", "import os, sys\nsys.path.insert(0, os.getcwd())\nimport helper\nprint(helper.VALUE)")
+    assert res.stdout == "1\n"
+
+    (tmp_path / "helper.py").write_text("VALUE = 22\n")
+    res = session("second.py", "import helper\nprint(helper.VALUE)")
+    assert res.stdout == "22\n"
+
+def test_output_is_relayed_while_the_script_runs(session, tmp_path):
+    env = {**os.environ, "GHOST_SESSION_DIR": str(tmp_path)}
+    (tmp_path / "slow.py").write_text(
+        "import os, time\nprint('x' * 200000)\nprint('early', flush=True)\n"
+        "deadline = time.monotonic() + 10\n"
+        "while not os.path.exists('go') and time.monotonic() < deadline: time.sleep(0.01)\n"
+        "print('late' if os.path.exists('go') else 'never saw go')\n"
+    )
+    proc = subprocess.Popen([sys.executable, "-u", str(HOST), "slow.py"], cwd=tmp_path, env=env,
+                            stdout=subprocess.PIPE, text=True)
+    assert proc.stdout.readline() == "x" * 200000 + "\n"
+    assert proc.stdout.readline() == "early\n"
+    # 'go' only appears once those lines arrive, so a client that held output until the end would time out
+    (tmp_path / "go").touch()
+    assert proc.stdout.read() == "late\n"
+    assert proc.wait() == 0
@@ -1,22 +1,15 @@
 
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 from ghost_agent.memory.vector import VectorMemory
 
 @pytest.fixture
 def mock_vector_memory():
-    # Mock dependencies
-    memory_dir = MagicMock()
-    memory_dir.exists.return_value = True
-    upstream_url = "http://localhost:11434"
-    
-    # Patch __init__
-    with pytest.MonkeyPatch.context() as m:
-        m.setattr("ghost_agent.memory.vector.VectorMemory.__init__", lambda self, a, b, c=None: None)
-        vm = VectorMemory(memory_dir, upstream_url)
-        vm.collection = MagicMock()
-        vm.add = MagicMock() # Mock add so we can check if it's called
-        return vm
+    # Skip __init__ (chroma client, embedder) by allocating the instance directly; no patching to undo
+    vm = VectorMemory.__new__(VectorMemory)
+    vm.collection = MagicMock()
+    vm.add = MagicMock() # Mock add so we can check if it's called
+    return vm
 
 def test_smart_update_deduplication_threshold(mock_vector_memory):
     # Scenario: We are adding a memory that is a paraphrase of an existing one.
@@ -1,7 +1,7 @@
 import pytest
 import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
-from src.ghost_agent.tools.swarm import tool_delegate_to_swarm
+from src.ghost_agent.tools.swarm import tool_delegate_to_swarm, _swarm_tasks
 
 @pytest.fixture
 def mock_llm_client():
@@ -32,7 +32,7 @@ async def test_tool_delegate_to_swarm_success(mock_llm_client):
     assert "1 task(s)" in result
     
     # Wait for background tasks to finish
-    await asyncio.sleep(0.1)
+    await asyncio.gather(*_swarm_tasks)
     
     mock_node["client"].post.assert_awaited_once()
     mock_scratchpad.set.assert_called_once_with("my_key", "Swarm Result")
@@ -54,7 +54,7 @@ async def test_tool_delegate_to_swarm_backward_compatibility(mock_llm_client):
     assert "SUCCESS" in result
     
     # Wait for background tasks to finish
-    await asyncio.sleep(0.1)
+    await asyncio.gather(*_swarm_tasks)
     
     mock_node["client"].post.assert_awaited_once()
     mock_scratchpad.set.assert_called_once_with("my_key_legacy", "Swarm Result Legacy")
@@ -85,7 +85,7 @@ async def test_tool_delegate_to_swarm_offline_fallback(mock_llm_client):
         result = await tool_delegate_to_swarm(mock_llm, "test-model", mock_scratchpad, instruction="Summarize", input_data="Some data", output_key="my_key")
     
     # Wait for background tasks to finish
-    await asyncio.sleep(0.1)
+    await asyncio.gather(*_swarm_tasks)
     
     # Scratchpad should be updated with a system alert
     mock_scratchpad.set.assert_called_once()
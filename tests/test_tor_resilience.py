@@ -1,9 +1,16 @@
 import pytest
 import asyncio
-from unittest.mock import patch, MagicMock, AsyncMock
+import types
+from unittest.mock import patch, MagicMock, AsyncMock, mock_open
 
 from src.ghost_agent.utils.helpers import request_new_tor_identity, helper_fetch_url_content
 from src.ghost_agent.tools.search import tool_search_ddgs, tool_deep_research
+from src.ghost_agent.tools.file_system import tool_download_file
+from src.ghost_agent.tools.system import tool_get_weather, tool_check_health
+
+def fake_response(status, text="", json_payload=None, **extra):
+    # The retry paths only read status_code, text, json() and, for downloads, headers/aiter_content
+    return types.SimpleNamespace(status_code=status, text=text, json=lambda: json_payload, **extra)
 
 def test_request_new_tor_identity_success():
     with patch("socket.socket") as mock_socket:
@@ -47,13 +54,8 @@ async def test_helper_fetch_url_content_retry_403():
         mock_requests.AsyncSession.return_value.__aenter__.return_value = mock_session_instance
         
         # Responses: first 403, then 200
-        resp_403 = MagicMock()
-        resp_403.status_code = 403
-        resp_403.text = "Forbidden"
-        
-        resp_200 = MagicMock()
-        resp_200.status_code = 200
-        resp_200.text = "<html><body>Some content</body></html>"
+        resp_403 = fake_response(403, text="Forbidden")
+        resp_200 = fake_response(200, text="<html><body>Some content</body></html>")
         
         mock_session_instance.get.side_effect = [resp_403, resp_200]
         
@@ -64,59 +66,44 @@ async def test_helper_fetch_url_content_retry_403():
         assert mock_session_instance.get.call_count == 2
         mock_sleep.assert_called_with(5)
 
-@pytest.mark.asyncio
-async def test_tool_search_ddgs_retry():
-    mock_ddgs_module = MagicMock()
-    mock_ddgs_class = MagicMock()
-    mock_ddgs_module.DDGS = mock_ddgs_class
+TOR_PROXY = "socks5://127.0.0.1:9050"
+
+@pytest.fixture(scope="module")
+def fake_ddgs():
+    # ddgs is not a hard requirement; install one stand-in module for the file and hand tests its DDGS class
+    module = types.ModuleType("ddgs")
+    module.DDGS = MagicMock()
+    with patch.dict("sys.modules", {"ddgs": module}):
+        yield module.DDGS
 
-    with patch.dict("sys.modules", {"ddgs": mock_ddgs_module}), \
-         patch("importlib.util.find_spec", return_value=True), \
+@pytest.mark.parametrize("search", [
+    pytest.param(lambda: tool_search_ddgs("test query", TOR_PROXY), id="search"),
+    pytest.param(lambda: tool_deep_research("test query deep", anonymous=True, tor_proxy=TOR_PROXY), id="deep_research"),
+])
+@pytest.mark.asyncio
+async def test_ddgs_retry_renews_tor_identity(fake_ddgs, search):
+    with patch("importlib.util.find_spec", return_value=True), \
          patch("src.ghost_agent.utils.helpers.request_new_tor_identity") as mock_renew, \
-         patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+         patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep, \
+         patch("src.ghost_agent.tools.search.helper_fetch_url_content", new_callable=AsyncMock, return_value="Mocked content of site"):
          
         # Make DDGS context manager raise exception first time, return results second time
-        mock_ddgs_instance = MagicMock()
-        mock_ddgs_class.return_value.__enter__.return_value = mock_ddgs_instance
+        mock_ddgs_instance = fake_ddgs.return_value.__enter__.return_value
+        mock_ddgs_instance.text.side_effect = [Exception("Tor blocked"), [{"title": "t1", "body": "b1", "href": "http://example.com/good"}]]
         
-        mock_ddgs_instance.text.side_effect = [Exception("Tor blocked"), [{"title": "t", "body": "b", "href": "h"}]]
+        result = await search()
         
-        result = await tool_search_ddgs("test query", "socks5://127.0.0.1:9050")
-        
-        assert "1. t" in result
+        assert "http://example.com/good" in result
         # Check that it called renew because it had tor_proxy
         assert mock_renew.call_count == 1
         mock_sleep.assert_called_with(5)
 
-@pytest.mark.asyncio
-async def test_tool_deep_research_retry():
-    mock_ddgs_module = MagicMock()
-    mock_ddgs_class = MagicMock()
-    mock_ddgs_module.DDGS = mock_ddgs_class
-
-    with patch.dict("sys.modules", {"ddgs": mock_ddgs_module}), \
-         patch("importlib.util.find_spec", return_value=True), \
-         patch("src.ghost_agent.utils.helpers.request_new_tor_identity") as mock_renew, \
-         patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
-         
-        mock_ddgs_instance = MagicMock()
-        mock_ddgs_class.return_value.__enter__.return_value = mock_ddgs_instance
-        
-        # Exception first, then valid results
-        mock_ddgs_instance.text.side_effect = [Exception("Tor blocked deep"), [{"title": "t1", "body": "b1", "href": "http://example.com/good"}]]
-        
-        # mock semaphore and requests for deep research parsing
-        with patch("src.ghost_agent.tools.search.helper_fetch_url_content", new_callable=AsyncMock) as mock_fetch:
-            mock_fetch.return_value = "Mocked content of site"
-            result = await tool_deep_research("test query deep", anonymous=True, tor_proxy="socks5://127.0.0.1:9050")
-            
-            assert "http://example.com/good" in result
-            assert mock_renew.call_count == 1
-            mock_sleep.assert_called_with(5)
+async def _dummy_stream():
+    yield b"data chunk"
 
-
-from src.ghost_agent.tools.file_system import tool_download_file
-from src.ghost_agent.tools.system import tool_get_weather, tool_check_health
+# Download responses are read-only and aiter_content starts a fresh stream per call, so they are built once
+_DL_RESP_503 = fake_response(503)
+_DL_RESP_200 = fake_response(200, headers={}, aiter_content=_dummy_stream)
 
 @pytest.mark.asyncio
 async def test_tool_download_file_retry():
@@ -130,21 +117,9 @@ async def test_tool_download_file_retry():
         mock_requests.AsyncSession.return_value.__aenter__.return_value = mock_session_instance
         
         # Responses: 503, Exception, then 200
-        resp_503 = MagicMock()
-        resp_503.status_code = 503
-        
-        resp_200 = MagicMock()
-        resp_200.status_code = 200
-        resp_200.headers = {}
-        
-        async def dummy_stream():
-            yield b"data chunk"
-        resp_200.aiter_content.return_value = dummy_stream()
-        
-        mock_session_instance.get.side_effect = [resp_503, Exception("Timeout"), resp_200]
+        mock_session_instance.get.side_effect = [_DL_RESP_503, Exception("Timeout"), _DL_RESP_200]
         
         sandbox_mock = MagicMock()
-        from unittest.mock import mock_open
         with patch("src.ghost_agent.tools.file_system._get_safe_path", return_value=MagicMock()), \
              patch("builtins.open", mock_open()):
             result = await tool_download_file("http://example.com/file.txt", sandbox_mock, "socks5://127.0.0.1:9050", "file.txt")
@@ -164,12 +139,8 @@ async def test_tool_get_weather_retry():
         mock_session = AsyncMock()
         mock_requests.AsyncSession.return_value.__aenter__.return_value = mock_session
         
-        resp_403 = MagicMock()
-        resp_403.status_code = 403
-        
-        resp_200 = MagicMock()
-        resp_200.status_code = 200
-        resp_200.json.return_value = {"results": [{"latitude": 0, "longitude": 0, "name": "TestCity"}], "current": {"temperature_2m": 20}}
+        resp_403 = fake_response(403)
+        resp_200 = fake_response(200, json_payload={"results": [{"latitude": 0, "longitude": 0, "name": "TestCity"}], "current": {"temperature_2m": 20}})
         
         mock_session.get.side_effect = [resp_403, resp_200, resp_200] # geo search 403, geo search 200, forecast 200
         
@@ -189,15 +160,9 @@ async def test_tool_check_health_retry():
         mock_session = AsyncMock()
         mock_requests.AsyncSession.return_value.__aenter__.return_value = mock_session
         
-        resp_fail = MagicMock()
-        resp_fail.status_code = 503
-        
-        resp_ok = MagicMock()
-        resp_ok.status_code = 200
-        
-        resp_tor_ok = MagicMock()
-        resp_tor_ok.status_code = 200
-        resp_tor_ok.json.return_value = {"IsTor": True}
+        resp_fail = fake_response(503)
+        resp_ok = fake_response(200)
+        resp_tor_ok = fake_response(200, json_payload={"IsTor": True})
         
         # 1.1.1.1 call: 503, 200
         # torproject call: 503, 200_tor
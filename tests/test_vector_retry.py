@@ -3,9 +3,7 @@ import os
 import sys
 from unittest.mock import MagicMock, patch, call
 from pathlib import Path
-
-# Add the src directory to Python path if needed
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from ghost_agent.memory.vector import VectorMemory
 
 @pytest.fixture
 def mock_chroma():
@@ -21,8 +19,6 @@ def mock_logging():
 @patch("time.sleep")
 @patch("sys.exit")
 def test_vector_retry_success(mock_sys_exit, mock_sleep, mock_environ, mock_chroma, mock_logging, tmp_path):
-    from ghost_agent.memory.vector import VectorMemory
-    
     # Mock SentenceTransformerEmbeddingFunction to fail on first attempt, succeed on second
     mock_stef = MagicMock()
     
@@ -54,8 +50,6 @@ def test_vector_retry_success(mock_sys_exit, mock_sleep, mock_environ, mock_chro
 @patch("time.sleep")
 @patch("sys.exit")
 def test_vector_retry_exhaustion(mock_sys_exit, mock_sleep, mock_environ, mock_chroma, mock_logging, tmp_path):
-    from ghost_agent.memory.vector import VectorMemory
-    
     # Mock SentenceTransformerEmbeddingFunction to always fail
     def stef_side_effect(*args, **kwargs):
         raise Exception("Hugging Face download permanent failure")
@@ -76,8 +70,6 @@ def test_vector_retry_exhaustion(mock_sys_exit, mock_sleep, mock_environ, mock_c
 @patch("time.sleep")
 @patch("sys.exit")
 def test_vector_tor_proxy_ignored_for_hf(mock_sys_exit, mock_sleep, mock_chroma, mock_logging, tmp_path):
-    from ghost_agent.memory.vector import VectorMemory
-    
     with patch("chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction") as mock_stef:
         with patch.dict(os.environ, clear=True):
             memory_dir = tmp_path / "memory"
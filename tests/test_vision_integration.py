@@ -1,35 +1,24 @@
 import pytest
 import asyncio
+import httpx
 from unittest.mock import MagicMock, AsyncMock, patch
 from pathlib import Path
+from types import SimpleNamespace
 
 from src.ghost_agent.tools.registry import get_active_tool_definitions, get_available_tools
 from src.ghost_agent.core.llm import LLMClient
 from src.ghost_agent.tools.vision import tool_vision_analysis
 from src.ghost_agent.core.agent import GhostAgent, GhostContext
 
-class DummyArgs:
-    model = "default-model"
-    temperature = 0.5
-    max_context = 8192
-    smart_memory = 0.0
-    use_planning = False
-    anonymous = False
-
-@pytest.fixture
-def mock_llm_client():
-    client = MagicMock(spec=LLMClient)
-    client.vision_clients = []
-    return client
-
 @pytest.fixture
-def mock_context(mock_llm_client, tmp_path):
-    ctx = MagicMock(spec=GhostContext)
-    ctx.args = DummyArgs()
-    ctx.llm_client = mock_llm_client
-    ctx.sandbox_dir = tmp_path
-    ctx.tor_proxy = None
-    ctx.scratchpad = MagicMock()
+def mock_context(tmp_path):
+    # A real context over plain namespaces: the registry only reads args, llm_client.vision_clients and a few paths
+    ctx = GhostContext(
+        SimpleNamespace(model="default-model", temperature=0.5, max_context=8192, smart_memory=0.0, use_planning=False, anonymous=False),
+        sandbox_dir=tmp_path, memory_dir=None, tor_proxy=None,
+    )
+    ctx.llm_client = SimpleNamespace(vision_clients=[])
+    ctx.scratchpad = SimpleNamespace()
     return ctx
 
 def test_get_active_tool_definitions_no_vision(mock_context):
@@ -44,6 +33,12 @@ def test_get_active_tool_definitions_with_vision(mock_context):
     names = [t["function"]["name"] for t in tools]
     assert "vision_analysis" in names
 
+def test_get_active_tool_definitions_reuses_prebuilt_lists(mock_context):
+    mock_context.llm_client.vision_clients = None
+    assert get_active_tool_definitions(mock_context) is get_active_tool_definitions(mock_context)
+    mock_context.llm_client.vision_clients = [{"client": AsyncMock()}]
+    assert get_active_tool_definitions(mock_context) is get_active_tool_definitions(mock_context)
+
 def test_get_available_tools_vision_injected(mock_context):
     mock_context.llm_client.vision_clients = [{"client": AsyncMock()}]
     tools = get_available_tools(mock_context)
@@ -63,8 +58,12 @@ async def test_tool_vision_analysis_no_configured_nodes(mock_context):
 
 @pytest.mark.asyncio
 async def test_llm_client_vision_routing():
-    # Test llm_client get_vision_node logic
-    client = LLMClient(upstream_url="http://fake", visual_nodes=[{"url": "http://vision", "model": "vision-model"}])
+    # Test llm_client get_vision_node logic; specced fakes stand in for the pooled httpx clients
+    client = LLMClient(
+        upstream_url="http://fake", visual_nodes=[{"url": "http://vision", "model": "vision-model"}],
+        client_factory=lambda base_url: MagicMock(spec=httpx.AsyncClient, base_url=base_url),
+        log_fn=lambda *args, **kwargs: None,
+    )
     assert client.vision_clients is not None
     assert len(client.vision_clients) == 1
     
@@ -74,11 +73,12 @@ async def test_llm_client_vision_routing():
     # Mock post response
     mock_resp = MagicMock()
     mock_resp.json.return_value = {"choices": [{"message": {"content": "vision response"}}]}
-    mock_resp.raise_for_status = MagicMock()
-    client.vision_clients[0]["client"].post = AsyncMock(return_value=mock_resp)
+    node["client"].post.return_value = mock_resp
     
     # Test chat_completion with use_vision=True
     res = await client.chat_completion({"model": "test"}, use_vision=True)
     assert res["choices"][0]["message"]["content"] == "vision response"
+    node["client"].post.assert_awaited_once()
 
     await client.close()
+    node["client"].aclose.assert_awaited_once()
@@ -1,84 +1,84 @@
 
 import pytest
-from unittest.mock import MagicMock, AsyncMock, patch
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
 from ghost_agent.core.agent import GhostAgent, GhostContext
-import json
+import orjson
 
-@pytest.fixture
-def agent():
-    context = MagicMock(spec=GhostContext)
-    context.args = MagicMock()
-    context.args.max_context = 8000
-    context.args.smart_memory = 0.0
-    context.args.temperature = 0.0
-    context.args.use_planning = False
-    context.llm_client = AsyncMock()
-    context.memory_system = MagicMock()
-    context.profile_memory = MagicMock()
-    context.skill_memory = MagicMock()
-    context.scratchpad = MagicMock()
-    context.scratchpad.list_all.return_value = "Mock Scratchpad"
-    context.sandbox_dir = "/tmp/sandbox"
-    context.memory_dir = "/tmp/memory"
-    context.tor_proxy = None
-    
-    # Initialize cache with some value
-    context.cached_sandbox_state = "File A, File B"
+# Tool-call payloads are encoded once at import
+_WRITE_ARGS = orjson.dumps({"operation": "write", "path": "file.txt", "content": "hi"}).decode()
+_READ_ARGS = orjson.dumps({"operation": "read", "path": "file.txt"}).decode()
+_CALL_WRITE = {"id": "1", "function": {"name": "file_system", "arguments": _WRITE_ARGS}}
+_CALL_READ = {"id": "2", "function": {"name": "file_system", "arguments": _READ_ARGS}}
+
+# Tool stand-ins are allocated once; the agent fixture only resets their call records
+_MOCK_TOOLS = {
+    "file_system": AsyncMock(return_value="Success"),
+    "execute": AsyncMock(return_value="Exit Code: 0"),
+}
+
+# handle_chat only ever calls add_task on its background_tasks argument; scheduled work is dropped
+_NO_BACKGROUND_TASKS = SimpleNamespace(add_task=lambda *args, **kwargs: None)
+
+def _seq(*responses):
+    # Scripted LLM replies as a bare coroutine function, without AsyncMock's call bookkeeping
+    it = iter(responses)
+    async def _f(*args, **kwargs):
+        return next(it)
+    return _f
+
+@pytest.fixture(scope="module")
+def _agent_skeleton(tmp_path_factory):
+    # Built once: a real context over plain namespaces, routing to the two tools these tests call
+    context = GhostContext(
+        SimpleNamespace(max_context=8000, smart_memory=0.0, temperature=0.0, use_planning=False),
+        sandbox_dir=tmp_path_factory.mktemp("sandbox"), memory_dir=tmp_path_factory.mktemp("memory"), tor_proxy=None,
+    )
+    context.llm_client = SimpleNamespace(chat_completion=None)
+    context.memory_system = SimpleNamespace(search=lambda *a, **k: "")
+    context.profile_memory = SimpleNamespace(get_context_string=lambda: "")
+    context.skill_memory = SimpleNamespace(get_playbook_context=lambda **k: "")
+    context.scratchpad = SimpleNamespace(list_all=lambda: "Mock Scratchpad")
     
-    # Mock available tools
-    with patch("ghost_agent.core.agent.get_available_tools") as mock_get_tools:
-        mock_tools = {
-            "file_system": AsyncMock(return_value="Success"),
-            "execute": AsyncMock(return_value="Exit Code: 0"),
-        }
-        mock_get_tools.return_value = mock_tools
-        agent = GhostAgent(context)
-        return agent
+    agent = GhostAgent(context)
+    agent.available_tools = _MOCK_TOOLS
+    return agent
 
+@pytest.fixture
+def agent(_agent_skeleton):
+    # Only the sandbox cache changes between tests; each test scripts its own LLM replies
+    _agent_skeleton.context.cached_sandbox_state = "File A, File B"
+    _agent_skeleton.context.cached_sandbox_state_expiry = float("inf")
+    _MOCK_TOOLS["file_system"].reset_mock()
+    return _agent_skeleton
+
+@pytest.mark.parametrize("call, expected", [
+    pytest.param(_CALL_WRITE, None, id="write_invalidates"),
+    pytest.param(_CALL_READ, "File A, File B", id="read_preserves"),
+])
 @pytest.mark.asyncio
-async def test_cache_invalidation_on_write(agent):
-    """Verify cache is cleared on file write."""
-    # Setup: Cache is "File A, File B"
-    agent.context.cached_sandbox_state = "File A, File B"
-    
-    # Call file_system with write
-    call_write = {
-        "id": "1", 
-        "function": {
-            "name": "file_system", 
-            "arguments": json.dumps({"operation": "write", "path": "file.txt", "content": "hi"})
-        }
-    }
+async def test_cache_behavior(agent, call, expected):
+    """Verify a file write clears the sandbox cache while a read leaves it intact."""
+    agent.context.llm_client.chat_completion = _seq(
+        {"choices": [{"message": {"role": "assistant", "tool_calls": [call]}}]},
+        {"choices": [{"message": {"role": "assistant", "content": "Done"}}]},
+    )
     
-    agent.context.llm_client.chat_completion.side_effect = [
-        {"choices": [{"message": {"role": "assistant", "tool_calls": [call_write]}}]},
-        {"choices": [{"message": {"role": "assistant", "content": "Done"}}]}
-    ]
+    await agent.handle_chat({"messages": [{"role": "user", "content": "touch file"}]}, _NO_BACKGROUND_TASKS)
     
-    await agent.handle_chat({"messages": [{"role": "user", "content": "write file"}]}, MagicMock())
-    
-    # Assert cache is cleared
-    assert agent.context.cached_sandbox_state is None
+    assert agent.context.cached_sandbox_state == expected
 
 @pytest.mark.asyncio
-async def test_cache_preservation_on_read(agent):
-    """Verify cache is NOT cleared on file read."""
-    agent.context.cached_sandbox_state = "File A, File B"
-    
-    call_read = {
-        "id": "2", 
-        "function": {
-            "name": "file_system", 
-            "arguments": json.dumps({"operation": "read", "path": "file.txt"})
-        }
-    }
-    
-    agent.context.llm_client.chat_completion.side_effect = [
-        {"choices": [{"message": {"role": "assistant", "tool_calls": [call_read]}}]},
-        {"choices": [{"message": {"role": "assistant", "content": "Done"}}]}
-    ]
+async def test_cache_expires_after_ttl(agent):
+    """Verify an expired listing is rescanned even though no mutation was seen."""
+    agent.context.cached_sandbox_state_expiry = 0.0
+    agent.context.llm_client.chat_completion = _seq(
+        {"choices": [{"message": {"role": "assistant", "content": "Done"}}]},
+    )
     
-    await agent.handle_chat({"messages": [{"role": "user", "content": "read file"}]}, MagicMock())
+    with patch("ghost_agent.tools.file_system.tool_list_files", AsyncMock(return_value="File C")) as mock_list:
+        await agent.handle_chat({"messages": [{"role": "user", "content": "debug the python script"}]}, _NO_BACKGROUND_TASKS)
     
-    # Assert cache is PRESERVED
-    assert agent.context.cached_sandbox_state == "File A, File B"
+    mock_list.assert_awaited_once()
+    assert agent.context.cached_sandbox_state == "File C"
+    assert agent.context.cached_sandbox_state_expiry > 0.0